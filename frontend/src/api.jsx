@@ -1,4 +1,3 @@
-import axios from "axios"
 import Cookies from 'js-cookie';
 
 const API_URL = "http://127.0.0.1:8000/api/music"; // Địa chỉ backend
@@ -19,6 +18,24 @@ const getHeaders = (isAuth = false) => {
   return headers;
 };
 
+// Các API danh sách trả về từng trang { next, results }: đi theo link `next` tới hết để lấy đủ dữ liệu
+const PAGE_LIMIT = 200;  // Kích thước trang tối đa backend cho phép (KeysetPagination.max_page_size)
+
+const fetchAllPages = async (url, options = {}) => {
+  const results = [];
+  let next = `${url}${url.includes("?") ? "&" : "?"}limit=${PAGE_LIMIT}`;
+  while (next) {
+    const response = await fetch(next, options);
+    if (!response.ok) {
+      throw new Error(`Error: ${response.status}`);
+    }
+    const page = await response.json();
+    results.push(...page.results);
+    next = page.next;
+  }
+  return results;
+};
+
 export const register = async (userData) => {
   const res = await fetch(`${BASE_URL}/users/register/`, {
     method: "POST",
@@ -78,10 +95,25 @@ export const login = async (userData) => {
   return data;
 };
 
+// Đăng xuất: thu hồi token ở backend (lỗi mạng thì vẫn xoá cookie ở client)
+export const logout = async () => {
+  try {
+    await fetch(`${BASE_URL}/users/logout/`, {
+      method: "POST",
+      headers: getHeaders(true),
+    });
+  } catch (error) {
+    console.error("Error logging out:", error);
+  }
+  // URL stream đã ký gắn với user vừa đăng xuất
+  signedStreamUrls.songs.clear();
+  signedStreamUrls.videos.clear();
+  signedStreamUrls.hls.clear();
+};
+
 export const getSongs = async () => {
     try {
-        const response = await axios.get(`${API_URL}/songs/`);
-        return response.data;
+        return await fetchAllPages(`${API_URL}/songs/`);
     } catch (error) {
         console.error("Error fetching songs:", error);
         return [];
@@ -90,9 +122,7 @@ export const getSongs = async () => {
 
 export const getAlbums = async () => {
   try {
-    const response = await fetch(`${API_URL}/albums/`);
-    if (!response.ok) throw new Error("Failed to fetch albums");
-    return await response.json();
+    return await fetchAllPages(`${API_URL}/albums/`);
   } catch (error) {
     console.error(error);
     return [];
@@ -123,28 +153,63 @@ export const getSongsByAlbum = async (albumId) => {
   }
 };
 
-// Get streaming URL for a song
-export const getStreamUrl = (songId) => {
-  return `${API_URL}/stream/${songId}/`;
+// URL stream đã ký (GET /stream-urls/), giữ trong bộ nhớ tới gần lúc hết hạn.
+// Chưa đăng nhập hoặc lỗi mạng thì dùng URL thường (backend vẫn nhận khi STREAM_SIGNED_URLS_REQUIRED tắt)
+const STREAM_URL_BATCH = 200;            // Số id tối đa mỗi request (parse_id_list ở backend)
+const STREAM_URL_MARGIN = 5 * 60 * 1000; // Lấy URL mới khi còn dưới 5 phút
+const signedStreamUrls = { songs: new Map(), videos: new Map(), hls: new Map() };
+
+const unsignedStreamUrl = (kind, id) => {
+  if (kind === "hls") return `${API_URL}/videos/${id}/hls/master.m3u8`;
+  return kind === "videos" ? `${API_URL}/videos/${id}/stream/` : `${API_URL}/stream/${id}/`;
+};
+
+// kind: "songs", "videos" hoặc "hls" (master playlist); trả về { id: url }
+export const getStreamUrls = async (kind, ids) => {
+  const cache = signedStreamUrls[kind];
+  const now = Date.now();
+  const missing = ids.filter((id) => !(cache.get(id)?.expiresAt > now + STREAM_URL_MARGIN));
+
+  if (missing.length && Cookies.get("token")) {
+    try {
+      for (let i = 0; i < missing.length; i += STREAM_URL_BATCH) {
+        const batch = missing.slice(i, i + STREAM_URL_BATCH).join(",");
+        const response = await fetch(`${API_URL}/stream-urls/?${kind}=${batch}`, {
+          method: "GET",
+          headers: getHeaders(true),
+        });
+        if (!response.ok) {
+          throw new Error(`Error: ${response.status}`);
+        }
+        const data = await response.json();
+        const expiresAt = Date.now() + data.expires_in * 1000;
+        for (const [id, url] of Object.entries(data[kind])) {
+          cache.set(Number(id), { url, expiresAt });
+        }
+      }
+    } catch (error) {
+      console.error("Error fetching stream URLs:", error);
+    }
+  }
+
+  return Object.fromEntries(
+    ids.map((id) => [id, cache.get(id)?.expiresAt > now ? cache.get(id).url : unsignedStreamUrl(kind, id)])
+  );
 };
 
+export const getStreamUrl = async (kind, id) => (await getStreamUrls(kind, [id]))[id];
+
 // Lấy danh sách bài hát yêu thích của người dùng
 export const getFavoriteSongs = async () => {
   const token = Cookies.get("token")|| "";
   try {
-    const response = await fetch(`${API_URL}/favorite_songs/list/`, {
+    return await fetchAllPages(`${API_URL}/favorite_songs/list/`, {
       method: "GET",
       headers: {
         "Authorization": `Token ${token}`,
         "Content-Type": "application/json",
       }
     });
-
-    if (!response.ok) {
-      throw new Error(`Error: ${response.status}`);
-    }
-
-    return await response.json();
   } catch (error) {
     console.error("Error fetching favorite songs:", error);
     throw error;
@@ -227,19 +292,13 @@ export const removePlaylist = async (playlistId) => {
 export const getUserPlaylists = async () => {
   const token = Cookies.get("token")|| "";
   try {
-    const response = await fetch(`${API_URL}/playlists/`, {
+    return await fetchAllPages(`${API_URL}/playlists/`, {
       method: "GET",
       headers: {
         "Authorization": `Token ${token}`,
         "Content-Type": "application/json",
       }
     });
-
-    if (!response.ok) {
-      throw new Error(`Error: ${response.status}`);
-    }
-
-    return await response.json();
   } catch (error) {
     console.error("Error fetching playlists:", error);
     throw error;
@@ -341,6 +400,34 @@ export const removeSongFromPlaylist = async (playlistId, songId) => {
   }
 };
 
+// Thêm / xóa / thay nhiều bài của playlist trong một request (action: add_songs, remove_songs, replace_songs)
+const updatePlaylistSongs = async (playlistId, action, songIds) => {
+  const token = Cookies.get("token")|| "";
+  try {
+    const response = await fetch(`${API_URL}/playlists/${playlistId}/${action}/`, {
+      method: "POST",
+      headers: {
+        "Authorization": `Token ${token}`,
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ song_ids: songIds }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Error: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error(`Error updating playlist songs (${action}):`, error);
+    throw error;
+  }
+};
+
+export const addSongsToPlaylist = (playlistId, songIds) => updatePlaylistSongs(playlistId, "add_songs", songIds);
+export const removeSongsFromPlaylist = (playlistId, songIds) => updatePlaylistSongs(playlistId, "remove_songs", songIds);
+export const replacePlaylistSongs = (playlistId, songIds) => updatePlaylistSongs(playlistId, "replace_songs", songIds);
+
 // Lấy danh sách bài hát trong playlist
 export const getPlaylistSongs = async (playlistId) => {
   const token = Cookies.get("token")|| "";
@@ -395,11 +482,7 @@ export const searchContent = async (query) => {
 };
 export const getVideos = async () => {
   try {
-    const response = await fetch('http://127.0.0.1:8000/api/music/videos/');
-    if (!response.ok) {
-      throw new Error('Failed to fetch videos');
-    }
-    return await response.json();
+    return await fetchAllPages(`${API_URL}/videos/`);
   } catch (error) {
     console.error('Error fetching videos:', error);
     throw error;
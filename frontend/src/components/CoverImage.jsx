@@ -0,0 +1,19 @@
+// Ảnh bìa responsive: trình duyệt tự chọn AVIF/WebP/JPEG và kích thước nhỏ nhất đủ dùng từ cover_srcset
+const CoverImage = ({ src, srcset, sizes, className, alt = "" }) => {
+  if (!srcset) {
+    return <img className={className} src={src} alt={alt} loading="lazy" />
+  }
+
+  return (
+    <picture>
+      {Object.entries(srcset)
+        .filter(([type]) => type !== "image/jpeg")
+        .map(([type, set]) => (
+          <source key={type} type={type} srcSet={set} sizes={sizes} />
+        ))}
+      <img className={className} src={src} srcSet={srcset["image/jpeg"]} sizes={sizes} alt={alt} loading="lazy" />
+    </picture>
+  )
+}
+
+export default CoverImage
@@ -2,8 +2,15 @@ import { useParams } from "react-router-dom";
 import Navbar from "./Navbar";
 import { useContext, useEffect, useState } from "react";
 import { PlayerContext } from "../context/PlayerContext";
-import { getAlbumById, getSongsByAlbum, getFavoriteSongs } from "../api";
+import { getAlbumById, getSongsByAlbum, getFavoriteSongs, getStreamUrls } from "../api";
 import SongActionMenu from "./SongActionMenu";
+import CoverImage from "./CoverImage";
+
+// total_duration_ms (ms) -> "1 hr 5 min" / "42 min"
+const formatTotalDuration = (ms) => {
+  const minutes = Math.floor((ms || 0) / 60000);
+  return minutes >= 60 ? `${Math.floor(minutes / 60)} hr ${minutes % 60} min` : `${minutes} min`;
+};
 
 const DisplayAlbum = () => {
   const { id } = useParams();
@@ -20,9 +27,10 @@ const DisplayAlbum = () => {
     }
     async function fetchSongs() {
       const data = await getSongsByAlbum(id);
+      const streamUrls = await getStreamUrls("songs", data.map(song => song.id));
       const processed = data.map(song => ({
         ...song,
-        audio_file: `http://127.0.0.1:8000/api/music/stream/${song.id}/`,
+        audio_file: streamUrls[song.id],
       }));
       setLocalSongs(processed);   // for display
       setSongs(processed);        // update PlayerContext without auto-playing
@@ -59,7 +67,7 @@ const DisplayAlbum = () => {
           <h2 className="text-5xl font-bold mb-4 md:text-7xl">{albumData.name}</h2>
           <h4>{albumData.desc}</h4>
           <p className="mt-1">
-            <b>Spotify</b> • <b>{albumData.saves} saves</b> • <b>{localSongs.length} songs</b>
+            <b>Spotify</b> • <b>{albumData.saves} saves</b> • <b>{albumData.track_count} songs, {formatTotalDuration(albumData.total_duration_ms)}</b>
           </p>
         </div>
       </div>
@@ -82,7 +90,7 @@ const DisplayAlbum = () => {
             onClick={() => playWithId(item.id)}
           >
             <b className="w-4 text-center">{index + 1}</b>
-            <img className="w-10 h-10 rounded object-cover" src={item.cover_image} alt={item.title} />
+            <CoverImage className="w-10 h-10 rounded object-cover" src={item.cover_image} srcset={item.cover_srcset} sizes="40px" alt={item.title} />
             <div className="flex flex-col overflow-hidden">
               <div className={`${track.id === item.id ? 'text-green-500' : 'text-white'} text-sm truncate max-w-[150px]`}>
                 {item.title}
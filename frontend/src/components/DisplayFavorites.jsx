@@ -1,8 +1,9 @@
 import { useContext, useEffect, useState } from "react";
 import Navbar from "./Navbar";
 import { PlayerContext } from "../context/PlayerContext";
-import { getFavoriteSongs, removeFromFavorites } from "../api";
+import { getFavoriteSongs, removeFromFavorites, getStreamUrls } from "../api";
 import SongActionMenu from "./SongActionMenu";
+import CoverImage from "./CoverImage";
 
 const DisplayFavorites = () => {
   const { playWithId, track, setSongs } = useContext(PlayerContext);
@@ -15,10 +16,11 @@ const DisplayFavorites = () => {
         setIsLoading(true);
         const songs = await getFavoriteSongs();
         
-        // Process the songs to add streaming URL
+        // Process the songs to add signed streaming URL
+        const streamUrls = await getStreamUrls("songs", songs.map(song => song.id));
         const processed = songs.map(song => ({
           ...song,
-          audio_file: `http://127.0.0.1:8000/api/music/stream/${song.id}/`,
+          audio_file: streamUrls[song.id],
         }));
         
         setFavoriteSongs(processed);
@@ -98,7 +100,7 @@ const DisplayFavorites = () => {
                   onClick={() => playWithId(item.id)}
                 >
                   <b className="w-4 text-center">{index + 1}</b>
-                  <img className="w-10 h-10 rounded object-cover" src={item.cover_image} alt={item.title} />
+                  <CoverImage className="w-10 h-10 rounded object-cover" src={item.cover_image} srcset={item.cover_srcset} sizes="40px" alt={item.title} />
                   <div className="flex flex-col overflow-hidden">
                     <div className={`${track.id === item.id ? 'text-green-500' : 'text-white'} text-sm truncate max-w-[150px]`}>
                       {item.title}
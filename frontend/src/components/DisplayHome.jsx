@@ -251,6 +251,7 @@ const DisplayHome = () => {
                         desc={album.desc || album.artist} 
                         id={album.id} 
                         image={album.cover_image} 
+                        srcset={album.cover_srcset} 
                       />
                     ))}
                   </div>
@@ -269,6 +270,7 @@ const DisplayHome = () => {
                         desc={song.artist} 
                         id={song.id} 
                         image={song.cover_image} 
+                    srcset={song.cover_srcset} 
                       />
                     ))}
                   </div>
@@ -319,6 +321,7 @@ const DisplayHome = () => {
                     desc={item.desc} 
                     id={item.id} 
                     image={item.cover_image} 
+                    srcset={item.cover_srcset} 
                   />
                 ))
               ) : (
@@ -338,6 +341,7 @@ const DisplayHome = () => {
                     desc={song.artist} 
                     id={song.id} 
                     image={song.cover_image} 
+                    srcset={song.cover_srcset} 
                   />
                 ))
               ) : (
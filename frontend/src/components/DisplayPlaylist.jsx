@@ -2,9 +2,10 @@ import { useParams } from "react-router-dom";
 import Navbar from "./Navbar";
 import { useContext, useEffect, useState } from "react";
 import { PlayerContext } from "../context/PlayerContext";
-import { getPlaylistById, getPlaylistSongs, removeSongFromPlaylist, removePlaylist } from "../api";
+import { getPlaylistById, getPlaylistSongs, removeSongFromPlaylist, removePlaylist, getStreamUrls } from "../api";
 import SongActionMenu from "./SongActionMenu";
 import { useNavigate } from "react-router-dom";
+import CoverImage from "./CoverImage";
 const DisplayPlaylist = () => {
   const { id } = useParams();
   const { playWithId, track, setSongs } = useContext(PlayerContext);
@@ -26,10 +27,11 @@ const DisplayPlaylist = () => {
       try {
         const songs = await getPlaylistSongs(id);
         
-        // Process the songs to add streaming URL
+        // Process the songs to add signed streaming URL
+        const streamUrls = await getStreamUrls("songs", songs.map(song => song.id));
         const processed = songs.map(song => ({
           ...song,
-          audio_file: `http://127.0.0.1:8000/api/music/stream/${song.id}/`,
+          audio_file: streamUrls[song.id],
         }));
         
         setPlaylistSongs(processed);
@@ -140,7 +142,7 @@ const handleDeletePlaylist = async () => {
                   onClick={() => playWithId(item.id)}
                 >
                   <b className="w-4 text-center">{index + 1}</b>
-                  <img className="w-10 h-10 rounded object-cover" src={item.cover_image} alt={item.title} />
+                  <CoverImage className="w-10 h-10 rounded object-cover" src={item.cover_image} srcset={item.cover_srcset} sizes="40px" alt={item.title} />
                   <div className="flex flex-col overflow-hidden">
                     <div className={`${track.id === item.id ? 'text-green-500' : 'text-white'} text-sm truncate max-w-[150px]`}>
                       {item.title}
@@ -2,6 +2,7 @@ import React, { useEffect, useState, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import Cookies from "js-cookie"; 
 import { assets } from "../assets/assets";
+import { logout } from "../api";
 
 const Navbar = () => {
   const [hasToken, setHasToken] = useState(false); 
@@ -48,7 +49,8 @@ const Navbar = () => {
     setShowConfirm(true);
   };
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    await logout();
     setShowSuccess(true);
     
     setShowConfirm(false);
@@ -1,13 +1,14 @@
 import { useContext } from "react"
 import { PlayerContext } from "../context/PlayerContext"
+import CoverImage from "./CoverImage"
 
-const SongItem = ({name,image,desc,id}) => {
+const SongItem = ({name,image,srcset,desc,id}) => {
 
   const {playWithId} = useContext(PlayerContext)
 
   return (
     <div onClick={()=> playWithId(id)} className="min-w-[180px] p-2 px-3 rounded cursor-pointer hover:bg-[#ffffff26]">
-        <img className="rounded" src={image} alt="" />
+        <CoverImage className="rounded" src={image} srcset={srcset} sizes="180px" />
         <p className="font-bold mt-2 mb-1">{name}</p>
         <p className="text-slate-200 text-sm">{desc}</p>
     </div>
@@ -1,5 +1,5 @@
 import React, { createContext, useEffect, useRef, useState } from "react";
-import { getSongs, getVideos } from "../api"; // Add getVideos import
+import { getSongs, getVideos, getStreamUrl } from "../api"; // Add getVideos import
 
 export const PlayerContext = createContext();
 
@@ -41,9 +41,9 @@ const PlayerContextProvider = ({ children }) => {
       // Load songs
       const songData = await getSongs();
       if (songData && songData.length > 0) {
+        // Không ký URL cho cả catalog lúc tải trang: URL stream đã ký được lấy lúc phát (play / playWithId)
         const processedSongs = songData.map(song => ({
           ...song,
-          audio_file: `http://127.0.0.1:8000/api/music/stream/${song.id}/`,
           type: "audio"
         }));
         setSongs(processedSongs);
@@ -59,7 +59,6 @@ const PlayerContextProvider = ({ children }) => {
         if (videoData && videoData.length > 0) {
           const processedVideos = videoData.map(video => ({
             ...video,
-            video_file: `http://127.0.0.1:8000/api/music/videos/${video.id}/stream/`,
             type: "video",
             thumbnail: video.thumbnail || null // Ensure thumbnail exists
           }));
@@ -92,15 +91,12 @@ const PlayerContextProvider = ({ children }) => {
     return mediaType === "audio" ? audioRef.current : videoRef.current;
   };
 
-  const play = () => {
+  const play = async () => {
     const mediaElement = getCurrentMediaElement();
     if (!mediaElement) return;
     
-    if (mediaType === "audio" && !mediaElement.src && track?.audio_file) {
-      mediaElement.src = track.audio_file;
-      lastPlayedMediaIdRef.current = track.id;
-    } else if (mediaType === "video" && !mediaElement.src && track?.video_file) {
-      mediaElement.src = track.video_file;
+    if (!mediaElement.src && track?.id) {
+      mediaElement.src = await getStreamUrl(mediaType === "audio" ? "songs" : "videos", track.id);
       lastPlayedMediaIdRef.current = track.id;
     }
     
@@ -164,11 +160,14 @@ const PlayerContextProvider = ({ children }) => {
         videoRef.current.load();
       }
       
+      // URL đã ký có hạn: lấy lại lúc phát (dùng cache nếu còn hạn, hoặc vừa đăng nhập sau khi tải danh sách)
+      const streamUrl = await getStreamUrl(type === "audio" ? "songs" : "videos", media.id);
+
       setTimeout(() => {
         const mediaElement = type === "audio" ? audioRef.current : videoRef.current;
         
         if (mediaElement) {
-          mediaElement.src = type === "audio" ? media.audio_file : media.video_file;
+          mediaElement.src = streamUrl;
           lastPlayedMediaIdRef.current = media.id;
           
           mediaElement.play()
@@ -0,0 +1,31 @@
+from .models import Artist
+
+
+def artist_key(name):
+    """ Khoá so khớp nghệ sĩ: gộp khoảng trắng, không phân biệt hoa thường """
+    return ' '.join((name or '').split()).casefold()
+
+
+def resolve_artists(names):
+    """
+    Map artist name strings to Artist rows, creating the missing ones.
+    Spellings that only differ in case or whitespace share one Artist.
+    At most three queries however many names are passed; concurrent
+    importers creating the same artist are absorbed by ignore_conflicts on
+    the unique name_key.
+    """
+    keys = {name: artist_key(name) for name in names if artist_key(name)}
+    found = {artist.name_key: artist for artist in Artist.objects.filter(name_key__in=set(keys.values()))}
+
+    missing = {}
+    for name, key in keys.items():
+        if key not in found:
+            missing.setdefault(key, Artist(name=' '.join(name.split()), name_key=key))
+    if missing:
+        Artist.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        found.update({artist.name_key: artist for artist in Artist.objects.filter(name_key__in=missing)})
+    return {name: found[key] for name, key in keys.items()}
+
+
+def resolve_artist(name):
+    return resolve_artists([name]).get(name)
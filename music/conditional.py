@@ -0,0 +1,45 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .response_cache import namespace_versions
+
+
+def watermark_etag(request, watermark, *namespaces, per_user=True):
+    """
+    Weak ETag built from an aggregate watermark (row count, max timestamp,
+    ...) instead of the serialized body, so it costs one small query. The
+    full path is part of the hash because each page/limit is its own
+    representation, and the response cache versions of ``namespaces`` cover
+    edits to rows the watermark cannot see (e.g. a renamed song).
+    """
+    parts = [request.get_full_path()]
+    if per_user:
+        parts.append(str(request.user.pk))
+    parts += [str(value) for value in watermark]
+    parts += namespace_versions(namespaces)
+    return 'W/"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    """ So khớp If-None-Match theo kiểu weak comparison (RFC 9110) """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    client_etags = parse_etags(header)
+    if '*' in client_etags:
+        return True
+    return etag.removeprefix('W/') in {value.removeprefix('W/') for value in client_etags}
+
+
+def not_modified(etag, cache_control='private, no-cache'):
+    response = HttpResponseNotModified()
+    return set_validators(response, etag, cache_control)
+
+
+def set_validators(response, etag, cache_control='private, no-cache'):
+    # no-cache: client vẫn lưu body nhưng phải hỏi lại server bằng If-None-Match mỗi lần dùng
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,187 @@
+import hashlib
+import io
+import os
+import re
+
+from django.conf import settings
+from PIL import Image
+
+COVER_DIR = 'covers'
+# Kích thước ảnh bìa là 500x500 pixels
+COVER_SIZE = (500, 500)
+COVER_NAME_RE = re.compile(rf'^{COVER_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{64}}\.jpg$')
+
+# Định dạng -> (đuôi file, MIME, tham số save); AVIF/WebP chỉ dùng khi Pillow hỗ trợ
+VARIANT_FORMATS = {
+    'AVIF': ('avif', 'image/avif', {'quality': 50}),
+    'WEBP': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'JPEG': ('jpg', 'image/jpeg', {'quality': 85, 'optimize': True}),
+}
+DEFAULT_VARIANT_WIDTHS = (64, 160, 320)
+
+
+def cover_name(digest):
+    """ covers/ab/abcdef....jpg (tương đối so với MEDIA_ROOT) """
+    return f'{COVER_DIR}/{digest[:2]}/{digest}.jpg'
+
+
+def is_shared_cover(name):
+    return bool(COVER_NAME_RE.match(name or ''))
+
+
+def make_square(img):
+    """ Chuyển ảnh thành vuông bằng cách cắt bớt chiều dài và chiều rộng nếu cần """
+    width, height = img.size
+    min_dimension = min(width, height)
+
+    left = (width - min_dimension) // 2
+    top = (height - min_dimension) // 2
+    right = (width + min_dimension) // 2
+    bottom = (height + min_dimension) // 2
+
+    return img.crop((left, top, right, bottom))
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', DEFAULT_VARIANT_WIDTHS))
+
+
+def variant_formats():
+    Image.init()
+    return [fmt for fmt in getattr(settings, 'IMAGE_VARIANT_FORMATS', VARIANT_FORMATS) if fmt in Image.SAVE]
+
+
+def variant_name(name, width, fmt):
+    """ covers/ab/<hash>.jpg -> covers/ab/<hash>_160.webp """
+    base = os.path.splitext(name)[0]
+    return f'{base}_{width}.{VARIANT_FORMATS[fmt][0]}'
+
+
+def build_variants(name, img=None, force=False):
+    """
+    Write every configured width (narrower than the original) in every
+    supported format next to ``name``. ``img`` can be passed when the caller
+    already has the decoded image, so import decodes each cover once.
+    Returns the number of files written.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if img is None:
+        with Image.open(path) as source:
+            img = source.convert('RGB')
+    elif img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    written = 0
+    for width in variant_widths():
+        if width >= img.width:
+            continue
+        resized = None
+        for fmt in variant_formats():
+            variant_path = os.path.join(settings.MEDIA_ROOT, variant_name(name, width, fmt))
+            if not force and os.path.exists(variant_path):
+                continue
+            if resized is None:
+                resized = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            options = VARIANT_FORMATS[fmt][2]
+            write_atomic(variant_path, lambda tmp_path: resized.save(tmp_path, format=fmt, **options))
+            written += 1
+    return written
+
+
+_built_variants = {}
+
+
+def built_variants(name):
+    """
+    (width ảnh gốc, các width đã build) của một ảnh, hoặc None nếu chưa build.
+    Chỉ nhớ khi đã có bản nhỏ, để ảnh được build sau vẫn được nhận ra.
+    """
+    info = _built_variants.get(name)
+    if info is None:
+        widths = tuple(
+            width for width in variant_widths()
+            if os.path.exists(os.path.join(settings.MEDIA_ROOT, variant_name(name, width, 'JPEG')))
+        )
+        if not widths:
+            return None
+        # Image.open chỉ đọc header, không decode ảnh
+        with Image.open(os.path.join(settings.MEDIA_ROOT, name)) as img:
+            info = _built_variants[name] = (img.width, widths)
+    return info
+
+
+def image_srcset(name, url):
+    """
+    {MIME: "url 64w, url 160w, ..."} cho thẻ <picture>/<source>; ``url`` đổi
+    tên file media thành URL. Ảnh gốc luôn là ứng viên lớn nhất của srcset JPEG.
+    """
+    if not name:
+        return None
+    try:
+        info = built_variants(name)
+    except OSError:
+        info = None
+    if info is None:
+        return {VARIANT_FORMATS['JPEG'][1]: url(name)}
+
+    original_width, widths = info
+    srcset = {}
+    for fmt in variant_formats():
+        entries = [f'{url(variant_name(name, width, fmt))} {width}w' for width in widths]
+        if fmt == 'JPEG':
+            entries.append(f'{url(name)} {original_width}w')
+        srcset[VARIANT_FORMATS[fmt][1]] = ', '.join(entries)
+    return srcset
+
+
+def write_atomic(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def store_cover(data):
+    """
+    Store embedded artwork under the SHA-256 of its original bytes and
+    return the media-relative name. The image is only decoded and resized
+    when that hash has not been seen before, so the 15 tracks of an album
+    cost one resize and one file, and every Song/Album row (and browser
+    cache) shares the same URL. Safe to call from several processes at
+    once: the file appears atomically under its final name.
+    """
+    name = cover_name(hashlib.sha256(data).hexdigest())
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if os.path.exists(path):
+        return name
+
+    img = Image.open(io.BytesIO(data))
+    # Cắt và resize ảnh thành vuông 500x500
+    img = make_square(img).resize(COVER_SIZE, Image.LANCZOS)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    # Các bản nhỏ/WebP/AVIF trước, file gốc sau cùng: file gốc tồn tại nghĩa là đã đủ bộ
+    build_variants(name, img)
+    write_atomic(path, lambda tmp_path: img.save(tmp_path, format='JPEG'))
+    return name
+
+
+def adopt_cover_file(name):
+    """
+    Chuyển một cover kiểu cũ (một file cho mỗi bài) vào kho dùng chung, đặt
+    tên theo hash nội dung file. File cũ được giữ nguyên; người gọi tự xoá
+    khi không còn dòng nào trỏ tới.
+    """
+    source = os.path.join(settings.MEDIA_ROOT, name)
+    with open(source, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    shared = cover_name(digest)
+    path = os.path.join(settings.MEDIA_ROOT, shared)
+    if not os.path.exists(path):
+        with Image.open(source) as img:
+            if img.format == 'JPEG':
+                write_atomic(path, lambda tmp_path: os.link(source, tmp_path))
+            else:
+                img = img.convert('RGB')
+                write_atomic(path, lambda tmp_path: img.save(tmp_path, format='JPEG'))
+    return shared
@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from .models import Album, Playlist, Song
+from .response_cache import bump_versions
+
+
+def parse_duration_ms(value):
+    """ "hh:mm:ss", "m:ss" hoặc số giây dạng chuỗi -> mili giây; không đọc được thì 0 """
+    seconds = 0.0
+    try:
+        for part in str(value or '').strip().split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return 0
+    return max(0, round(seconds * 1000))
+
+
+def format_duration(ms):
+    """ Mili giây -> "m:ss" (hoặc "h:mm:ss" nếu dài hơn một giờ) để hiển thị """
+    minutes, seconds = divmod((ms or 0) // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+# ------------------------------------------------------------------------
+# Tổng thời lượng / số bài của Album và Playlist, cập nhật cộng dồn bằng F()
+# thay vì Count/Sum mỗi lần hiển thị header
+
+def add_to_albums(deltas):
+    """
+    Apply ``{album_id: (tracks, duration_ms)}`` to the denormalised album
+    totals in a single UPDATE (a CASE per column), whatever the number of
+    albums. Deltas may be negative.
+    """
+    deltas = {album_id: delta for album_id, delta in deltas.items() if album_id and any(delta)}
+    if not deltas:
+        return
+
+    def per_album(index):
+        return Case(*[When(pk=album_id, then=Value(delta[index])) for album_id, delta in deltas.items()],
+                    default=Value(0))
+
+    Album.objects.filter(pk__in=deltas).update(
+        track_count=F('track_count') + per_album(0),
+        total_duration_ms=F('total_duration_ms') + per_album(1),
+    )
+    # album_list trả cả hai cột này nên cache phải bị vô hiệu
+    transaction.on_commit(lambda: bump_versions('album'))
+
+
+# Bật trong lúc sửa playlist theo lô (music.playlist_batch): bên gọi tự cập nhật tổng một lần,
+# signal của từng PlaylistSong bị xoá không được trừ thêm
+playlist_totals_deferred = ContextVar('playlist_totals_deferred', default=False)
+
+
+@contextmanager
+def defer_playlist_totals():
+    token = playlist_totals_deferred.set(True)
+    try:
+        yield
+    finally:
+        playlist_totals_deferred.reset(token)
+
+
+def add_to_playlist(playlist_id, song_ids, sign=1, duration=None):
+    """
+    Cộng (sign=1) hoặc trừ (sign=-1) các bài ``song_ids`` vào tổng của một
+    playlist; truyền sẵn ``duration`` (tổng mili giây) thì không phải query Song
+    """
+    song_ids = list(song_ids)
+    if not song_ids:
+        return
+    if duration is None:
+        duration = Song.objects.filter(pk__in=song_ids).aggregate(total=Sum('duration_ms'))['total'] or 0
+    Playlist.objects.filter(pk=playlist_id).update(
+        track_count=F('track_count') + sign * len(song_ids),
+        total_duration_ms=F('total_duration_ms') + sign * duration,
+        version=F('version') + 1,
+    )
+
+
+def bump_playlist_version(playlist_id):
+    """ Danh sách bài đổi mà tổng không đổi (sắp xếp lại): chỉ tăng version cho ETag """
+    Playlist.objects.filter(pk=playlist_id).update(version=F('version') + 1)
+
+
+def shift_song_duration(song_id, delta_ms):
+    """ Thời lượng một bài thay đổi: sửa tổng của mọi playlist chứa bài đó """
+    if delta_ms:
+        Playlist.objects.filter(playlist_songs__song_id=song_id).update(
+            total_duration_ms=F('total_duration_ms') + delta_ms,
+        )
@@ -0,0 +1,119 @@
+import os
+import secrets
+import shutil
+import subprocess
+
+from django.conf import settings
+
+HLS_DIR = 'hls'
+MASTER_PLAYLIST = 'master.m3u8'
+
+DEFAULT_RENDITIONS = [
+    # (tên, chiều cao, video bitrate, audio bitrate)
+    ('360p', 360, '800k', '96k'),
+    ('720p', 720, '2800k', '128k'),
+    ('1080p', 1080, '5000k', '192k'),
+]
+
+
+class HLSError(Exception):
+    pass
+
+
+def ffmpeg_binary():
+    return getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+
+
+def ffmpeg_available():
+    return shutil.which(ffmpeg_binary()) is not None
+
+
+def hls_output_dir(video_id):
+    return os.path.join(settings.MEDIA_ROOT, HLS_DIR, str(video_id))
+
+
+def add_playlist_query(content, query):
+    """ Gắn ``query`` (vd. 'sig=...') vào mọi URI của một playlist m3u8 (các dòng không bắt đầu bằng #) """
+    lines = []
+    for line in content.splitlines():
+        if line and not line.startswith('#'):
+            line += ('&' if '?' in line else '?') + query
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def parse_bitrate(value):
+    """ '2800k' -> 2800000 """
+    value = str(value).lower()
+    if value.endswith('k'):
+        return int(float(value[:-1]) * 1000)
+    if value.endswith('m'):
+        return int(float(value[:-1]) * 1000000)
+    return int(value)
+
+
+def build_hls(source_path, video_id, source_size):
+    """
+    Segment ``source_path`` into an HLS ladder under ``media/hls/<video_id>/``
+    with the local ffmpeg: one ``<rendition>-<build id>/index.m3u8`` plus
+    short ``.ts`` segments per rendition, and a ``master.m3u8`` listing them.
+    The build id changes on every build, so rendition playlists and segments
+    never change under a URL and can be cached as immutable; only the master
+    playlist keeps its name. Renditions taller than the source are skipped
+    (the smallest one is always kept).
+
+    Returns the master playlist path relative to MEDIA_ROOT.
+    """
+    if not ffmpeg_available():
+        raise HLSError(f"Không tìm thấy ffmpeg ({ffmpeg_binary()})")
+
+    source_width, source_height = source_size
+    renditions = getattr(settings, 'HLS_RENDITIONS', DEFAULT_RENDITIONS)
+    segment_seconds = getattr(settings, 'HLS_SEGMENT_SECONDS', 4)
+    selected = [r for r in renditions if r[1] <= source_height] or renditions[:1]
+
+    output_dir = hls_output_dir(video_id)
+    # Build vào thư mục tạm rồi đổi tên để không bao giờ phục vụ một ladder dở dang
+    build_dir = output_dir + '.tmp'
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+
+    build_id = secrets.token_hex(4)
+    variants = []
+    try:
+        for name, height, video_bitrate, audio_bitrate in selected:
+            height = min(height, source_height)
+            width = int(round(source_width * height / source_height / 2)) * 2
+            rendition_dir = os.path.join(build_dir, f'{name}-{build_id}')
+            os.makedirs(rendition_dir)
+            command = [
+                ffmpeg_binary(), '-y', '-loglevel', 'error', '-i', source_path,
+                '-vf', f'scale={width}:{height}',
+                '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main',
+                '-b:v', video_bitrate, '-maxrate', video_bitrate, '-bufsize', video_bitrate,
+                # Keyframe đúng đầu mỗi segment để các rendition thẳng hàng khi đổi chất lượng
+                '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})', '-sc_threshold', '0',
+                '-c:a', 'aac', '-b:a', audio_bitrate, '-ac', '2',
+                '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_playlist_type', 'vod',
+                '-hls_segment_filename', os.path.join(rendition_dir, 'seg_%05d.ts'),
+                os.path.join(rendition_dir, 'index.m3u8'),
+            ]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise HLSError(f"ffmpeg lỗi ở rendition {name}: {result.stderr.strip()[-500:]}")
+            bandwidth = parse_bitrate(video_bitrate) + parse_bitrate(audio_bitrate)
+            variants.append((name, bandwidth, width, height))
+
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+        for name, bandwidth, width, height in variants:
+            lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}')
+            lines.append(f'{name}-{build_id}/index.m3u8')
+        with open(os.path.join(build_dir, MASTER_PLAYLIST), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.rename(build_dir, output_dir)
+    return f'{HLS_DIR}/{video_id}/{MASTER_PLAYLIST}'
@@ -0,0 +1,179 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Leaderboard, Song, SongPlayBucket
+from .response_cache import bump_versions
+
+logger = logging.getLogger(__name__)
+
+# window -> (loại bucket, số bucket tính cả bucket hiện tại); 'all' đọc thẳng Song.listen_count
+WINDOWS = {
+    'day': (SongPlayBucket.HOUR, 24),
+    'week': (SongPlayBucket.DAY, 7),
+    'month': (SongPlayBucket.DAY, 30),
+    'all': (None, None),
+}
+DEFAULT_REFRESH_INTERVALS = {'day': 60, 'week': 600, 'month': 3600, 'all': 60}
+BUCKET_STEP = {SongPlayBucket.HOUR: timedelta(hours=1), SongPlayBucket.DAY: timedelta(days=1)}
+# Giữ dư một chút so với window dài nhất dùng tới loại bucket đó
+BUCKET_RETENTION = {SongPlayBucket.HOUR: timedelta(hours=48), SongPlayBucket.DAY: timedelta(days=35)}
+
+
+def leaderboard_size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 100)
+
+
+def refresh_interval(window):
+    intervals = dict(DEFAULT_REFRESH_INTERVALS, **getattr(settings, 'LEADERBOARD_REFRESH_INTERVALS', {}))
+    return timedelta(seconds=intervals[window])
+
+
+def bucket_start(moment, granularity):
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == SongPlayBucket.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def record_plays(counts, moment=None):
+    """
+    Add flushed listen counts ({song_id: plays}) to the current hourly and
+    daily buckets with a single ``INSERT ... ON CONFLICT DO UPDATE``, so
+    concurrent workers flushing into the same bucket add up instead of
+    overwriting each other. PostgreSQL and SQLite share the syntax.
+    """
+    moment = moment or timezone.now()
+    # Bài có thể vừa bị xoá giữa lúc đếm và lúc flush
+    song_ids = set(Song.objects.filter(id__in=counts.keys()).values_list('id', flat=True))
+    if not song_ids:
+        return
+
+    rows = []
+    for granularity in BUCKET_STEP:
+        start = connection.ops.adapt_datetimefield_value(bucket_start(moment, granularity))
+        rows += [(song_id, granularity, start, counts[song_id]) for song_id in song_ids]
+
+    table = connection.ops.quote_name(SongPlayBucket._meta.db_table)
+    placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    sql = (
+        f'INSERT INTO {table} (song_id, granularity, bucket_start, plays) VALUES {placeholders} '
+        f'ON CONFLICT (song_id, granularity, bucket_start) DO UPDATE SET plays = {table}.plays + excluded.plays'
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def compute_entries(window, artist_id=None, size=None, now=None):
+    """ Top-K [[song_id, plays], ...] của một window (của một nghệ sĩ nếu có artist_id), tính từ các bucket """
+    size = size or leaderboard_size()
+    granularity, bucket_count = WINDOWS[window]
+    if granularity is None:
+        # Giống bảng xếp hạng cũ: mọi bài đều có thể vào bảng, kể cả khi chưa ai nghe
+        songs = Song.objects.all()
+        if artist_id:
+            songs = songs.filter(primary_artist_id=artist_id)
+        rows = songs.order_by('-listen_count', 'id').values_list('id', 'listen_count')[:size]
+    else:
+        now = now or timezone.now()
+        since = bucket_start(now, granularity) - BUCKET_STEP[granularity] * (bucket_count - 1)
+        buckets = SongPlayBucket.objects.filter(granularity=granularity, bucket_start__gte=since)
+        if artist_id:
+            # Lấy id bài của nghệ sĩ trước (song_artist_listens_idx) rồi lọc bucket theo unique (song, ...);
+            # JOIN thẳng với Song thì planner có thể quét hết song_pkey
+            song_ids = list(Song.objects.filter(primary_artist_id=artist_id).values_list('id', flat=True))
+            buckets = buckets.filter(song_id__in=song_ids)
+        rows = (
+            buckets.values('song_id')
+            .annotate(total=Sum('plays'))
+            .order_by('-total', 'song_id')
+            .values_list('song_id', 'total')[:size]
+        )
+    return [[song_id, plays] for song_id, plays in rows]
+
+
+def refresh_leaderboard(window, artist_id=None):
+    now = timezone.now()
+    entries = compute_entries(window, artist_id, now=now)
+    try:
+        board, _ = Leaderboard.objects.update_or_create(
+            window=window, artist_id=artist_id, defaults={'entries': entries, 'computed_at': now},
+        )
+    except IntegrityError:
+        # Worker khác vừa tạo cùng bảng xếp hạng, dùng bản của nó
+        board = Leaderboard.objects.get(window=window, artist_id=artist_id)
+    bump_versions('leaderboard')
+    return board
+
+
+def get_leaderboard(window, artist_id=None):
+    """
+    Bảng xếp hạng đã tính sẵn. Lần đọc đầu tiên tính ngay; bảng đã cũ hơn
+    khoảng refresh của window vẫn được trả về và tính lại trên thread nền
+    (refresh_in_background) hoặc bằng lệnh refresh_leaderboards, không bao
+    giờ trên request. artist_id phải là một Artist có thật (view đã tra tên
+    trước) để mỗi nghệ sĩ chỉ có một bảng.
+    """
+    try:
+        # get() thay vì first(): không ORDER BY id, planner dùng thẳng unique index của bảng
+        board = Leaderboard.objects.get(window=window, artist_id=artist_id)
+    except Leaderboard.DoesNotExist:
+        return refresh_leaderboard(window, artist_id)
+    if board.computed_at < timezone.now() - refresh_interval(window):
+        refresh_in_background(window, artist_id)
+    return board
+
+
+# Các bảng đang được tính lại trên thread nền của process này
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def refresh_in_background(window, artist_id=None):
+    """ Tính lại một bảng trên thread riêng; mỗi bảng tối đa một thread cùng lúc """
+    key = (window, artist_id)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh_worker, args=key, daemon=True).start()
+
+
+def _refresh_worker(window, artist_id):
+    try:
+        refresh_leaderboard(window, artist_id)
+    except DatabaseError:
+        logger.exception('Could not refresh leaderboard %s/%s', window, artist_id)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard((window, artist_id))
+        # Connection của thread này không được dùng lại
+        connection.close()
+
+
+def prune_buckets(now=None):
+    now = now or timezone.now()
+    deleted = 0
+    for granularity, retention in BUCKET_RETENTION.items():
+        deleted += SongPlayBucket.objects.filter(
+            granularity=granularity, bucket_start__lt=bucket_start(now - retention, granularity),
+        ).delete()[0]
+    return deleted
+
+
+def on_listen_counts_flushed(counts):
+    """
+    Chạy sau mỗi lần flush listen_count (có thể trên request vừa chạm ngưỡng):
+    chỉ cộng vào bucket, việc tính lại bảng xếp hạng để cho get_leaderboard /
+    refresh_leaderboards. Lỗi ở đây không được làm hỏng request đang phát nhạc
+    vì listen_count đã ghi xong.
+    """
+    try:
+        record_plays(counts)
+    except DatabaseError:
+        logger.exception('Could not update play buckets')
@@ -0,0 +1,101 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Gửi sau mỗi lần flush thành công, kèm counts = {song_id: số lượt nghe vừa ghi}
+listen_counts_flushed = Signal()
+
+
+class ListenCounter:
+    """
+    Buffers listen increments in process memory and writes them to
+    ``Song.listen_count`` in one batched UPDATE, either every
+    ``flush_interval`` seconds or once ``flush_threshold`` plays are pending.
+
+    Pending counts are flushed at interpreter exit, so a clean worker
+    shutdown does not lose plays. Flushes started by a play or by the timer
+    never raise: a failed write is logged and the counts stay buffered for
+    the next attempt, so a database outage cannot break audio delivery.
+    """
+
+    def __init__(self, flush_interval, flush_threshold):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.pending = Counter()
+        self.pending_total = 0
+        self.lock = threading.Lock()
+        self.timer = None
+        atexit.register(self.flush)
+
+    def increment(self, song_id, amount=1):
+        with self.lock:
+            self.pending[song_id] += amount
+            self.pending_total += amount
+            flush_now = self.flush_interval <= 0 or self.pending_total >= self.flush_threshold
+            if not flush_now and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        if flush_now:
+            self.flush_quietly()
+
+    def flush_quietly(self):
+        """ flush() cho request/timer: lỗi chỉ được log, số đếm vẫn nằm trong buffer chờ lần sau """
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception('Could not flush listen counts')
+            return 0
+
+    def flush(self):
+        """ Ghi toàn bộ lượt nghe đang chờ xuống database bằng một câu UPDATE """
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.pending_total = 0
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return 0
+
+        from .models import Song
+
+        try:
+            with transaction.atomic():
+                Song.objects.filter(id__in=pending.keys()).update(
+                    listen_count=F('listen_count') + Case(
+                        *[When(id=song_id, then=Value(count)) for song_id, count in pending.items()],
+                        default=Value(0),
+                        output_field=IntegerField(),
+                    )
+                )
+        except Exception:
+            # Trả lại số đếm vào buffer để lần flush sau thử lại
+            with self.lock:
+                self.pending.update(pending)
+                self.pending_total += sum(pending.values())
+            raise
+        listen_counts_flushed.send(sender=self.__class__, counts=dict(pending))
+        return sum(pending.values())
+
+    def _flush_from_timer(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush_quietly()
+        finally:
+            close_old_connections()
+
+
+listen_counter = ListenCounter(
+    flush_interval=getattr(settings, 'LISTEN_COUNT_FLUSH_INTERVAL', 5),
+    flush_threshold=getattr(settings, 'LISTEN_COUNT_FLUSH_THRESHOLD', 500),
+)
@@ -0,0 +1,258 @@
+import atexit
+import logging
+import re
+import threading
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .listen_counter import listen_counter
+from .models import ListenEvent, ListenRollup
+
+EVENT_TABLE = ListenEvent._meta.db_table
+PARTITION_RE = re.compile(rf'^{EVENT_TABLE}_p(\d{{4}})(\d{{2}})$')
+
+logger = logging.getLogger(__name__)
+
+
+class ListenEventBuffer:
+    """
+    Collects ListenEvent rows in process memory and writes them with
+    ``bulk_create`` every ``flush_interval`` seconds or once
+    ``flush_threshold`` events are pending, so a play costs an append to a
+    list instead of an INSERT on the request path.
+
+    If the database is unavailable the batch is kept for the next flush, up
+    to ``max_pending`` events; beyond that the oldest events are dropped
+    rather than letting a worker grow without bound. Flushes started by a
+    play or by the timer only log the failure, they never raise.
+    """
+
+    def __init__(self, flush_interval, flush_threshold, max_pending, batch_size=1000):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()
+        self.timer = None
+        atexit.register(self.flush)
+
+    def append(self, event):
+        with self.lock:
+            self.pending.append(event)
+            flush_now = self.flush_interval <= 0 or len(self.pending) >= self.flush_threshold
+            if not flush_now and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        if flush_now:
+            self.flush_quietly()
+
+    def flush_quietly(self):
+        """ flush() cho request/timer: lỗi chỉ được log, event vẫn nằm trong buffer chờ lần sau """
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception('Could not flush listen events')
+            return 0
+
+    def flush(self):
+        """ Ghi toàn bộ event đang chờ bằng bulk_create """
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                ListenEvent.objects.bulk_create(pending, batch_size=self.batch_size)
+        except Exception:
+            with self.lock:
+                self.pending[:0] = pending
+                del self.pending[:-self.max_pending]
+            raise
+        return len(pending)
+
+    def _flush_from_timer(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush_quietly()
+        finally:
+            close_old_connections()
+
+
+listen_event_buffer = ListenEventBuffer(
+    flush_interval=getattr(settings, 'LISTEN_EVENT_FLUSH_INTERVAL', 5),
+    flush_threshold=getattr(settings, 'LISTEN_EVENT_FLUSH_THRESHOLD', 1000),
+    max_pending=getattr(settings, 'LISTEN_EVENT_MAX_PENDING', 100000),
+)
+
+
+def device_label(request):
+    """ Thiết bị do client tự khai (header X-Device) hoặc đoán thô từ User-Agent """
+    device = request.headers.get('X-Device', '').strip()
+    if device:
+        return device[:32]
+    user_agent = request.headers.get('User-Agent', '')
+    if 'iPad' in user_agent or 'Tablet' in user_agent:
+        return 'tablet'
+    if 'Mobi' in user_agent or 'Android' in user_agent:
+        return 'mobile'
+    if 'Mozilla' in user_agent:
+        return 'desktop'
+    return 'other' if user_agent else ''
+
+
+def record_playback(request, song_id, bitrate=None, user_id=None):
+    """
+    Một lượt phát mới: tăng listen_count và ghi ListenEvent (đều qua buffer).
+    ``user_id`` lấy từ stream URL đã ký thì không cần xác thực request.
+    """
+    listen_counter.increment(song_id)
+    if user_id is None:
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+    listen_event_buffer.append(ListenEvent(
+        song_id=song_id,
+        user_id=user_id,
+        occurred_at=timezone.now(),
+        device=device_label(request),
+        bitrate=bitrate,
+    ))
+
+
+# ------------------------------------------------------------ partitions
+
+def is_partitioned():
+    return connection.vendor == 'postgresql'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{EVENT_TABLE}_p{month:%Y%m}'
+
+
+def ensure_partitions(months_ahead=2, today=None):
+    """
+    Tạo sẵn partition tháng hiện tại và ``months_ahead`` tháng kế tiếp.
+    Event rơi vào tháng chưa có partition vẫn ghi được vào partition DEFAULT.
+    """
+    if not is_partitioned():
+        return []
+    month = month_start(today or timezone.now().date())
+    created = []
+    with connection.cursor() as cursor:
+        for _ in range(months_ahead + 1):
+            name = partition_name(month)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {EVENT_TABLE} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [aware_midnight(month), aware_midnight(next_month(month))],
+            )
+            created.append(name)
+            month = next_month(month)
+    return created
+
+
+def list_partitions():
+    """ [(tên partition, tháng bắt đầu)] theo thứ tự thời gian, bỏ qua partition DEFAULT """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON pg_inherits.inhparent = parent.oid '
+            'JOIN pg_class child ON pg_inherits.inhrelid = child.oid '
+            'WHERE parent.relname = %s',
+            [EVENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def aware_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+
+
+# ----------------------------------------------------- compaction/retention
+
+def compaction_cutoff(retention_days, now=None):
+    """
+    Mốc (nửa đêm) trước đó event thô được nén và xoá. Với bảng partition mốc
+    được lùi về đầu tháng để chỉ cần DROP cả partition thay vì DELETE từng dòng.
+    """
+    day = (now or timezone.now()).date() - timedelta(days=retention_days)
+    if is_partitioned():
+        day = month_start(day)
+    return aware_midnight(day)
+
+
+def compact_listen_events(retention_days=None, rollup_retention_days=None, now=None, batch_size=5000):
+    """
+    Roll raw events older than the retention window into daily ListenRollup
+    rows (day, song, user, device -> plays), then remove them: whole monthly
+    partitions are dropped on PostgreSQL, other databases delete in batches.
+    Rollups past their own retention are deleted too. It all runs in one
+    transaction, so a failed run can be retried without counting plays
+    twice.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, 'LISTEN_EVENT_RETENTION_DAYS', 90)
+    if rollup_retention_days is None:
+        rollup_retention_days = getattr(settings, 'LISTEN_ROLLUP_RETENTION_DAYS', 730)
+    now = now or timezone.now()
+    cutoff = compaction_cutoff(retention_days, now)
+    result = {'rollups': 0, 'events': 0, 'partitions': [], 'expired_rollups': 0}
+
+    with transaction.atomic():
+        old_events = ListenEvent.objects.filter(occurred_at__lt=cutoff)
+        groups = (
+            old_events.annotate(day=TruncDate('occurred_at'))
+            .values('day', 'song_id', 'user_id', 'device')
+            .annotate(plays=Count('id'))
+            .order_by()
+        )
+        rollups = [ListenRollup(**group) for group in groups.iterator()]
+        ListenRollup.objects.bulk_create(rollups, batch_size=batch_size)
+        result['rollups'] = len(rollups)
+
+        if is_partitioned():
+            for name, month in list_partitions():
+                if aware_midnight(next_month(month)) <= cutoff:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'SELECT count(*) FROM {name}')
+                        result['events'] += cursor.fetchone()[0]
+                        cursor.execute(f'DROP TABLE {name}')
+                    result['partitions'].append(name)
+            # Event cũ nằm trong partition DEFAULT (tháng chưa kịp tạo partition)
+            result['events'] += old_events.delete()[0]
+        else:
+            while True:
+                ids = list(old_events.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                result['events'] += ListenEvent.objects.filter(id__in=ids).delete()[0]
+
+        rollup_cutoff = now.date() - timedelta(days=rollup_retention_days)
+        result['expired_rollups'] = ListenRollup.objects.filter(day__lt=rollup_cutoff).delete()[0]
+
+    return result
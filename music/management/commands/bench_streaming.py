@@ -0,0 +1,108 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+READ_SIZE = 16 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many concurrent, throttled streaming clients against one or more servers "
+        "and report how many streams each can keep alive (WSGI vs ASGI)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+',
+            help="label=url, ví dụ wsgi=http://127.0.0.1:8001/api/music/stream/1/",
+        )
+        parser.add_argument('--concurrency', type=int, default=200, help="Số client đồng thời")
+        parser.add_argument('--duration', type=float, default=20.0, help="Thời gian mỗi client giữ kết nối (giây)")
+        parser.add_argument('--rate', type=int, default=16000, help="Tốc độ đọc của mỗi client (bytes/giây)")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Thời gian chờ tối đa cho byte đầu tiên (giây)")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep:
+                label, url = target, target
+            parts = urlsplit(url)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f"URL không hợp lệ (chỉ hỗ trợ http://): {url}")
+            targets.append((label, parts))
+
+        self.stdout.write(
+            f"{'target':<10} {'clients':>8} {'served':>8} {'failed':>8} {'stalled':>8} "
+            f"{'ttfb p50':>9} {'ttfb p95':>9} {'MB/s':>8}"
+        )
+        for label, parts in targets:
+            result = asyncio.run(self.run_target(parts, options))
+            self.stdout.write(
+                f"{label:<10} {options['concurrency']:>8} {result['served']:>8} {result['failed']:>8} {result['stalled']:>8} "
+                f"{result['ttfb_p50']:>8.3f}s {result['ttfb_p95']:>8.3f}s {result['mbps']:>8.2f}"
+            )
+
+    async def run_target(self, parts, options):
+        stats = {'served': 0, 'failed': 0, 'stalled': 0, 'bytes': 0, 'ttfb': []}
+        started = time.monotonic()
+        await asyncio.gather(*[
+            self.run_client(parts, options, stats) for _ in range(options['concurrency'])
+        ])
+        elapsed = time.monotonic() - started
+        ttfb = sorted(stats['ttfb']) or [0.0]
+        return {
+            'served': stats['served'],
+            'failed': stats['failed'],
+            'stalled': stats['stalled'],
+            'ttfb_p50': statistics.median(ttfb),
+            'ttfb_p95': ttfb[min(len(ttfb) - 1, int(len(ttfb) * 0.95))],
+            'mbps': stats['bytes'] / elapsed / 1e6,
+        }
+
+    async def run_client(self, parts, options, stats):
+        """ Một client chậm: đọc với tốc độ giới hạn như điện thoại trên mạng di động """
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        writer = None
+        served = False
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(parts.hostname, parts.port or 80), options['timeout']
+            )
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), options['timeout'])
+            status = status_line.split(b' ', 2)[1:2]
+            if not status or not status[0].startswith(b'2'):
+                stats['failed'] += 1
+                return
+            stats['ttfb'].append(time.monotonic() - started)
+            stats['served'] += 1
+            served = True
+
+            streaming_started = time.monotonic()
+            deadline = streaming_started + options['duration']
+            received = 0
+            while time.monotonic() < deadline:
+                chunk = await asyncio.wait_for(reader.read(READ_SIZE), options['timeout'])
+                if not chunk:
+                    break
+                received += len(chunk)
+                stats['bytes'] += len(chunk)
+                ahead = received / options['rate'] - (time.monotonic() - streaming_started)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+        except (OSError, asyncio.TimeoutError):
+            # Đã nhận byte đầu tiên nhưng sau đó bị treo/ngắt giữa chừng
+            stats['stalled' if served else 'failed'] += 1
+        finally:
+            if writer is not None:
+                writer.close()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from music.cover_store import build_variants
+from music.models import Album, Song, Video
+from music.response_cache import bump_versions
+
+
+class Command(BaseCommand):
+    help = 'Generate the small WebP/AVIF/JPEG variants of every cover and video thumbnail'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Tạo lại cả các bản đã có")
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in ((Song, 'cover_image'), (Album, 'cover_image'), (Video, 'thumbnail')):
+            names.update(model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                         .values_list(field, flat=True).distinct())
+
+        written = 0
+        for name in sorted(names):
+            try:
+                written += build_variants(name, force=options['force'])
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f"⚠️  Lỗi với {name}: {e}"))
+
+        # cover_srcset trong các response đã cache cần được tính lại
+        bump_versions('song', 'album', 'video')
+        self.stdout.write(self.style.SUCCESS(f"✅ Đã tạo {written} file cho {len(names)} ảnh"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from music.listen_events import compact_listen_events, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming ListenEvent partitions, roll expired events into daily rollups and drop them (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, help="Số ngày giữ event thô (mặc định LISTEN_EVENT_RETENTION_DAYS)")
+        parser.add_argument('--rollup-retention-days', type=int, help="Số ngày giữ thống kê theo ngày (mặc định LISTEN_ROLLUP_RETENTION_DAYS)")
+        parser.add_argument('--months-ahead', type=int, default=2, help="Số partition tháng tạo trước")
+
+    def handle(self, *args, **options):
+        partitions = ensure_partitions(options['months_ahead'])
+        if partitions:
+            self.stdout.write(self.style.SUCCESS(f"✅ Partition sẵn sàng: {', '.join(partitions)}"))
+
+        result = compact_listen_events(options['retention_days'], options['rollup_retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Đã nén {result['events']} event thành {result['rollups']} dòng thống kê, "
+            f"xoá {result['expired_rollups']} dòng thống kê hết hạn"
+        ))
+        for name in result['partitions']:
+            self.stdout.write(self.style.SUCCESS(f"🗑️  Đã xoá partition {name}"))
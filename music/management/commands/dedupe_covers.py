@@ -0,0 +1,53 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from music.cover_store import adopt_cover_file, is_shared_cover
+from music.models import Album, Song
+from music.response_cache import bump_versions
+
+
+class Command(BaseCommand):
+    help = 'Move per-track cover files into the shared content-addressed cover store and delete the duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-old', action='store_true', help="Không xoá file cover cũ sau khi chuyển")
+
+    def handle(self, *args, **options):
+        shared = {}      # tên file cũ -> tên file trong kho dùng chung
+        old_files = set()
+        updated = 0
+
+        for model in (Song, Album):
+            rows = []
+            for obj in model.objects.exclude(cover_image='').exclude(cover_image__isnull=True).only('id', 'cover_image'):
+                name = obj.cover_image.name
+                if is_shared_cover(name):
+                    continue
+                if name not in shared:
+                    try:
+                        shared[name] = adopt_cover_file(name)
+                    except OSError as e:
+                        self.stdout.write(self.style.WARNING(f"⚠️  Không đọc được {name}: {e}"))
+                        shared[name] = None
+                if shared[name]:
+                    obj.cover_image = shared[name]
+                    rows.append(obj)
+                    old_files.add(name)
+            model.objects.bulk_update(rows, ['cover_image'], batch_size=500)
+            updated += len(rows)
+
+        bump_versions('song', 'album')
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Đã trỏ {updated} dòng tới {len(set(filter(None, shared.values())))} file cover dùng chung"
+        ))
+
+        if options['keep_old']:
+            return
+        removed = 0
+        for name in old_files:
+            try:
+                os.remove(os.path.join(settings.MEDIA_ROOT, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self.stdout.write(self.style.SUCCESS(f"🗑️  Đã xoá {removed} file cover trùng"))
@@ -1,81 +1,85 @@
 import os
-import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
-from django.core.files import File
-from django.core.files.temp import NamedTemporaryFile
-from moviepy import VideoFileClip
+from django.db import close_old_connections
+from music.hls import ffmpeg_available
 from music.models import Video
-
-VIDEO_RAW_DIR = 'media/video_raw'     # Nơi chứa video gốc cần xử lý
-VIDEO_DEST_DIR = 'media/videos'       # Nơi lưu video sau xử lý
-THUMBNAIL_DIR = 'media/thumbnails'    # Nơi lưu thumbnail
-SUPPORTED_EXTENSIONS = ('.mp4', '.mov', '.mkv')
+from music.video_import import (
+    SUPPORTED_EXTENSIONS, VIDEO_RAW_DIR, VideoExists, ensure_video_dirs, read_video_file, save_video,
+    segment_video, video_title,
+)
 
 class Command(BaseCommand):
     help = 'Import local videos from media/video_raw to media/videos and create Video records with thumbnails'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Số process giải mã thumbnail và cắt HLS song song")
+
     def handle(self, *args, **options):
         if not os.path.exists(VIDEO_RAW_DIR):
             self.stdout.write(f"[!] Thư mục không tồn tại: {VIDEO_RAW_DIR}")
             return
 
-        # Đảm bảo các thư mục đích tồn tại
-        for directory in [VIDEO_DEST_DIR, THUMBNAIL_DIR]:
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+        ensure_video_dirs()
 
-        files = os.listdir(VIDEO_RAW_DIR)
-        count = 0
+        segment_hls = ffmpeg_available()
+        if not segment_hls:
+            self.stdout.write("[!] Không tìm thấy ffmpeg, bỏ qua bước tạo HLS (chỉ lưu MP4)")
 
-        for file_name in files:
-            if not file_name.lower().endswith(SUPPORTED_EXTENSIONS):
-                continue
+        paths = sorted(
+            os.path.join(VIDEO_RAW_DIR, file_name)
+            for file_name in os.listdir(VIDEO_RAW_DIR)
+            if file_name.lower().endswith(SUPPORTED_EXTENSIONS)
+        )
+        # Một query cho cả thư mục thay vì exists() từng file, và không giải mã video đã có
+        existing = set(
+            Video.objects.filter(title__in=[video_title(path) for path in paths]).values_list('title', flat=True)
+        )
+        for path in paths:
+            if video_title(path) in existing:
+                self.stdout.write(f"[!] Video đã tồn tại: {video_title(path)}")
+        paths = [path for path in paths if video_title(path) not in existing]
+        if not paths:
+            self.stdout.write(self.style.SUCCESS("✅ Không có video mới."))
+            return
 
-            source_path = os.path.join(VIDEO_RAW_DIR, file_name)
-            title = os.path.splitext(file_name)[0]
+        started = time.monotonic()
+        count = 0
+        videos = {}
+        # Đóng kết nối DB trước khi fork để process con không dùng chung socket
+        close_old_connections()
 
-            if Video.objects.filter(title=title).exists():
-                self.stdout.write(f"[!] Video đã tồn tại: {title}")
-                continue
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            hls_jobs = []
+            for prepared in pool.map(read_video_file, paths):
+                if 'error' in prepared:
+                    self.stdout.write(f"[✗] Lỗi với {os.path.basename(prepared['path'])}: {prepared['error']}")
+                    continue
+                try:
+                    video = save_video(prepared)
+                except VideoExists as e:
+                    self.stdout.write(f"[!] Video đã tồn tại: {e}")
+                    continue
+                except Exception as e:
+                    self.stdout.write(f"[✗] Lỗi với {os.path.basename(prepared['path'])}: {str(e)}")
+                    continue
 
-            try:
-                # Mở video và lấy thông tin
-                clip = VideoFileClip(source_path)
-                duration = f"{int(clip.duration // 60)}:{int(clip.duration % 60):02d}"
-                
-                # Tạo thumbnail từ frame ở giây thứ 2 (hoặc frame cuối nếu video ngắn hơn)
-                thumbnail_time = min(2.0, clip.duration / 2)
-                thumbnail_name = f"{title}_thumbnail.jpg"
-                thumbnail_path = os.path.join(THUMBNAIL_DIR, thumbnail_name)
-                
-                # Lưu thumbnail
-                frame = clip.get_frame(thumbnail_time)
-                clip.save_frame(thumbnail_path, t=thumbnail_time)
-                
-                # Lưu vào database
-                video = Video(title=title, duration=duration)
-                
-                # Lưu file video
-                with open(source_path, 'rb') as f:
-                    video.video_file.save(file_name, File(f), save=False)
-                
-                # Lưu file thumbnail
-                with open(thumbnail_path, 'rb') as f:
-                    video.thumbnail.save(thumbnail_name, File(f), save=False)
-                
-                # Lưu model
-                video.save()
-                
-                # Xóa file gốc sau khi xử lý
-                os.remove(source_path)
-                
-                self.stdout.write(f"[✓] Đã import video và tạo thumbnail: {title}")
+                self.stdout.write(f"[✓] Đã import video và tạo thumbnail: {video.title}")
                 count += 1
-                
-                # Đóng clip để giải phóng tài nguyên
-                clip.close()
-                
-            except Exception as e:
-                self.stdout.write(f"[✗] Lỗi với {file_name}: {str(e)}")
+                # Cắt HLS trong pool trong khi các video khác vẫn đang được giải mã
+                if segment_hls:
+                    videos[video.id] = video
+                    hls_jobs.append(pool.submit(segment_video, video.id, video.video_file.path, prepared['size']))
+
+            for job in hls_jobs:
+                video_id, playlist, error = job.result()
+                video = videos[video_id]
+                if error:
+                    self.stdout.write(f"[!] Không tạo được HLS cho {video.title}: {error}")
+                    continue
+                video.hls_playlist = playlist
+                video.save(update_fields=['hls_playlist'])
 
-        self.stdout.write(self.style.SUCCESS(f"✅ Đã import xong {count} video với thumbnail"))
\ No newline at end of file
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ Đã import xong {count} video với thumbnail trong {elapsed:.1f}s"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from music.leaderboards import WINDOWS, prune_buckets, refresh_leaderboard
+from music.models import Leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recompute precomputed leaderboards and drop expired play buckets (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artists', action='store_true', help="Tính lại cả các bảng xếp hạng theo nghệ sĩ đã có")
+        parser.add_argument('--no-prune', action='store_true', help="Không xoá bucket đã hết hạn")
+
+    def handle(self, *args, **options):
+        for window in WINDOWS:
+            board = refresh_leaderboard(window)
+            self.stdout.write(self.style.SUCCESS(f"✅ {window}: {len(board.entries)} bài"))
+
+        if options['artists']:
+            boards = Leaderboard.objects.filter(artist__isnull=False).values_list('window', 'artist_id')
+            for window, artist_id in boards:
+                refresh_leaderboard(window, artist_id)
+            self.stdout.write(self.style.SUCCESS(f"✅ Đã tính lại {len(boards)} bảng theo nghệ sĩ"))
+
+        if not options['no_prune']:
+            deleted = prune_buckets()
+            self.stdout.write(self.style.SUCCESS(f"✅ Đã xoá {deleted} bucket hết hạn"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from moviepy import VideoFileClip
+from music.hls import HLSError, build_hls, ffmpeg_available
+from music.models import Video
+
+
+class Command(BaseCommand):
+    help = 'Build HLS renditions for videos that were imported without them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Build lại cả những video đã có HLS")
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            self.stdout.write(self.style.ERROR("⚠️  Không tìm thấy ffmpeg!"))
+            return
+
+        videos = Video.objects.all() if options['all'] else Video.objects.filter(hls_playlist='')
+        count = 0
+        for video in videos.iterator():
+            clip = None
+            try:
+                clip = VideoFileClip(video.video_file.path)
+                video.hls_playlist = build_hls(video.video_file.path, video.id, clip.size)
+                video.save(update_fields=['hls_playlist'])
+                count += 1
+                self.stdout.write(f"[✓] Đã tạo HLS: {video.title}")
+            except (HLSError, OSError) as e:
+                self.stdout.write(f"[✗] Lỗi với {video.title}: {e}")
+            finally:
+                if clip is not None:
+                    clip.close()
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Đã tạo HLS cho {count} video"))
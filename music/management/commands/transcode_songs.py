@@ -0,0 +1,33 @@
+import mutagen
+from django.core.management.base import BaseCommand
+from music.hls import ffmpeg_available
+from music.models import Song
+from music.renditions import RenditionError, build_audio_renditions
+
+
+class Command(BaseCommand):
+    help = 'Build compressed audio renditions for songs that were imported without them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Transcode lại cả những bài đã có rendition")
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            self.stdout.write(self.style.ERROR("⚠️  Không tìm thấy ffmpeg!"))
+            return
+
+        songs = Song.objects.all() if options['all'] else Song.objects.filter(renditions=[])
+        count = 0
+        for song in songs.only('id', 'title', 'audio_file').iterator():
+            path = song.audio_file.path
+            try:
+                audio = mutagen.File(path)
+                source_bitrate = getattr(audio.info, 'bitrate', None) if audio else None
+                song.renditions = build_audio_renditions(path, song.id, source_bitrate)
+                song.save(update_fields=['renditions'])
+                count += 1
+                self.stdout.write(self.style.SUCCESS(f"✅ {song.title}: {song.renditions} kbps"))
+            except (RenditionError, mutagen.MutagenError, OSError) as e:
+                self.stdout.write(self.style.WARNING(f"⚠️  Lỗi với {song.title}: {e}"))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Đã transcode {count} bài hát"))
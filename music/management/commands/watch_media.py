@@ -0,0 +1,94 @@
+import os
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from music.hls import ffmpeg_available
+from music.media_watcher import Debouncer, InotifyWatcher, create_watcher
+from music.song_import import (
+    AUDIO_EXTENSIONS, MEDIA_PATH, ImportManifest, import_song_file, manifest_path, scan_song_files,
+)
+from music.video_import import SUPPORTED_EXTENSIONS, VIDEO_RAW_DIR, VideoExists, ensure_video_dirs, import_video_file
+
+
+class Command(BaseCommand):
+    help = 'Watch media/songs and media/video_raw and import new files as soon as they are fully written'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', action='store_true', help="Dùng polling thay vì inotify")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Số giây giữa hai lần quét khi polling")
+        parser.add_argument('--debounce', type=float, default=2.0, help="Số giây file phải đứng yên (size/mtime không đổi) trước khi import")
+
+    def handle(self, *args, **options):
+        os.makedirs(MEDIA_PATH, exist_ok=True)
+        os.makedirs(VIDEO_RAW_DIR, exist_ok=True)
+        ensure_video_dirs()
+
+        self.uploaded_by = get_user_model().objects.first()
+        if not self.uploaded_by:
+            self.stdout.write(self.style.ERROR("⚠️  Không tìm thấy user nào trong hệ thống!"))
+            return
+        self.transcode = ffmpeg_available()
+        self.manifest = ImportManifest(manifest_path('songs'))
+        self.song_dir = os.path.abspath(MEDIA_PATH)
+
+        watcher = create_watcher([MEDIA_PATH, VIDEO_RAW_DIR], options['poll'], options['poll_interval'])
+        debouncer = Debouncer(options['debounce'])
+        mode = 'inotify' if isinstance(watcher, InotifyWatcher) else f"polling {options['poll_interval']}s"
+        self.stdout.write(self.style.SUCCESS(f"👀 Đang theo dõi {MEDIA_PATH} và {VIDEO_RAW_DIR} ({mode}), Ctrl+C để dừng"))
+
+        # File đã nằm sẵn trong thư mục trước khi bắt đầu theo dõi
+        self.catch_up(debouncer)
+        try:
+            while True:
+                for path in watcher.wait(0.5 if debouncer.pending else 5):
+                    if self.is_media_file(path):
+                        debouncer.touch(path)
+                if watcher.overflowed:
+                    watcher.overflowed = False
+                    self.catch_up(debouncer)
+                for path in debouncer.ready():
+                    self.import_file(path)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("✅ Đã dừng theo dõi"))
+        finally:
+            watcher.close()
+
+    def catch_up(self, debouncer):
+        for path, _ in scan_song_files(self.manifest):
+            debouncer.touch(path)
+        for name in os.listdir(VIDEO_RAW_DIR):
+            path = os.path.join(VIDEO_RAW_DIR, name)
+            if self.is_media_file(path):
+                debouncer.touch(path)
+
+    def is_song(self, path):
+        return os.path.dirname(os.path.abspath(path)) == self.song_dir
+
+    def is_media_file(self, path):
+        extensions = AUDIO_EXTENSIONS if self.is_song(path) else SUPPORTED_EXTENSIONS
+        return path.lower().endswith(extensions)
+
+    def import_file(self, path):
+        close_old_connections()
+        name = os.path.basename(path)
+        try:
+            if self.is_song(path):
+                if self.manifest.is_unchanged(name, os.stat(path)):
+                    return
+                song, error = import_song_file(path, self.uploaded_by, self.manifest, self.transcode)
+                if song:
+                    self.stdout.write(self.style.SUCCESS(f"✅ Đã thêm: {song.title} - {song.artist}"))
+                elif not error:
+                    self.stdout.write(self.style.WARNING(f"⚠️  Bài hát đã tồn tại: {name}"))
+                if error:
+                    self.stdout.write(self.style.WARNING(f"⚠️  Lỗi với {name}: {error}"))
+            else:
+                video, hls_error = import_video_file(path, self.transcode)
+                if hls_error:
+                    self.stdout.write(self.style.WARNING(f"⚠️  Không tạo được HLS cho {video.title}: {hls_error}"))
+                self.stdout.write(self.style.SUCCESS(f"✅ Đã import video: {video.title}"))
+        except VideoExists as e:
+            self.stdout.write(self.style.WARNING(f"⚠️  Video đã tồn tại: {e}"))
+        except Exception as e:
+            # Một file lỗi không được làm dừng cả daemon
+            self.stdout.write(self.style.ERROR(f"❌ Lỗi với {name}: {e}"))
@@ -0,0 +1,100 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+
+from django.conf import settings
+
+from .cover_store import COVER_DIR
+
+# Thư mục con trong URL chứa fingerprint: /media/v/<fingerprint>/<tên file>
+FINGERPRINT_DIR = 'v'
+FINGERPRINT_LENGTH = 12
+FINGERPRINT_RE = re.compile(rf'^{FINGERPRINT_DIR}/(?P<fingerprint>[0-9a-f]{{{FINGERPRINT_LENGTH}}})/(?P<name>.+)$')
+# Cover trong kho dùng chung đã mang hash nội dung trong tên (kể cả các bản _64.webp, ...)
+HASHED_NAME_RE = re.compile(rf'^{COVER_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(?:_\d+)?\.\w+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Thư mục ảnh được /media/ phục vụ công khai (upload_to của các ImageField; bản nhỏ nằm cạnh ảnh gốc).
+# Nhạc, video, rendition, HLS chỉ đi qua các view stream có kiểm tra quyền / chữ ký
+PUBLIC_MEDIA_DIRS = (COVER_DIR, 'album_images', 'thumbnails')
+
+# Python < 3.12 chưa biết AVIF; WebP cũng khai báo lại cho chắc
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+
+_fingerprints = {}
+_lock = threading.Lock()
+
+
+def media_base_url():
+    return getattr(settings, 'MEDIA_BASE_URL', settings.MEDIA_URL)
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.match(name))
+
+
+def fingerprint(name):
+    """
+    First hex digits of the SHA-256 of a media file. Cached per process and
+    keyed on (size, mtime_ns), so a replaced file gets a new fingerprint
+    while an unchanged one costs a single ``stat``.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _fingerprints.get(name)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()[:FINGERPRINT_LENGTH]
+    with _lock:
+        _fingerprints[name] = (signature, value)
+    return value
+
+
+def media_url(name):
+    """
+    Public URL of a media file under MEDIA_BASE_URL. Content-addressed
+    covers are already immutable by name; anything else gets its content
+    fingerprint in the path so it can be cached forever too and changes URL
+    when the file changes.
+    """
+    name = str(name)
+    if is_hashed_name(name):
+        return f'{media_base_url()}{name}'
+    try:
+        return f'{media_base_url()}{FINGERPRINT_DIR}/{fingerprint(name)}/{name}'
+    except OSError:
+        # File không còn trên đĩa: trả URL thường, view media sẽ trả 404
+        return f'{media_base_url()}{name}'
+
+
+def is_public_media(name):
+    """ Tên file (đã bỏ fingerprint) có nằm trong thư mục ảnh công khai không; '..' được chuẩn hoá trước """
+    parts = posixpath.normpath(name).split('/')
+    return len(parts) > 1 and parts[0] in PUBLIC_MEDIA_DIRS
+
+
+def resolve_media_path(path):
+    """
+    Tách URL path (phần sau MEDIA_URL) thành (tên file, có được cache vĩnh viễn không).
+    URL có fingerprint cũ vẫn trả file hiện tại nhưng không được cache lâu.
+    File ngoài PUBLIC_MEDIA_DIRS trả (None, False), kiểm tra trước khi tính fingerprint.
+    """
+    match = FINGERPRINT_RE.match(path)
+    name = path if match is None else match.group('name')
+    if not is_public_media(name):
+        return None, False
+    if match is None:
+        return name, is_hashed_name(name)
+    try:
+        return name, fingerprint(name) == match.group('fingerprint')
+    except OSError:
+        return name, False
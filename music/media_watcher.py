@@ -0,0 +1,135 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# Các cờ inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """
+    Directory watcher on Linux inotify, bound through ctypes so no extra
+    package is needed. ``wait()`` blocks until something changes (or the
+    timeout expires) and returns the paths that were written or moved in.
+    """
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+            self.directories[wd] = directory
+        # Hàng đợi của kernel bị tràn thì phải quét lại cả thư mục
+        self.overflowed = False
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+            elif name and wd in self.directories:
+                paths.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """ Dự phòng khi không có inotify: so sánh (size, mtime) của thư mục sau mỗi ``interval`` giây """
+
+    def __init__(self, directories, interval=2.0):
+        self.directories = list(directories)
+        self.interval = interval
+        self.overflowed = False
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self.scan()
+        changed = {path for path, signature in snapshot.items() if self.snapshot.get(path) != signature}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(directories, force_polling=False, poll_interval=2.0):
+    if not force_polling:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            # Không phải Linux / libc không có inotify
+            pass
+    return PollingWatcher(directories, poll_interval)
+
+
+class Debouncer:
+    """
+    Holds paths until their (size, mtime) has stayed the same for
+    ``quiet_seconds``, so files that are still being copied or uploaded are
+    not imported half-written.
+    """
+
+    def __init__(self, quiet_seconds=2.0):
+        self.quiet_seconds = quiet_seconds
+        self.pending = {}   # path -> (signature, thời điểm signature đổi lần cuối)
+
+    def touch(self, path):
+        self.pending.setdefault(path, (None, time.monotonic()))
+
+    def ready(self):
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed_at) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Bị xoá hoặc đổi tên trước khi kịp import
+                del self.pending[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self.pending[path] = (current, now)
+            elif now - changed_at >= self.quiet_seconds:
+                del self.pending[path]
+                ready.append(path)
+        return sorted(ready)
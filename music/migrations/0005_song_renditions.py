@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0004_video_hls_playlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0005_song_renditions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['created_at', 'id'], name='album_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favoritesong',
+            index=models.Index(fields=['user', 'added_at', 'id'], name='favorite_user_added_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='playlist_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['created_at', 'id'], name='song_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['created_at', 'id'], name='video_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:00
+
+import unicodedata
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def normalize_text(value):
+    # Bản sao của music.search.normalize_text lúc viết migration: migration không import code ứng dụng
+    value = (value or '').lower().replace('đ', 'd')
+    value = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in value if not unicodedata.combining(c))
+
+
+def song_search_text(title, artist, album_name):
+    return normalize_text(' '.join(filter(None, [title, artist, album_name])))
+
+
+def album_search_text(name, artist):
+    return normalize_text(' '.join(filter(None, [name, artist])))
+
+
+SEARCH_INDEXES = [
+    ('music_song', 'song_search_tsv_idx', "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_text, '')))"),
+    ('music_song', 'song_search_trgm_idx', 'USING gin (search_text gin_trgm_ops)'),
+    ('music_album', 'album_search_tsv_idx', "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_text, '')))"),
+    ('music_album', 'album_search_trgm_idx', 'USING gin (search_text gin_trgm_ops)'),
+]
+
+
+def backfill_search_text(apps, schema_editor):
+    Album = apps.get_model('music', 'Album')
+    Song = apps.get_model('music', 'Song')
+
+    albums = list(Album.objects.all())
+    album_names = {}
+    for album in albums:
+        album.search_text = album_search_text(album.name, album.artist)
+        album_names[album.id] = album.name
+    Album.objects.bulk_update(albums, ['search_text'], batch_size=500)
+
+    songs = list(Song.objects.only('id', 'title', 'artist', 'album_id'))
+    for song in songs:
+        song.search_text = song_search_text(song.title, song.artist, album_names.get(song.album_id))
+    Song.objects.bulk_update(songs, ['search_text'], batch_size=500)
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN/pg_trgm chỉ có trên PostgreSQL; SQLite dùng PythonSearchBackend nên không cần
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, name, definition in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='album',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
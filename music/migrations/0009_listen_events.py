@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:33
+
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+# Số tháng tạo sẵn partition sau tháng hiện tại, như music.listen_events.ensure_partitions;
+# migration không import code app (code đó có thể đổi sau này) và phải chạy trên connection của schema_editor
+MONTHS_AHEAD = 2
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def aware_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+
+
+def partition_listen_events(apps, schema_editor):
+    """
+    PostgreSQL: tạo lại bảng ListenEvent (vừa tạo, còn rỗng) dưới dạng bảng
+    partition theo tháng của occurred_at. Khoá chính phải chứa cột partition
+    nên là (id, occurred_at); các index Django đã tạo được tạo lại y hệt.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = 'music_listenevent' "
+            "AND indexname <> 'music_listenevent_pkey'"
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+    schema_editor.execute('DROP TABLE music_listenevent')
+    schema_editor.execute(
+        'CREATE TABLE music_listenevent ('
+        'id bigint GENERATED BY DEFAULT AS IDENTITY, '
+        'occurred_at timestamp with time zone NOT NULL, '
+        'device varchar(32) NOT NULL, '
+        'bitrate integer NULL CHECK (bitrate >= 0), '
+        'song_id bigint NOT NULL, '
+        'user_id bigint NULL, '
+        'PRIMARY KEY (id, occurred_at)'
+        ') PARTITION BY RANGE (occurred_at)'
+    )
+    for definition in index_definitions:
+        schema_editor.execute(definition)
+    schema_editor.execute('CREATE TABLE music_listenevent_default PARTITION OF music_listenevent DEFAULT')
+    today = timezone.now().date()
+    month = date(today.year, today.month, 1)
+    for _ in range(MONTHS_AHEAD + 1):
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS music_listenevent_p{month:%Y%m} PARTITION OF music_listenevent '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [aware_midnight(month), aware_midnight(next_month(month))],
+        )
+        month = next_month(month)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('music', '0008_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListenRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('device', models.CharField(blank=True, max_length=32)),
+                ('plays', models.PositiveIntegerField(default=0)),
+                ('song', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='music.song')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'song'], name='listenrollup_day_song_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ListenEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurred_at', models.DateTimeField()),
+                ('device', models.CharField(blank=True, max_length=32)),
+                ('bitrate', models.PositiveIntegerField(blank=True, null=True)),
+                ('song', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='music.song')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['occurred_at'], name='listenevent_occurred_idx')],
+            },
+        ),
+        migrations.RunPython(partition_listen_events, migrations.RunPython.noop),
+    ]
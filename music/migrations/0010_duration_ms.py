@@ -0,0 +1,116 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:44
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def parse_duration_ms(value):
+    # Bản sao của music.durations.parse_duration_ms: migration không import code ứng dụng
+    seconds = 0.0
+    try:
+        for part in str(value or '').strip().split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return 0
+    return max(0, round(seconds * 1000))
+
+
+def format_duration(ms):
+    minutes, seconds = divmod(ms // 1000, 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:{seconds:02d}"
+
+
+def backfill_durations(apps, schema_editor):
+    """ Đổi chuỗi "hh:mm:ss" / "m:ss" cũ sang mili giây rồi tính tổng cho album và playlist """
+    for model_name in ('Song', 'Video'):
+        model = apps.get_model('music', model_name)
+        batch = []
+        for obj in model.objects.only('id', 'duration').iterator(chunk_size=2000):
+            obj.duration_ms = parse_duration_ms(obj.duration)
+            batch.append(obj)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['duration_ms'])
+                batch = []
+        model.objects.bulk_update(batch, ['duration_ms'])
+
+    Song = apps.get_model('music', 'Song')
+    Album = apps.get_model('music', 'Album')
+    Playlist = apps.get_model('music', 'Playlist')
+    PlaylistSong = apps.get_model('music', 'PlaylistSong')
+
+    def total(queryset, group, aggregate):
+        return Coalesce(
+            Subquery(queryset.order_by().values(group).annotate(value=aggregate).values('value'),
+                     output_field=IntegerField()),
+            0,
+        )
+
+    songs = Song.objects.filter(album=OuterRef('pk'))
+    Album.objects.update(
+        track_count=total(songs, 'album', Count('id')),
+        total_duration_ms=total(songs, 'album', Sum('duration_ms')),
+    )
+    entries = PlaylistSong.objects.filter(playlist=OuterRef('pk'))
+    Playlist.objects.update(
+        track_count=total(entries, 'playlist', Count('id')),
+        total_duration_ms=total(entries, 'playlist', Sum('song__duration_ms')),
+    )
+
+
+def restore_durations(apps, schema_editor):
+    for model_name in ('Song', 'Video'):
+        model = apps.get_model('music', model_name)
+        objs = list(model.objects.only('id', 'duration_ms'))
+        for obj in objs:
+            obj.duration = format_duration(obj.duration_ms)
+        model.objects.bulk_update(objs, ['duration'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0009_listen_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='total_duration_ms',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='track_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='total_duration_ms',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='track_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='duration_ms',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='duration_ms',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_durations, restore_durations),
+        migrations.RemoveField(
+            model_name='song',
+            name='duration',
+        ),
+        migrations.RemoveField(
+            model_name='video',
+            name='duration',
+        ),
+    ]
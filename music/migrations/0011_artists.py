@@ -0,0 +1,78 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:46
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def artist_key(name):
+    # Bản sao của music.artists.artist_key: migration không import code ứng dụng
+    return ' '.join((name or '').split()).casefold()
+
+
+def backfill_artists(apps, schema_editor):
+    """
+    Một Artist cho mỗi nhóm tên chỉ khác nhau ở hoa/thường hoặc khoảng trắng;
+    cách viết xuất hiện nhiều nhất làm tên hiển thị. Mỗi nhóm là một UPDATE
+    cho Song và một cho Album.
+    """
+    Artist = apps.get_model('music', 'Artist')
+    models_with_artist = [apps.get_model('music', 'Song'), apps.get_model('music', 'Album')]
+
+    spellings = {}
+    for model in models_with_artist:
+        for name, count in model.objects.values('artist').annotate(n=Count('id')).values_list('artist', 'n'):
+            spellings[name] = spellings.get(name, 0) + count
+
+    variants = {}
+    for name in spellings:
+        if artist_key(name):
+            variants.setdefault(artist_key(name), []).append(name)
+
+    Artist.objects.bulk_create([
+        Artist(name=' '.join(max(names, key=lambda name: (spellings[name], name)).split()), name_key=key)
+        for key, names in variants.items()
+    ], batch_size=1000)
+    artist_ids = dict(Artist.objects.values_list('name_key', 'id'))
+    for key, names in variants.items():
+        for model in models_with_artist:
+            model.objects.filter(artist__in=names).update(primary_artist_id=artist_ids[key])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0010_duration_ms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Artist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('name_key', models.CharField(editable=False, max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='primary_artist',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='albums', to='music.artist'),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='primary_artist',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='songs', to='music.artist'),
+        ),
+        migrations.RunPython(backfill_artists, migrations.RunPython.noop),
+        # Tạo index sau khi đã điền dữ liệu
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['primary_artist', '-created_at'], name='album_artist_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['primary_artist', '-listen_count'], name='song_artist_listens_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def drop_artist_boards(apps, schema_editor):
+    # Bảng theo nghệ sĩ chỉ là dữ liệu tính sẵn, khoá cũ là chuỗi tuỳ ý: xoá, lần đọc sau tính lại theo id
+    Leaderboard = apps.get_model('music', 'Leaderboard')
+    Leaderboard.objects.exclude(artist='').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_artist_boards, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='leaderboard',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='leaderboard',
+            name='artist',
+        ),
+        migrations.AddField(
+            model_name='leaderboard',
+            name='artist',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='music.artist'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(fields=('artist', 'window'), name='leaderboard_artist_window_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(condition=models.Q(('artist__isnull', True)), fields=('window',), name='leaderboard_global_window_uniq'),
+        ),
+    ]
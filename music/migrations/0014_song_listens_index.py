@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0013_leaderboard_artist_fk'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='song',
+            name='song_top_listens_idx',
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['-listen_count', 'id'], name='song_listens_id_idx'),
+        ),
+    ]
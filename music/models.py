@@ -4,27 +4,70 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()  
 
+class Artist(models.Model):
+    name = models.CharField(max_length=255)
+    # Tên đã gộp khoảng trắng + casefold (music.artists.artist_key): các cách viết khác nhau chỉ là một Artist
+    name_key = models.CharField(max_length=255, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
 class Album(models.Model):
     name = models.CharField(max_length=255)
+    # Tên nghệ sĩ như trong tag, giữ để hiển thị; quan hệ thật nằm ở primary_artist
     artist = models.CharField(max_length=255)
+    # Không cần index riêng: index (primary_artist, -created_at) bên dưới đã bắt đầu bằng cột này
+    primary_artist = models.ForeignKey(
+        Artist, related_name='albums', on_delete=models.SET_NULL, null=True, blank=True, db_index=False,
+    )
     cover_image = models.ImageField(upload_to="album_images/", blank=True, null=True)   
+    # Tên + nghệ sĩ đã bỏ dấu, dùng cho tìm kiếm (music.search), cập nhật qua signals
+    search_text = models.TextField(blank=True, editable=False)
+    # Số bài và tổng thời lượng (ms), cập nhật cộng dồn (music.durations) để header không cần Count/Sum
+    track_count = models.PositiveIntegerField(default=0, editable=False)
+    total_duration_ms = models.PositiveBigIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='album_created_id_idx'),
+            models.Index(fields=['primary_artist', '-created_at'], name='album_artist_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 class Song(models.Model):
     title = models.CharField(max_length=255)
     artist = models.CharField(max_length=255)
+    primary_artist = models.ForeignKey(
+        Artist, related_name='songs', on_delete=models.SET_NULL, null=True, blank=True, db_index=False,
+    )
     album = models.ForeignKey(Album, related_name="songs", on_delete=models.CASCADE, null=True, blank=True)
     audio_file = models.FileField(upload_to="songs/") 
-    duration = models.CharField(max_length=50, blank=True)
+    # Thời lượng tính bằng mili giây, để sắp xếp / lọc / cộng được trong SQL
+    duration_ms = models.PositiveIntegerField(default=0)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     cover_image = models.ImageField(upload_to="covers/", blank=True, null=True) 
     listen_count = models.PositiveIntegerField(default=0)
+    # Các bitrate (kbps) đã transcode sẵn trong media/renditions/<id>/
+    renditions = models.JSONField(default=list, blank=True)
+    # Tên bài + nghệ sĩ + tên album đã bỏ dấu, dùng cho tìm kiếm (music.search), cập nhật qua signals
+    search_text = models.TextField(blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='song_created_id_idx'),
+            models.Index(fields=['primary_artist', '-listen_count'], name='song_artist_listens_idx'),
+            # Bảng xếp hạng 'all': đọc sẵn theo thứ tự (-listen_count, id), kể cả bài chưa có lượt nghe
+            models.Index(fields=['-listen_count', 'id'], name='song_listens_id_idx'),
+            # import_songs kiểm tra (title, artist) đã tồn tại; index phủ luôn cả hai cột
+            models.Index(fields=['title', 'artist'], name='song_title_artist_idx'),
+        ]
+
     def __str__(self):
         return self.title
     
@@ -32,8 +75,18 @@ class Song(models.Model):
 class Playlist(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='playlists')
+    track_count = models.PositiveIntegerField(default=0, editable=False)
+    total_duration_ms = models.PositiveBigIntegerField(default=0, editable=False)
+    # Tăng mỗi lần danh sách bài (hoặc thứ tự) thay đổi, dùng làm watermark cho ETag;
+    # đổi thứ tự không đổi số bài / tổng order nên không suy ra được từ PlaylistSong
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='playlist_user_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -47,6 +100,10 @@ class PlaylistSong(models.Model):
     class Meta:
         unique_together = ('playlist', 'song')
         ordering = ['order']
+        indexes = [
+            # Bài trong playlist theo thứ tự hiển thị, không phải sort lại
+            models.Index(fields=['playlist', 'order'], name='playlistsong_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.song.title} in {self.playlist.name}"
@@ -58,16 +115,115 @@ class FavoriteSong(models.Model):
 
     class Meta:
         unique_together = ('user', 'song')
+        indexes = [
+            models.Index(fields=['user', 'added_at', 'id'], name='favorite_user_added_id_idx'),
+        ]
     def __str__(self):
         return f"{self.user.username} - {self.song.title}"
 
 class Video(models.Model):
     title = models.CharField(max_length=255)
     video_file = models.FileField(upload_to='videos/')
-    duration = models.CharField(max_length=50, blank=True)
+    duration_ms = models.PositiveIntegerField(default=0)
     thumbnail = models.ImageField(upload_to='thumbnails/', null=True, blank=True)
+    # Master playlist HLS (tương đối so với MEDIA_ROOT), rỗng nếu chưa segment
+    hls_playlist = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='video_created_id_idx'),
+            # import_videos bỏ qua video đã có theo title
+            models.Index(fields=['title'], name='video_title_idx'),
+        ]
+
     def __str__(self):
         return self.title
     
+
+
+class SongPlayBucket(models.Model):
+    """ Số lượt nghe của một bài trong một giờ/ngày, cộng dồn sau mỗi lần flush listen_count """
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITY_CHOICES = [(HOUR, 'Hour'), (DAY, 'Day')]
+
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, related_name='play_buckets')
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    plays = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('song', 'granularity', 'bucket_start')
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start'], name='playbucket_gran_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.song_id} {self.granularity} {self.bucket_start:%Y-%m-%d %H:00}: {self.plays}"
+
+
+class Leaderboard(models.Model):
+    """ Top-K bài hát đã tính sẵn cho một cửa sổ thời gian (và một nghệ sĩ, nếu có) """
+    window = models.CharField(max_length=10)
+    # NULL = bảng xếp hạng chung. Không cần index riêng: ràng buộc unique (artist, window) đã bắt đầu bằng cột này
+    artist = models.ForeignKey(
+        Artist, related_name='+', on_delete=models.CASCADE, null=True, blank=True, db_index=False,
+    )
+    # [[song_id, plays], ...] theo thứ tự giảm dần
+    entries = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['artist', 'window'], name='leaderboard_artist_window_uniq'),
+            # NULL không trùng nhau trong unique thường: bảng chung cần ràng buộc riêng
+            models.UniqueConstraint(fields=['window'], condition=models.Q(artist__isnull=True),
+                                    name='leaderboard_global_window_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.window} {self.artist_id or '*'}"
+
+
+class ListenEvent(models.Model):
+    """
+    Một lượt phát, chỉ ghi thêm (append-only), ghi theo lô từ buffer trong
+    process (music.listen_events). Trên PostgreSQL bảng được chia partition
+    theo tháng của occurred_at; không dùng FK thật để xoá bài/người dùng
+    không phải quét bảng này và lịch sử vẫn còn cho thống kê.
+    """
+    song = models.ForeignKey(Song, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+',
+    )
+    occurred_at = models.DateTimeField()
+    device = models.CharField(max_length=32, blank=True)
+    bitrate = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['occurred_at'], name='listenevent_occurred_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.song_id} @ {self.occurred_at}"
+
+
+class ListenRollup(models.Model):
+    """ ListenEvent đã nén theo ngày, giữ lại sau khi event thô hết hạn """
+    day = models.DateField()
+    song = models.ForeignKey(Song, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+',
+    )
+    device = models.CharField(max_length=32, blank=True)
+    plays = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'song'], name='listenrollup_day_song_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.song_id}: {self.plays}"
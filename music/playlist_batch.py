@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Subquery, Value, When
+
+from .durations import add_to_playlist, defer_playlist_totals
+from .models import Playlist, PlaylistSong, Song
+
+MAX_BATCH_SIZE = 1000
+
+
+class PlaylistBatchError(Exception):
+    def __init__(self, message, song_ids=None):
+        super().__init__(message)
+        self.song_ids = song_ids or []
+
+
+def clean_song_ids(value, allow_empty=False):
+    """ ``song_ids`` của request -> list id không trùng, giữ nguyên thứ tự """
+    if not isinstance(value, list):
+        raise PlaylistBatchError("song_ids must be a list of song IDs")
+    if not value and not allow_empty:
+        raise PlaylistBatchError("song_ids must not be empty")
+    if len(value) > MAX_BATCH_SIZE:
+        raise PlaylistBatchError(f"At most {MAX_BATCH_SIZE} songs per request")
+    song_ids = []
+    for item in value:
+        if isinstance(item, bool) or not str(item).isdigit():
+            raise PlaylistBatchError("song_ids must be a list of song IDs", [item])
+        song_ids.append(int(item))
+    return list(dict.fromkeys(song_ids))
+
+
+def lock_playlist(playlist_id, user):
+    """ Playlist của ``user``, khoá dòng tới hết transaction, kèm order lớn nhất hiện có (một query) """
+    last_order = PlaylistSong.objects.filter(playlist=OuterRef('pk')).order_by('-order').values('order')[:1]
+    return (
+        Playlist.objects.select_for_update()
+        .filter(id=playlist_id, user=user)
+        .annotate(last_order=Subquery(last_order))
+        .first()
+    )
+
+
+def song_rows(playlist, song_ids):
+    """
+    One IN query over ``song_ids``: {song_id: (duration_ms, already in the
+    playlist)}. Raises PlaylistBatchError listing the IDs that do not exist.
+    """
+    in_playlist = PlaylistSong.objects.filter(playlist=playlist, song=OuterRef('pk'))
+    rows = {
+        song_id: (duration_ms, present)
+        for song_id, duration_ms, present in Song.objects.filter(id__in=song_ids)
+        .annotate(present=Exists(in_playlist))
+        .values_list('id', 'duration_ms', 'present')
+    }
+    missing = [song_id for song_id in song_ids if song_id not in rows]
+    if missing:
+        raise PlaylistBatchError("Song not found", missing)
+    return rows
+
+
+def totals(playlist, tracks=0, duration_ms=0):
+    return {
+        'track_count': playlist.track_count + tracks,
+        'total_duration_ms': playlist.total_duration_ms + duration_ms,
+    }
+
+
+def add_songs(playlist_id, user, song_ids):
+    """
+    Append ``song_ids`` to the playlist in the given order, skipping songs
+    already in it. A constant number of queries whatever the list size;
+    returns None if the playlist is not the user's.
+    """
+    with transaction.atomic():
+        playlist = lock_playlist(playlist_id, user)
+        if playlist is None:
+            return None
+        rows = song_rows(playlist, song_ids)
+        added = [song_id for song_id in song_ids if not rows[song_id][1]]
+        start = 0 if playlist.last_order is None else playlist.last_order + 1
+        # bulk_create không gửi post_save: tổng của playlist được cộng một lần bên dưới
+        PlaylistSong.objects.bulk_create(
+            [PlaylistSong(playlist=playlist, song_id=song_id, order=start + i) for i, song_id in enumerate(added)],
+            ignore_conflicts=True,
+        )
+        duration = sum(rows[song_id][0] for song_id in added)
+        add_to_playlist(playlist.id, added, duration=duration)
+    return {
+        'added': added,
+        'skipped': [song_id for song_id in song_ids if rows[song_id][1]],
+        **totals(playlist, len(added), duration),
+    }
+
+
+def remove_songs(playlist_id, user, song_ids):
+    """ Remove ``song_ids`` from the playlist with a single delete; songs not in it are skipped """
+    with transaction.atomic():
+        playlist = lock_playlist(playlist_id, user)
+        if playlist is None:
+            return None
+        rows = song_rows(playlist, song_ids)
+        removed = [song_id for song_id in song_ids if rows[song_id][1]]
+        if removed:
+            with defer_playlist_totals():
+                PlaylistSong.objects.filter(playlist=playlist, song_id__in=removed).delete()
+        duration = sum(rows[song_id][0] for song_id in removed)
+        add_to_playlist(playlist.id, removed, sign=-1, duration=duration)
+    return {
+        'removed': removed,
+        'skipped': [song_id for song_id in song_ids if not rows[song_id][1]],
+        **totals(playlist, -len(removed), -duration),
+    }
+
+
+def replace_songs(playlist_id, user, song_ids):
+    """
+    Make the playlist exactly ``song_ids``, in that order. Songs that stay
+    keep their row (and added_at) and are renumbered in one UPDATE; the
+    others are deleted or inserted in bulk.
+    """
+    with transaction.atomic():
+        playlist = lock_playlist(playlist_id, user)
+        if playlist is None:
+            return None
+        rows = song_rows(playlist, song_ids) if song_ids else {}
+        kept = [song_id for song_id in song_ids if rows[song_id][1]]
+        added = [song_id for song_id in song_ids if not rows[song_id][1]]
+        position = {song_id: i for i, song_id in enumerate(song_ids)}
+
+        with defer_playlist_totals():
+            removed, _ = PlaylistSong.objects.filter(playlist=playlist).exclude(song_id__in=song_ids).delete()
+        if kept:
+            PlaylistSong.objects.filter(playlist=playlist, song_id__in=kept).update(
+                order=Case(*[When(song_id=song_id, then=Value(position[song_id])) for song_id in kept]),
+            )
+        PlaylistSong.objects.bulk_create(
+            [PlaylistSong(playlist=playlist, song_id=song_id, order=position[song_id]) for song_id in added],
+            ignore_conflicts=True,
+        )
+        # Danh sách mới là toàn bộ playlist: ghi thẳng tổng thay vì cộng chênh lệch
+        new_totals = {
+            'track_count': len(song_ids),
+            'total_duration_ms': sum(duration_ms for duration_ms, _ in rows.values()),
+        }
+        # version luôn tăng: sắp xếp lại cùng các bài giữ nguyên tổng nhưng đổi nội dung
+        Playlist.objects.filter(pk=playlist.pk).update(version=F('version') + 1, **new_totals)
+    return {'added': added, 'removed_count': removed, **new_totals}
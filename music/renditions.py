@@ -0,0 +1,125 @@
+import mimetypes
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.cache import patch_vary_headers
+
+from .hls import ffmpeg_available, ffmpeg_binary
+
+RENDITIONS_DIR = 'renditions'
+RENDITION_CONTENT_TYPE = 'audio/mp4'
+
+DEFAULT_BITRATES = [96, 160, 320]
+
+# ?quality=... -> vị trí trong ladder (sắp xếp tăng dần)
+QUALITY_LEVELS = ('low', 'normal', 'high')
+
+# Client hint ECT (Effective Connection Type) -> bitrate tối đa (kbps)
+ECT_MAX_BITRATE = {
+    'slow-2g': 96,
+    '2g': 96,
+    '3g': 160,
+}
+
+
+class RenditionError(Exception):
+    pass
+
+
+def rendition_bitrates():
+    return sorted(getattr(settings, 'AUDIO_RENDITION_BITRATES', DEFAULT_BITRATES))
+
+
+def rendition_name(song_id, bitrate):
+    return f'{RENDITIONS_DIR}/{song_id}/{bitrate}k.m4a'
+
+
+def build_audio_renditions(source_path, song_id, source_bitrate=None):
+    """
+    Transcode ``source_path`` to an AAC ladder under
+    ``media/renditions/<song_id>/<bitrate>k.m4a``. Bitrates above the source
+    (when known) are skipped since they would only add bytes, but the lowest
+    one is always produced.
+
+    Returns the list of bitrates (kbps) that were written.
+    """
+    if not ffmpeg_available():
+        raise RenditionError(f"Không tìm thấy ffmpeg ({ffmpeg_binary()})")
+
+    bitrates = rendition_bitrates()
+    if source_bitrate:
+        bitrates = [b for b in bitrates if b * 1000 <= source_bitrate] or bitrates[:1]
+
+    output_dir = os.path.join(settings.MEDIA_ROOT, RENDITIONS_DIR, str(song_id))
+    os.makedirs(output_dir, exist_ok=True)
+
+    for bitrate in bitrates:
+        output_path = os.path.join(settings.MEDIA_ROOT, rendition_name(song_id, bitrate))
+        command = [
+            ffmpeg_binary(), '-y', '-loglevel', 'error', '-i', source_path,
+            '-map', '0:a:0', '-vn', '-c:a', 'aac', '-b:a', f'{bitrate}k',
+            '-movflags', '+faststart',
+            output_path,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RenditionError(f"ffmpeg lỗi ở {bitrate}k: {result.stderr.strip()[-500:]}")
+    return bitrates
+
+
+def select_bitrate(request, available):
+    """
+    Pick a rendition for this request, or None for the original file.
+
+    An explicit ``?bitrate=<kbps>`` or ``?quality=low|normal|high|original``
+    wins. Otherwise the client hints ``Save-Data`` and ``ECT`` cap the
+    bitrate for constrained connections, and the highest rendition is used.
+    """
+    if not available:
+        return None
+    available = sorted(available)
+
+    bitrate = request.GET.get('bitrate')
+    if bitrate and bitrate.isdigit():
+        # Rendition lớn nhất không vượt quá bitrate yêu cầu
+        fitting = [b for b in available if b <= int(bitrate)]
+        return fitting[-1] if fitting else available[0]
+
+    quality = request.GET.get('quality')
+    if quality == 'original':
+        return None
+    if quality in QUALITY_LEVELS:
+        index = QUALITY_LEVELS.index(quality) * (len(available) - 1) // (len(QUALITY_LEVELS) - 1)
+        return available[index]
+
+    if request.headers.get('Save-Data', '').lower() == 'on':
+        return available[0]
+    max_bitrate = ECT_MAX_BITRATE.get(request.headers.get('ECT', '').lower())
+    if max_bitrate:
+        fitting = [b for b in available if b <= max_bitrate]
+        return fitting[-1] if fitting else available[0]
+    return available[-1]
+
+
+def audio_file_path(song_id, audio_name, bitrate):
+    """ (đường dẫn, content type) của file gốc (bitrate None) hoặc một rendition; không cần đọc DB """
+    if bitrate is None:
+        path = default_storage.path(audio_name)
+        return path, mimetypes.guess_type(path)[0] or 'audio/mpeg'
+    return os.path.join(settings.MEDIA_ROOT, rendition_name(song_id, bitrate)), RENDITION_CONTENT_TYPE
+
+
+def audio_source(request, song):
+    """ Trả về (đường dẫn file, content type, bitrate) sẽ được stream cho request """
+    bitrate = select_bitrate(request, song.renditions)
+    path, content_type = audio_file_path(song.id, song.audio_file.name, bitrate)
+    return path, content_type, bitrate
+
+
+def add_rendition_headers(response, bitrate):
+    # Xin trình duyệt gửi client hints ở các request sau, và cache theo chúng
+    response['Accept-CH'] = 'Save-Data, ECT'
+    patch_vary_headers(response, ('Save-Data', 'ECT'))
+    response['X-Audio-Bitrate'] = str(bitrate) if bitrate else 'original'
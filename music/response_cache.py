@@ -0,0 +1,274 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+# Header của response gốc được lưu cùng body để trả lại y hệt khi cache hit
+STORED_HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag', 'Cache-Control')
+
+
+class ResponseCacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def record(self, field, amount=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class LocMemResponseCache:
+    """
+    Per-process LRU of rendered response bodies bounded by ``max_bytes``.
+    Versions live in the same process: a bump from another worker or from a
+    management command never reaches it, only the ``ttl`` does. Meant for a
+    single process (runserver, tests); use FileResponseCache otherwise.
+    """
+
+    def __init__(self, max_bytes, ttl=300, **options):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()   # key -> (headers, body, hết hạn lúc)
+        self.versions = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = ResponseCacheStats()
+
+    def get_version(self, namespace):
+        return self.versions.get(namespace, '0')
+
+    def bump_version(self, namespace):
+        self.versions[namespace] = str(time.time_ns())
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                del self.entries[key]
+                self.size -= len(entry[1])
+                self.stats.record('expired')
+                return None
+            self.entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, headers, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[key] = (headers, body, time.time() + self.ttl)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.stats.record('evictions')
+
+    def info(self):
+        return {'backend': 'locmem', 'entries': len(self.entries), 'bytes': self.size,
+                'max_bytes': self.max_bytes, 'ttl': self.ttl}
+
+
+class FileResponseCache:
+    """
+    Response cache on the local filesystem, shared by every worker on the
+    host. Recency is the file mtime (touched on each hit) and the oldest
+    entries are removed once the directory exceeds ``max_bytes``. Versions
+    are small files replaced atomically, so a bump in one worker or in a
+    management command (import_songs, watch_media, ...) is seen by all of
+    them on their next request. Entries also expire after ``ttl`` seconds,
+    which bounds staleness for writes that bump nothing (other hosts,
+    ``QuerySet.update`` outside the app).
+    """
+
+    def __init__(self, max_bytes, location, ttl=300, **options):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries_dir = os.path.join(location, 'entries')
+        self.versions_dir = os.path.join(location, 'versions')
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.versions_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.stats = ResponseCacheStats()
+        # Ước lượng dung lượng trong process; chỉ quét thư mục khi vượt ngân sách
+        self.approx_size = self.info()['bytes']
+
+    def _entry_path(self, key):
+        return os.path.join(self.entries_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def _write_atomic(self, path, data):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_version(self, namespace):
+        try:
+            with open(os.path.join(self.versions_dir, namespace), 'rb') as f:
+                return f.read().decode()
+        except FileNotFoundError:
+            return '0'
+
+    def bump_version(self, namespace):
+        self._write_atomic(os.path.join(self.versions_dir, namespace), str(time.time_ns()).encode())
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                headers, body, expires_at = pickle.load(f)
+            if expires_at <= time.time():
+                os.remove(path)
+                self.stats.record('expired')
+                return None
+            os.utime(path)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        return headers, body
+
+    def set(self, key, headers, body):
+        if len(body) > self.max_bytes:
+            return
+        data = pickle.dumps((headers, body, time.time() + self.ttl))
+        self._write_atomic(self._entry_path(key), data)
+        with self.lock:
+            self.approx_size += len(data)
+            over_budget = self.approx_size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        with self.lock:
+            files = []
+            for entry in os.scandir(self.entries_dir):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+            size = sum(item[1] for item in files)
+            files.sort()
+            for _, file_size, path in files:
+                if size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                size -= file_size
+                self.stats.record('evictions')
+            self.approx_size = size
+
+    def info(self):
+        entries = [entry.stat().st_size for entry in os.scandir(self.entries_dir) if not entry.name.endswith('.tmp')]
+        return {'backend': 'file', 'entries': len(entries), 'bytes': sum(entries),
+                'max_bytes': self.max_bytes, 'ttl': self.ttl}
+
+
+BACKENDS = {
+    'locmem': LocMemResponseCache,
+    'file': FileResponseCache,
+}
+
+
+def create_response_cache():
+    backend = getattr(settings, 'RESPONSE_CACHE_BACKEND', 'file')
+    return BACKENDS[backend](
+        max_bytes=getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        ttl=getattr(settings, 'RESPONSE_CACHE_TTL', 300),
+        location=getattr(settings, 'RESPONSE_CACHE_DIR', os.path.join(settings.BASE_DIR, '.response_cache')),
+    )
+
+
+response_cache = create_response_cache()
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    # override_settings(RESPONSE_CACHE_BACKEND='locmem') trong test: mỗi lần bật/tắt là một cache mới, rỗng
+    global response_cache
+    if setting.startswith('RESPONSE_CACHE_'):
+        response_cache = create_response_cache()
+
+
+def bump_versions(*namespaces):
+    for namespace in namespaces:
+        response_cache.bump_version(namespace)
+
+
+def namespace_versions(namespaces):
+    """ Chuỗi 'ns=version' của từng namespace, dùng cho key cache và ETag """
+    return [f'{ns}={response_cache.get_version(ns)}' for ns in namespaces]
+
+
+def cache_stats():
+    return dict(response_cache.info(), **response_cache.stats.as_dict())
+
+
+def cache_response(*namespaces):
+    """
+    Cache the rendered body of a public GET endpoint. The key combines the
+    current version of every namespace the data depends on ('song', 'album',
+    'video', 'listens' for listen counts, ...) with the full path and Accept header, so bumping a
+    namespace makes old entries unreachable without deleting anything; LRU
+    eviction reclaims them later.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+
+            versions = ':'.join(namespace_versions(namespaces))
+            key = f"{versions}|{request.build_absolute_uri()}|{request.META.get('HTTP_ACCEPT', '')}"
+            entry = response_cache.get(key)
+            if entry is not None:
+                from .conditional import etag_matches, not_modified
+
+                response_cache.stats.record('hits')
+                headers, body = entry
+                if 'ETag' in headers and etag_matches(request, headers['ETag']):
+                    return not_modified(headers['ETag'], headers.get('Cache-Control', 'no-cache'))
+                response = HttpResponse(body)
+                for name, value in headers.items():
+                    response[name] = value
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response_cache.stats.record('misses')
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+            if response.status_code == 200 and not response.streaming:
+                headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+                response_cache.set(key, headers, response.content)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,127 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Album, Song
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Ngưỡng similarity để coi một từ gõ sai là khớp
+TYPO_SIMILARITY = 0.75
+
+
+def normalize_text(value):
+    """
+    Lower-case and strip diacritics so "Cuộc Gọi Cuối" matches "cuoc goi cuoi".
+    'đ' has no decomposition in Unicode and is mapped by hand.
+    """
+    value = (value or '').lower().replace('đ', 'd')
+    value = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in value if not unicodedata.combining(c))
+
+
+def song_search_text(title, artist, album_name):
+    return normalize_text(' '.join(filter(None, [title, artist, album_name])))
+
+
+def album_search_text(name, artist):
+    return normalize_text(' '.join(filter(None, [name, artist])))
+
+
+class PostgresSearchBackend:
+    """
+    Full-text + trigram search on PostgreSQL.
+
+    ``search_text`` holds the accent-folded title/artist/album, and migration
+    0007 indexes it twice: a GIN index on ``to_tsvector('simple', ...)`` for
+    prefix full-text matches and a ``gin_trgm_ops`` index for typo-tolerant
+    trigram matches. Both predicates are index-backed, so latency does not
+    grow with the catalog the way the old ``icontains`` scans did.
+    """
+
+    def search(self, query, limit=10):
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+        )
+
+        normalized = normalize_text(query)
+        tokens = TOKEN_RE.findall(normalized)
+        if not tokens:
+            return [], []
+        # Prefix match từng từ để gõ dở vẫn ra kết quả
+        ts_query = SearchQuery(' & '.join(f'{token}:*' for token in tokens), config='simple', search_type='raw')
+
+        def ranked(queryset, order_extra=()):
+            document = SearchVector('search_text', config='simple')
+            return (
+                queryset
+                .annotate(
+                    document=document,
+                    rank=SearchRank(document, ts_query),
+                    similarity=TrigramWordSimilarity(normalized, 'search_text'),
+                )
+                .filter(Q(document=ts_query) | Q(search_text__trigram_word_similar=normalized))
+                .order_by('-rank', '-similarity', *order_extra)[:limit]
+            )
+
+        songs = ranked(Song.objects.all(), ('-listen_count',))
+        albums = ranked(Album.objects.all())
+        return list(songs), list(albums)
+
+
+class PythonSearchBackend:
+    """
+    Pure-Python equivalent of PostgresSearchBackend for SQLite and tests:
+    same accent folding, prefix matching and typo tolerance, ranked in
+    memory. It scans the whole table, so it is not meant for production.
+    """
+
+    def score(self, tokens, text):
+        words = text.split()
+        total = 0.0
+        for token in tokens:
+            best = 0.0
+            for word in words:
+                if word.startswith(token):
+                    best = 1.0
+                    break
+                if token in word:
+                    best = max(best, 0.8)
+                else:
+                    ratio = SequenceMatcher(None, token, word).ratio()
+                    if ratio >= TYPO_SIMILARITY:
+                        best = max(best, ratio * 0.7)
+            if not best:
+                return 0.0
+            total += best
+        return total / len(tokens)
+
+    def search(self, query, limit=10):
+        tokens = TOKEN_RE.findall(normalize_text(query))
+        if not tokens:
+            return [], []
+
+        def ranked(queryset, popularity=lambda obj: 0):
+            scored = [(self.score(tokens, obj.search_text), obj) for obj in queryset]
+            scored = [item for item in scored if item[0] > 0]
+            scored.sort(key=lambda item: (item[0], popularity(item[1])), reverse=True)
+            return [obj for _, obj in scored[:limit]]
+
+        songs = ranked(Song.objects.all(), popularity=lambda song: song.listen_count)
+        albums = ranked(Album.objects.all())
+        return songs, albums
+
+
+def get_search_backend():
+    """ SEARCH_BACKEND trong settings, mặc định chọn theo loại database """
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return PythonSearchBackend()
@@ -1,16 +1,28 @@
 from rest_framework import serializers
-from .models import Album, Song
+from .models import Album, Artist, Song
 from .models import Playlist, FavoriteSong, PlaylistSong, Video
 from django.conf import settings
+from django.urls import reverse
+from .hls import MASTER_PLAYLIST
+from .cover_store import image_srcset
+from .durations import format_duration
+from .media_urls import media_url
 
 
 
+class ArtistSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Artist
+        fields = ['id', 'name', 'created_at']
+
+
 class AlbumSerializer(serializers.ModelSerializer):
     cover_image = serializers.SerializerMethodField()
 
     class Meta:
         model = Album
-        fields = '__all__'
+        # search_text chỉ phục vụ tìm kiếm, không trả về client
+        exclude = ['search_text']
 
     def get_cover_image(self, obj):
         request = self.context.get("request")
@@ -18,30 +30,48 @@ class AlbumSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.cover_image.url)
         return None    
     cover_image = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
     def get_cover_image(self, obj):
         if obj.cover_image:
-            return f"http://127.0.0.1:8000{settings.MEDIA_URL}{obj.cover_image}"
+            return media_url(obj.cover_image)
         return None
+    def get_cover_srcset(self, obj):
+        # {MIME: srcset} cho <picture>, gồm các bản 64/160/320px WebP/AVIF nếu đã build
+        return image_srcset(obj.cover_image.name, media_url) if obj.cover_image else None
     class Meta:
         model = Album
-        fields = '__all__'
+        # search_text chỉ phục vụ tìm kiếm, không trả về client
+        exclude = ['search_text']
 
 class SongSerializer(serializers.ModelSerializer):
     cover_image = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
+    # Chuỗi "m:ss" cho giao diện; số liệu gốc nằm ở duration_ms
+    duration = serializers.SerializerMethodField()
 
     class Meta:
         model = Song
-        fields = '__all__'
+        exclude = ['search_text']
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # /media/ không phục vụ file nhạc: trả URL của view stream (URL đã ký lấy qua /stream-urls/).
+        # audio_file vẫn ghi được khi upload
+        data['audio_file'] = f"{settings.SITE_URL}{reverse('stream_audio', args=[obj.id])}"
+        return data
     def get_cover_image(self, obj):
         if obj.cover_image:
-            return f"http://127.0.0.1:8000{settings.MEDIA_URL}{obj.cover_image}"
+            return media_url(obj.cover_image)
         return None
+    def get_cover_srcset(self, obj):
+        return image_srcset(obj.cover_image.name, media_url) if obj.cover_image else None
+    def get_duration(self, obj):
+        return format_duration(obj.duration_ms)
 
 
 class PlaylistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Playlist
-        fields = ['id', 'name', 'user', 'created_at']
+        fields = ['id', 'name', 'user', 'track_count', 'total_duration_ms', 'created_at']
 
 
 class PlaylistSongSerializer(serializers.ModelSerializer):
@@ -57,10 +87,26 @@ class FavoriteSongSerializer(serializers.ModelSerializer):
 class VideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Video
-        fields = ['id', 'title', 'video_file', 'duration', 'thumbnail' , 'created_at']
+        fields = ['id', 'title', 'video_file', 'duration', 'duration_ms', 'thumbnail', 'thumbnail_srcset', 'hls_url', 'created_at']
         
     thumbnail = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
+    hls_url = serializers.SerializerMethodField()
+    duration = serializers.SerializerMethodField()
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # Như SongSerializer: video chỉ đi qua view stream
+        data['video_file'] = f"{settings.SITE_URL}{reverse('stream_video', args=[obj.id])}"
+        return data
+    def get_duration(self, obj):
+        return format_duration(obj.duration_ms)
     def get_thumbnail(self, obj):
         if obj.thumbnail:
-            return f"http://127.0.0.1:8000{settings.MEDIA_URL}{obj.thumbnail}"
+            return media_url(obj.thumbnail)
+        return None
+    def get_thumbnail_srcset(self, obj):
+        return image_srcset(obj.thumbnail.name, media_url) if obj.thumbnail else None
+    def get_hls_url(self, obj):
+        if obj.hls_playlist:
+            return f"{settings.SITE_URL}{reverse('video_hls', args=[obj.id, MASTER_PLAYLIST])}"
         return None
@@ -0,0 +1,186 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .artists import resolve_artist
+from .durations import add_to_albums, add_to_playlist, bump_playlist_version, playlist_totals_deferred, shift_song_duration
+from .leaderboards import on_listen_counts_flushed
+from .listen_counter import listen_counts_flushed
+from .models import Album, Artist, Playlist, PlaylistSong, Song, Video
+from .response_cache import bump_versions
+from .search import album_search_text, song_search_text
+from .typeahead import typeahead_index
+
+
+def derived_field_changed(instance, update_fields, field):
+    """
+    Ghi nhận field vừa được tính lại trong pre_save. save(update_fields=...)
+    chỉ ghi các field được liệt kê nên field thiếu trong đó sẽ được
+    save_derived_fields ghi bù ở post_save.
+    """
+    if update_fields is not None and not {field, instance._meta.get_field(field).attname} & update_fields:
+        instance.__dict__.setdefault('_unsaved_derived_fields', set()).add(field)
+
+
+@receiver(pre_save, sender=Song)
+@receiver(pre_save, sender=Album)
+def link_primary_artist(sender, instance, update_fields=None, **kwargs):
+    """ Gắn (hoặc tạo) Artist theo chuỗi tên nghệ sĩ mỗi khi tên có thể đã đổi """
+    if update_fields is not None and 'artist' not in update_fields:
+        return
+    instance.primary_artist = resolve_artist(instance.artist)
+    derived_field_changed(instance, update_fields, 'primary_artist')
+
+
+@receiver(pre_save, sender=Song)
+def update_song_search_text(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=['renditions'], ...) không đổi nội dung tìm kiếm: khỏi query album
+    if update_fields is not None and not {'title', 'artist', 'album', 'album_id'} & set(update_fields):
+        return
+    album_name = instance.album.name if instance.album_id else ''
+    instance.search_text = song_search_text(instance.title, instance.artist, album_name)
+    derived_field_changed(instance, update_fields, 'search_text')
+
+
+@receiver(pre_save, sender=Album)
+def update_album_search_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'artist'} & set(update_fields):
+        return
+    instance.search_text = album_search_text(instance.name, instance.artist)
+    derived_field_changed(instance, update_fields, 'search_text')
+
+
+@receiver(post_save, sender=Song)
+@receiver(post_save, sender=Album)
+def save_derived_fields(sender, instance, **kwargs):
+    fields = instance.__dict__.pop('_unsaved_derived_fields', None)
+    if fields:
+        sender.objects.filter(pk=instance.pk).update(**{field: getattr(instance, field) for field in fields})
+
+
+@receiver(post_save, sender=Album)
+def update_album_songs_search_text(sender, instance, created, **kwargs):
+    """ Đổi tên album thì cập nhật lại search_text của các bài hát trong album """
+    if created:
+        return
+    songs = list(instance.songs.only('id', 'title', 'artist'))
+    for song in songs:
+        song.search_text = song_search_text(song.title, song.artist, instance.name)
+    Song.objects.bulk_update(songs, ['search_text'], batch_size=500)
+
+
+@receiver(post_save, sender=Song)
+def update_song_typeahead(sender, instance, **kwargs):
+    typeahead_index.update_song(instance)
+
+
+@receiver(post_delete, sender=Song)
+def remove_song_typeahead(sender, instance, **kwargs):
+    typeahead_index.remove_song(instance.id)
+
+
+@receiver(post_save, sender=Album)
+def update_album_typeahead(sender, instance, **kwargs):
+    typeahead_index.update_album(instance)
+
+
+@receiver(post_delete, sender=Album)
+def remove_album_typeahead(sender, instance, **kwargs):
+    typeahead_index.remove_album(instance.id)
+
+
+@receiver(listen_counts_flushed)
+def add_listens_typeahead(sender, counts, **kwargs):
+    typeahead_index.add_listens(counts)
+
+
+@receiver(listen_counts_flushed)
+def bump_listens_cache(sender, **kwargs):
+    # Namespace riêng cho listen_count: flush chạy vài giây một lần, nếu bump 'song' thì mọi
+    # response/ETag phụ thuộc catalog đều mất. song_list chấp nhận listen_count cũ tối đa RESPONSE_CACHE_TTL
+    bump_versions('listens')
+
+
+def deleted_with(origin, model):
+    """ Đối tượng đang bị xoá dây chuyền (CASCADE) từ một instance/queryset của ``model`` """
+    return getattr(origin, 'model', type(origin)) is model
+
+
+@receiver(pre_save, sender=Song)
+def remember_song_totals(sender, instance, update_fields=None, **kwargs):
+    """ Giữ album/thời lượng cũ để post_save chỉ cộng phần chênh lệch vào tổng """
+    instance._previous_totals = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'album', 'album_id', 'duration_ms'} & set(update_fields):
+        return
+    instance._previous_totals = Song.objects.filter(pk=instance.pk).values_list('album_id', 'duration_ms').first()
+
+
+@receiver(post_save, sender=Song)
+def update_song_totals(sender, instance, created, **kwargs):
+    if created:
+        add_to_albums({instance.album_id: (1, instance.duration_ms)})
+        return
+    previous = getattr(instance, '_previous_totals', None)
+    if previous is None:
+        return
+    old_album_id, old_duration = previous
+    deltas = {old_album_id: (-1, -old_duration)}
+    tracks, duration = deltas.get(instance.album_id, (0, 0))
+    deltas[instance.album_id] = (tracks + 1, duration + instance.duration_ms)
+    add_to_albums(deltas)
+    shift_song_duration(instance.pk, instance.duration_ms - old_duration)
+
+
+@receiver(post_delete, sender=Song)
+def remove_song_totals(sender, instance, origin=None, **kwargs):
+    # Xoá cả album thì không cần sửa tổng của album đó
+    if not deleted_with(origin, Album):
+        add_to_albums({instance.album_id: (-1, -instance.duration_ms)})
+
+
+@receiver(post_save, sender=PlaylistSong)
+def add_playlist_totals(sender, instance, created, **kwargs):
+    if created:
+        add_to_playlist(instance.playlist_id, [instance.song_id])
+    else:
+        # Sửa order (admin, ...): tổng giữ nguyên nhưng ETag của playlist phải đổi
+        bump_playlist_version(instance.playlist_id)
+
+
+@receiver(post_delete, sender=PlaylistSong)
+def remove_playlist_totals(sender, instance, origin=None, **kwargs):
+    # Bài hát bị xoá vẫn còn trong DB lúc này (CASCADE xoá PlaylistSong trước Song)
+    if not deleted_with(origin, Playlist) and not playlist_totals_deferred.get():
+        add_to_playlist(instance.playlist_id, [instance.song_id], sign=-1)
+
+
+@receiver(post_save, sender=Song)
+@receiver(post_delete, sender=Song)
+def bump_song_cache_version(sender, **kwargs):
+    # Đợi commit xong mới bump để request khác không cache lại dữ liệu cũ dưới version mới
+    transaction.on_commit(lambda: bump_versions('song'))
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+def bump_album_cache_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_versions('album'))
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Artist)
+def bump_artist_cache_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_versions('artist'))
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def bump_video_cache_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_versions('video'))
+
+
+@receiver(listen_counts_flushed)
+def update_play_buckets(sender, counts, **kwargs):
+    on_listen_counts_flushed(counts)
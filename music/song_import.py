@@ -0,0 +1,257 @@
+import json
+import os
+
+from django.conf import settings
+from django.db import transaction
+from mutagen.flac import FLAC
+from mutagen.id3 import APIC, ID3
+from mutagen.mp3 import MP3
+from mutagen.wave import WAVE
+
+from .artists import resolve_artists
+from .cover_store import store_cover
+from .durations import add_to_albums
+from .models import Album, Song
+from .renditions import RenditionError, build_audio_renditions
+from .response_cache import bump_versions
+from .search import album_search_text, song_search_text
+
+# Đường dẫn thư mục chứa file nhạc
+MEDIA_PATH = os.path.join(settings.MEDIA_ROOT, "songs")
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.wav')
+
+
+# ------------------------------------------------------------------------
+# Đọc file: chạy trong process pool nên chỉ dùng hàm cấp module, không đụng DB
+
+def read_song_file(file_path):
+    """
+    Parse tags and write the resized cover for one audio file. Runs in a
+    worker process, so it only touches the filesystem and returns a plain
+    dict; failures come back as ``{'error': ...}`` instead of raising.
+    """
+    filename = os.path.basename(file_path)
+    try:
+        metadata = get_song_metadata(file_path, filename)
+    except Exception as e:
+        return {'path': file_path, 'filename': filename, 'error': str(e)}
+    metadata['path'] = file_path
+    metadata['filename'] = filename
+    return metadata
+
+
+def get_song_metadata(file_path, filename):
+    """ Trích xuất metadata từ file nhạc và lưu cover image nếu có """
+    metadata = {
+        'title': os.path.basename(file_path).rsplit('.', 1)[0],  # Lấy tên file nếu không có metadata
+        'artist': 'Unknown Artist',
+        'album': 'Unknown Album',
+        'duration_ms': 0,  # Thời lượng mặc định (ms)
+        'image': None,
+        'bitrate': None
+    }
+
+    if file_path.endswith('.mp3'):
+        audio = MP3(file_path, ID3=ID3)
+        if audio.tags:
+            metadata['title'] = get_id3_tag(audio, 'TIT2') or metadata['title']
+            metadata['artist'] = get_id3_tag(audio, 'TPE1') or 'Unknown Artist'
+            metadata['album'] = get_id3_tag(audio, 'TALB') or 'Unknown Album'
+        metadata['duration_ms'] = get_audio_duration(audio.info.length)
+        metadata['image'] = extract_cover_image(audio)
+        metadata['bitrate'] = audio.info.bitrate
+
+    elif file_path.endswith('.flac'):
+        audio = FLAC(file_path)
+        metadata['title'] = audio.get('title', [metadata['title']])[0]
+        metadata['artist'] = audio.get('artist', ['Unknown Artist'])[0]
+        metadata['album'] = audio.get('album', ['Unknown Album'])[0]
+        metadata['duration_ms'] = get_audio_duration(audio.info.length)
+        metadata['image'] = extract_cover_image(audio)
+        metadata['bitrate'] = audio.info.bitrate
+
+    elif file_path.endswith('.wav'):
+        audio = WAVE(file_path)
+        metadata['duration_ms'] = get_audio_duration(audio.info.length)
+        metadata['bitrate'] = audio.info.bitrate
+
+    return metadata
+
+
+def get_id3_tag(audio, tag_name):
+    """ Lấy thông tin từ ID3 tag nếu có """
+    return audio.tags.get(tag_name).text[0] if tag_name in audio.tags else None
+
+
+def get_audio_duration(length):
+    """ Chuyển đổi thời lượng (giây, số thực) thành mili giây """
+    return max(0, round(length * 1000))
+
+
+def extract_cover_image(audio):
+    """ Lưu ảnh bìa nhúng trong file vào kho cover dùng chung (music.cover_store) """
+    if isinstance(audio, MP3) and audio.tags:
+        pictures = [tag.data for tag in audio.tags.values() if isinstance(tag, APIC)]
+    elif isinstance(audio, FLAC):
+        pictures = [picture.data for picture in audio.pictures]
+    else:
+        pictures = []
+
+    if not pictures:
+        return None  # Không tìm thấy ảnh
+    return store_cover(pictures[0])  # Trả về đường dẫn để lưu vào database
+
+
+# ------------------------------------------------------------------------
+# Manifest: bỏ qua file không đổi (cùng size + mtime) ở các lần chạy sau
+
+def manifest_path(name):
+    directory = getattr(settings, 'IMPORT_MANIFEST_DIR', os.path.join(settings.BASE_DIR, '.import_manifest'))
+    return os.path.join(directory, f'{name}.json')
+
+
+class ImportManifest:
+    """ {tên file: [size, mtime_ns]} của các file đã import xong, lưu dạng JSON """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def signature(stat):
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def is_unchanged(self, name, stat):
+        return self.entries.get(name) == self.signature(stat)
+
+    def record(self, name, stat):
+        self.entries[name] = self.signature(stat)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def scan_song_files(manifest=None):
+    """ [(path, stat)] các file nhạc cần xử lý; bỏ qua file trong manifest chưa đổi """
+    files = []
+    for entry in os.scandir(MEDIA_PATH):
+        if not entry.is_file() or not entry.name.endswith(AUDIO_EXTENSIONS):
+            continue
+        stat = entry.stat()
+        if manifest is not None and manifest.is_unchanged(entry.name, stat):
+            continue
+        files.append((entry.path, stat))
+    return sorted(files)
+
+
+# ------------------------------------------------------------------------
+# Ghi DB theo lô
+
+def write_song_batch(items, uploaded_by):
+    """
+    Insert one batch of parsed files (results of read_song_file) with a
+    constant number of queries: one lookup for existing songs, up to three
+    for artists, one for albums, bulk_create for new albums and songs,
+    bulk_update for album covers and one UPDATE for album totals.
+    bulk_create skips model signals, so search_text, artists and the album
+    totals are filled here and the response cache versions are bumped
+    after commit.
+
+    Returns ``(created songs, skipped metadata)``.
+    """
+    titles = {item['title'] for item in items}
+    with transaction.atomic():
+        existing = set(
+            Song.objects.filter(title__in=titles).values_list('title', 'artist')
+        )
+
+        new_items, skipped, seen = [], [], set()
+        for item in items:
+            key = (item['title'], item['artist'])
+            if key in existing or key in seen:
+                skipped.append(item)
+                continue
+            seen.add(key)
+            new_items.append(item)
+        if not new_items:
+            return [], skipped
+
+        artists = resolve_artists({item['artist'] for item in new_items})
+        albums = {}
+        for album in Album.objects.filter(name__in={item['album'] for item in new_items}).order_by('id'):
+            albums.setdefault(album.name, album)
+        missing = []
+        for item in new_items:
+            if item['album'] not in albums:
+                album = Album(name=item['album'], artist=item['artist'], primary_artist=artists.get(item['artist']),
+                              search_text=album_search_text(item['album'], item['artist']))
+                albums[item['album']] = album
+                missing.append(album)
+        Album.objects.bulk_create(missing)
+
+        # Album chưa có cover thì dùng chung file cover của bài đầu tiên có ảnh
+        covered = []
+        for item in new_items:
+            album = albums[item['album']]
+            if item['image'] and not album.cover_image:
+                album.cover_image = item['image']
+                covered.append(album)
+        Album.objects.bulk_update(covered, ['cover_image'])
+
+        songs = Song.objects.bulk_create([
+            Song(
+                title=item['title'],
+                artist=item['artist'],
+                primary_artist=artists.get(item['artist']),
+                album=albums[item['album']],
+                audio_file=f"songs/{item['filename']}",
+                duration_ms=item['duration_ms'],
+                uploaded_by=uploaded_by,
+                cover_image=item['image'] or albums[item['album']].cover_image,  # Nếu bài hát không có cover thì dùng album's cover
+                search_text=song_search_text(item['title'], item['artist'], item['album']),
+            )
+            for item in new_items
+        ])
+
+        # bulk_create không gửi signal: cộng số bài / thời lượng vào album trong một UPDATE
+        deltas = {}
+        for song in songs:
+            tracks, duration = deltas.get(song.album_id, (0, 0))
+            deltas[song.album_id] = (tracks + 1, duration + song.duration_ms)
+        add_to_albums(deltas)
+        transaction.on_commit(lambda: bump_versions('song', 'album', 'artist'))
+    return songs, skipped
+
+
+
+def import_song_file(file_path, uploaded_by, manifest=None, transcode=False):
+    """
+    Import một file trong process hiện tại (dùng cho watch_media). Trả về
+    (song hoặc None nếu đã tồn tại, thông báo lỗi hoặc None).
+    """
+    metadata = read_song_file(file_path)
+    if 'error' in metadata:
+        return None, metadata['error']
+
+    songs, _ = write_song_batch([metadata], uploaded_by)
+    error = None
+    if songs and transcode:
+        song = songs[0]
+        try:
+            song.renditions = build_audio_renditions(file_path, song.id, metadata['bitrate'])
+            song.save(update_fields=['renditions'])
+        except RenditionError as e:
+            error = str(e)
+
+    if manifest is not None:
+        manifest.record(metadata['filename'], os.stat(file_path))
+        manifest.save()
+    return (songs[0] if songs else None), error
@@ -0,0 +1,78 @@
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+from .hls import MASTER_PLAYLIST
+
+SALT = 'music.stream_signing'
+
+# kind -> tên URL của view stream tương ứng
+STREAM_URL_NAMES = {'song': 'stream_audio', 'video': 'stream_video'}
+
+
+class StreamSignatureError(Exception):
+    pass
+
+
+def stream_url_ttl():
+    return getattr(settings, 'STREAM_URL_TTL', 3600)
+
+
+def sign_stream(kind, object_id, user_id, file_name, rendition=None, ttl=None):
+    """
+    Signed token for streaming one file: ``kind`` ('song' or 'video') and id,
+    the user it was issued to, the rendition (bitrate in kbps, None for the
+    original) and an expiry. The media file name is carried in the token so
+    the streaming view can locate the file without reading the row.
+    """
+    payload = {
+        'k': kind,
+        'id': object_id,
+        'u': user_id,
+        'r': rendition,
+        'f': file_name,
+        'e': int(time.time()) + (stream_url_ttl() if ttl is None else ttl),
+    }
+    return signing.dumps(payload, salt=SALT, compress=True)
+
+
+def signed_stream_url(kind, object_id, user_id, file_name, rendition=None, ttl=None):
+    token = sign_stream(kind, object_id, user_id, file_name, rendition, ttl)
+    path = reverse(STREAM_URL_NAMES[kind], args=[object_id])
+    return f"{settings.SITE_URL}{path}?{urlencode({'sig': token})}"
+
+
+def signed_hls_url(video_id, user_id, ttl=None):
+    """
+    Signed master playlist URL of a video. The token covers the video's
+    whole HLS directory: video_hls appends it to every URI of the playlists
+    it serves, so rendition playlists and segments are signed too.
+    """
+    token = sign_stream('hls', video_id, user_id, MASTER_PLAYLIST, ttl=ttl)
+    path = reverse('video_hls', args=[video_id, MASTER_PLAYLIST])
+    return f"{settings.SITE_URL}{path}?{urlencode({'sig': token})}"
+
+
+def verify_stream(request, kind, object_id):
+    """
+    Check ``?sig=`` of a stream request: pure HMAC, no DB query. Returns the
+    payload, or None when the URL is unsigned and STREAM_SIGNED_URLS_REQUIRED
+    is off; raises StreamSignatureError otherwise.
+    """
+    token = request.GET.get('sig')
+    if not token:
+        if getattr(settings, 'STREAM_SIGNED_URLS_REQUIRED', False):
+            raise StreamSignatureError("Stream URL chưa được ký")
+        return None
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise StreamSignatureError("Chữ ký stream URL không hợp lệ")
+    if payload.get('k') != kind or payload.get('id') != int(object_id):
+        raise StreamSignatureError("Stream URL không dành cho file này")
+    if payload.get('e', 0) < time.time():
+        raise StreamSignatureError("Stream URL đã hết hạn")
+    return payload
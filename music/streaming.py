@@ -0,0 +1,334 @@
+import asyncio
+import mimetypes
+import os
+import re
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Giới hạn số đoạn trong một request multi-range để tránh bị lạm dụng
+MAX_RANGES = 16
+# Range bắt đầu từ 0 nhưng nhỏ hơn ngưỡng này là request dò (Safari gửi bytes=0-1), không tính lượt nghe
+PROBE_RANGE_BYTES = 1024
+
+RANGE_SPEC_RE = re.compile(r'^(\d*)-(\d*)$')
+
+
+class RangedFile:
+    """
+    File-like wrapper that exposes only ``length`` bytes starting at ``start``.
+
+    It keeps ``fileno()`` so WSGI servers with ``wsgi.file_wrapper`` (gunicorn,
+    uWSGI) can hand the range to ``sendfile()``: the underlying descriptor is
+    already positioned at ``start`` and the server bounds the copy by
+    ``Content-Length``.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    """ ETag mạnh dựa trên mtime và kích thước file """
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range: bytes=...`` header into a list of inclusive (start, end)
+    pairs. Returns None when the header is absent or malformed (the full file
+    should be served) and an empty list when no range is satisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        match = RANGE_SPEC_RE.match(part.strip())
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+            end = min(int(last), size - 1) if last else size - 1
+        ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def if_range_passes(request, etag, mtime):
+    """ Kiểm tra If-Range: chỉ áp dụng Range nếu bản trên server chưa thay đổi """
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and if_range_date == int(mtime)
+
+
+def is_new_playback(request):
+    """
+    A play starts with a GET for the whole file or a range starting at byte 0.
+    Seeks and cache revalidations are continuations of a playback already
+    counted, and so are tiny probes such as Safari's ``bytes=0-1`` sent
+    before the real request. Only the request is inspected, so this works
+    the same whether Django or the front proxy ends up sending the bytes.
+    """
+    if request.method != 'GET':
+        return False
+    if 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META:
+        return False
+    range_header = request.META.get('HTTP_RANGE', '').replace(' ', '')
+    if not range_header:
+        return True
+    if not range_header.startswith('bytes=0-'):
+        return False
+    end = range_header[len('bytes=0-'):].split(',')[0]
+    # Range mở (bytes=0-) hoặc đủ lớn mới là lượt phát thật
+    return not end.isdigit() or int(end) + 1 >= PROBE_RANGE_BYTES
+
+
+def multipart_byteranges(path, ranges, size, content_type, boundary):
+    """ Sinh nội dung multipart/byteranges, đọc từng chunk từ file """
+    with open(path, 'rb') as f:
+        for start, end in ranges:
+            yield multipart_part_header(boundary, content_type, start, end, size)
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def multipart_part_header(boundary, content_type, start, end, size):
+    return (
+        f'\r\n--{boundary}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+    ).encode()
+
+
+async def aread_file(path, parts, disconnected=None):
+    """
+    Async counterpart of the streaming generators for ASGI. ``parts`` is a
+    list of literal ``bytes`` and ``(start, length)`` file slices. Reads run
+    in a worker thread so the event loop never blocks on disk, and streaming
+    stops as soon as the client has gone away.
+    """
+    f = await asyncio.to_thread(open, path, 'rb')
+    try:
+        for part in parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            start, remaining = part
+            await asyncio.to_thread(f.seek, start)
+            while remaining > 0:
+                if disconnected is not None and disconnected.is_set():
+                    return
+                data = await asyncio.to_thread(f.read, min(STREAM_CHUNK_SIZE, remaining))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def serve_file(request, path, content_type=None, asynchronous=False):
+    """
+    Serve ``path`` honouring conditional requests (ETag / Last-Modified /
+    If-None-Match / If-Modified-Since / If-Range) and byte ranges, including
+    ``multipart/byteranges`` for multi-range requests.
+
+    Full and single-range responses are FileResponse objects so the WSGI
+    server can use its zero-copy sendfile path. With ``asynchronous=True``
+    the body is an async iterator instead, for async views under ASGI.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = file_etag(stat)
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        ranges = None
+        if if_range_passes(request, etag, stat.st_mtime):
+            ranges = parse_range_header(request.META.get('HTTP_RANGE', ''), size)
+
+        disconnected = getattr(request, 'scope', {}).get('client_disconnected')
+
+        if ranges is None:
+            if asynchronous:
+                response = StreamingHttpResponse(
+                    aread_file(path, [(0, size)], disconnected), content_type=content_type
+                )
+            else:
+                response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = str(size)
+        elif not ranges:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            length = end - start + 1
+            if asynchronous:
+                response = StreamingHttpResponse(
+                    aread_file(path, [(start, length)], disconnected),
+                    status=206,
+                    content_type=content_type,
+                )
+            else:
+                response = FileResponse(
+                    RangedFile(open(path, 'rb'), start, length),
+                    status=206,
+                    content_type=content_type,
+                )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            boundary = uuid.uuid4().hex
+            length = sum(
+                len(multipart_part_header(boundary, content_type, start, end, size)) + end - start + 1
+                for start, end in ranges
+            ) + len(f'\r\n--{boundary}--\r\n')
+            if asynchronous:
+                parts = []
+                for start, end in ranges:
+                    parts.append(multipart_part_header(boundary, content_type, start, end, size))
+                    parts.append((start, end - start + 1))
+                parts.append(f'\r\n--{boundary}--\r\n'.encode())
+                content = aread_file(path, parts, disconnected)
+            else:
+                content = multipart_byteranges(path, ranges, size, content_type, boundary)
+            response = StreamingHttpResponse(
+                content,
+                status=206,
+                content_type=f'multipart/byteranges; boundary={boundary}',
+            )
+            response['Content-Length'] = str(length)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def deliver_file(request, path, content_type=None, asynchronous=False):
+    """
+    Hand ``path`` to the configured delivery backend (MEDIA_DELIVERY_BACKEND):
+
+    - ``'django'``: serve it from this process with serve_file() (development)
+    - ``'nginx'``: reply with ``X-Accel-Redirect`` to an internal location
+      mapped to MEDIA_ROOT (MEDIA_ACCEL_REDIRECT_PREFIX)
+    - ``'sendfile'``: reply with ``X-Sendfile`` (Apache mod_xsendfile, lighttpd)
+
+    With the proxy backends the worker returns immediately and the proxy
+    handles ranges, conditional requests and the transfer itself.
+    """
+    backend = getattr(settings, 'MEDIA_DELIVERY_BACKEND', 'django')
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if backend == 'nginx':
+        relative_path = os.path.relpath(path, settings.MEDIA_ROOT)
+        if relative_path.startswith(os.pardir):
+            # File nằm ngoài MEDIA_ROOT thì nginx không map được, tự phục vụ
+            return serve_file(request, path, content_type, asynchronous)
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative_path.replace(os.sep, '/'))
+        return response
+
+    if backend == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.path.abspath(path)
+        return response
+
+    return serve_file(request, path, content_type, asynchronous)
+
+
+class ClientDisconnectMiddleware:
+    """
+    ASGI middleware that keeps listening for ``http.disconnect`` once the
+    request body has been read, and exposes it to views as the
+    ``client_disconnected`` event in the request scope. Django 4.2 stops
+    reading ``receive`` after the body, so without this a streaming response
+    would keep reading the file after the listener has left.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        disconnected = asyncio.Event()
+        scope = dict(scope, client_disconnected=disconnected)
+        watcher = None
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def receive_body():
+            nonlocal watcher
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+            elif not message.get('more_body') and watcher is None:
+                watcher = asyncio.ensure_future(watch_disconnect())
+            return message
+
+        try:
+            await self.app(scope, receive_body, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
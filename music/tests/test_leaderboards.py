@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..leaderboards import (
+    bucket_start, compute_entries, get_leaderboard, on_listen_counts_flushed, prune_buckets, record_plays,
+    refresh_leaderboard,
+)
+from ..models import Artist, Leaderboard, Song, SongPlayBucket
+
+
+class BucketStartTests(TestCase):
+    def test_truncates_to_hour_and_day(self):
+        moment = datetime(2024, 5, 17, 13, 45, 12, 500, tzinfo=dt_timezone.utc)
+        self.assertEqual(bucket_start(moment, SongPlayBucket.HOUR), datetime(2024, 5, 17, 13, tzinfo=dt_timezone.utc))
+        self.assertEqual(bucket_start(moment, SongPlayBucket.DAY), datetime(2024, 5, 17, tzinfo=dt_timezone.utc))
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='charts', password='charts-password')
+        cls.songs = [
+            Song.objects.create(title=f'Song {i}', artist='Solo' if i < 2 else 'Band',
+                                audio_file=f'songs/{i}.mp3', uploaded_by=user)
+            for i in range(4)
+        ]
+        cls.now = timezone.now()
+
+    def bucket(self, song, granularity, moment):
+        return SongPlayBucket.objects.get(song=song, granularity=granularity,
+                                          bucket_start=bucket_start(moment, granularity)).plays
+
+    def test_record_plays_adds_to_existing_buckets(self):
+        first, second = self.songs[:2]
+        record_plays({first.id: 2, second.id: 1}, self.now)
+        record_plays({first.id: 3}, self.now)
+        self.assertEqual(self.bucket(first, SongPlayBucket.HOUR, self.now), 5)
+        self.assertEqual(self.bucket(first, SongPlayBucket.DAY, self.now), 5)
+        self.assertEqual(self.bucket(second, SongPlayBucket.HOUR, self.now), 1)
+
+    def test_record_plays_ignores_deleted_songs(self):
+        record_plays({10 ** 9: 4}, self.now)
+        self.assertFalse(SongPlayBucket.objects.exists())
+
+    def test_windows_only_count_their_buckets(self):
+        first, second, third, _ = self.songs
+        record_plays({first.id: 1, second.id: 5}, self.now)
+        record_plays({first.id: 10, third.id: 2}, self.now - timedelta(days=3))
+
+        day = compute_entries('day', now=self.now)
+        week = compute_entries('week', now=self.now)
+        self.assertEqual(day, [[second.id, 5], [first.id, 1]])
+        self.assertEqual(week, [[first.id, 11], [second.id, 5], [third.id, 2]])
+
+    def test_artist_filter(self):
+        first, second, third, _ = self.songs
+        record_plays({first.id: 1, second.id: 2, third.id: 9}, self.now)
+        solo = Artist.objects.get(name_key='solo')
+        self.assertEqual(compute_entries('week', solo.id, now=self.now), [[second.id, 2], [first.id, 1]])
+
+    def test_all_time_uses_listen_count(self):
+        Song.objects.filter(id=self.songs[3].id).update(listen_count=7)
+        Song.objects.filter(id=self.songs[1].id).update(listen_count=3)
+        entries = compute_entries('all', size=2)
+        self.assertEqual(entries, [[self.songs[3].id, 7], [self.songs[1].id, 3]])
+
+    def test_all_time_includes_unplayed_songs(self):
+        # Chưa ai nghe bài nào: bảng 'all' vẫn liệt kê catalog như top bài hát trước đây
+        self.assertEqual(compute_entries('all'), [[song.id, 0] for song in self.songs])
+
+    def test_get_leaderboard_reuses_fresh_board(self):
+        board = get_leaderboard('week')
+        record_plays({self.songs[0].id: 1}, self.now)
+        self.assertEqual(get_leaderboard('week').computed_at, board.computed_at)
+
+        # Bảng cũ: request vẫn nhận bản đã tính, việc tính lại chạy trên thread nền
+        Leaderboard.objects.filter(pk=board.pk).update(computed_at=self.now - timedelta(days=1))
+        with mock.patch('music.leaderboards.refresh_in_background') as refresh:
+            self.assertEqual(get_leaderboard('week').entries, [])
+        refresh.assert_called_once_with('week', None)
+        refresh_leaderboard('week')
+        self.assertEqual(get_leaderboard('week').entries, [[self.songs[0].id, 1]])
+
+    def test_flush_only_records_plays(self):
+        with mock.patch('music.leaderboards.refresh_leaderboard') as refresh:
+            on_listen_counts_flushed({self.songs[0].id: 2})
+        refresh.assert_not_called()
+        self.assertEqual(self.bucket(self.songs[0], SongPlayBucket.DAY, timezone.now()), 2)
+
+    def test_prune_buckets(self):
+        record_plays({self.songs[0].id: 1}, self.now - timedelta(days=60))
+        record_plays({self.songs[0].id: 1}, self.now)
+        self.assertEqual(prune_buckets(self.now), 2)
+        self.assertEqual(SongPlayBucket.objects.count(), 2)
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class TopSongsArtistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='artist-charts', password='charts-password')
+        cls.song = Song.objects.create(title='Hit', artist='Sơn Tùng M-TP', audio_file='songs/hit.mp3',
+                                       uploaded_by=user, listen_count=3)
+
+    def test_unknown_artist_is_404_and_persists_nothing(self):
+        for name in ('nobody', 'x' * 300, '%00'):
+            response = self.client.get('/api/music/songs/top/', {'artist': name})
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(Leaderboard.objects.exists())
+
+    def test_spellings_of_one_artist_share_a_board(self):
+        for name in ('Sơn Tùng M-TP', '  sơn  TÙNG m-tp '):
+            response = self.client.get('/api/music/songs/top/', {'artist': name})
+            self.assertEqual([song['id'] for song in response.json()], [self.song.id])
+        self.assertEqual(list(Leaderboard.objects.values_list('artist_id', flat=True)),
+                         [self.song.primary_artist_id])
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..listen_counter import ListenCounter, listen_counts_flushed
+from ..models import Song
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class ListenCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='counter', password='counter-password')
+        cls.songs = [
+            Song.objects.create(title=f'Song {i}', artist='Artist', audio_file=f'songs/{i}.mp3', uploaded_by=user)
+            for i in range(3)
+        ]
+
+    def make_counter(self, **kwargs):
+        options = {'flush_interval': 3600, 'flush_threshold': 1000}
+        options.update(kwargs)
+        counter = ListenCounter(**options)
+        self.addCleanup(counter.flush)
+        return counter
+
+    def listen_counts(self):
+        return {song.id: Song.objects.get(id=song.id).listen_count for song in self.songs}
+
+    def test_increments_are_buffered_until_flush(self):
+        counter = self.make_counter()
+        first, second, _ = self.songs
+        counter.increment(first.id)
+        counter.increment(first.id)
+        counter.increment(second.id, 3)
+        self.assertEqual(self.listen_counts()[first.id], 0)
+
+        self.assertEqual(counter.flush(), 5)
+        counts = self.listen_counts()
+        self.assertEqual((counts[first.id], counts[second.id]), (2, 3))
+        self.assertEqual(counter.flush(), 0)
+
+    def test_threshold_flushes_immediately(self):
+        counter = self.make_counter(flush_threshold=2)
+        counter.increment(self.songs[0].id)
+        counter.increment(self.songs[0].id)
+        self.assertEqual(self.listen_counts()[self.songs[0].id], 2)
+        self.assertEqual(counter.pending_total, 0)
+
+    def test_flush_sends_signal_with_counts(self):
+        received = []
+
+        def handler(sender, counts, **kwargs):
+            received.append(counts)
+        listen_counts_flushed.connect(handler)
+        self.addCleanup(listen_counts_flushed.disconnect, handler)
+
+        counter = self.make_counter()
+        counter.increment(self.songs[2].id, 4)
+        counter.flush()
+        self.assertEqual(received, [{self.songs[2].id: 4}])
+
+    def test_failed_flush_keeps_counts(self):
+        counter = self.make_counter()
+        counter.increment(self.songs[0].id, 2)
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                counter.flush()
+        self.assertEqual(counter.pending_total, 2)
+        counter.flush()
+        self.assertEqual(self.listen_counts()[self.songs[0].id], 2)
+
+    def test_failed_threshold_flush_is_logged_not_raised(self):
+        counter = self.make_counter(flush_threshold=2)
+        counter.increment(self.songs[0].id)
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=RuntimeError), \
+                self.assertLogs('music.listen_counter', 'ERROR'):
+            counter.increment(self.songs[0].id)
+        self.assertEqual(counter.pending_total, 2)
@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import media_urls
+from ..media_urls import IMMUTABLE_CACHE_CONTROL, fingerprint
+from ..models import Song, Video
+from ..serializers import SongSerializer, VideoSerializer
+
+
+class MediaFileViewTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(media_urls._fingerprints.clear)
+        self.cover = default_storage.save(f'covers/ab/{"ab" * 32}_64.webp', ContentFile(b'webp'))
+        self.thumbnail = default_storage.save('thumbnails/clip.jpg', ContentFile(b'jpeg'))
+        for name in ('songs/track.mp3', 'renditions/1/96.mp3', 'videos/clip.mp4', 'hls/1/index.m3u8'):
+            default_storage.save(name, ContentFile(b'private'))
+
+    def test_images_are_served(self):
+        response = self.client.get(f'/media/{self.cover}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+        response = self.client.get(f'/media/v/{fingerprint(self.thumbnail)}/{self.thumbnail}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.client.get(f'/media/{self.thumbnail}')['Cache-Control'], 'no-cache')
+
+    def test_audio_and_video_are_not_served(self):
+        for path in ('songs/track.mp3', 'renditions/1/96.mp3', 'videos/clip.mp4', 'hls/1/index.m3u8',
+                     'v/000000000000/songs/track.mp3', 'covers/../songs/track.mp3', 'covers'):
+            self.assertEqual(self.client.get(f'/media/{path}').status_code, 404, path)
+
+    def test_private_files_are_never_fingerprinted(self):
+        # Không được đọc (hash) cả file nhạc/video chỉ để trả 404
+        self.client.get('/media/v/000000000000/videos/clip.mp4')
+        self.assertNotIn('videos/clip.mp4', media_urls._fingerprints)
+
+
+class StreamFieldTests(TestCase):
+    def test_serialized_media_files_point_at_stream_views(self):
+        user = get_user_model().objects.create_user(username='fields', password='fields-password')
+        song = Song.objects.create(title='Song', artist='Artist', audio_file='songs/track.mp3', uploaded_by=user)
+        video = Video.objects.create(title='Video', video_file='videos/clip.mp4')
+        self.assertEqual(SongSerializer(song).data['audio_file'], f'{settings.SITE_URL}/api/music/stream/{song.id}/')
+        self.assertEqual(VideoSerializer(video).data['video_file'],
+                         f'{settings.SITE_URL}/api/music/videos/{video.id}/stream/')
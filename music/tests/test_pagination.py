@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import Song
+
+
+@override_settings(API_PAGE_SIZE=4, RESPONSE_CACHE_BACKEND='locmem')
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='pages', password='pages-password')
+        cls.songs = [
+            Song.objects.create(title=f'Song {i}', artist='Artist', audio_file=f'songs/{i}.mp3', uploaded_by=user)
+            for i in range(10)
+        ]
+
+    def walk(self, url):
+        """ Đi hết các trang theo link ``next``, trả về id theo thứ tự và số trang """
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [song['id'] for song in response.json()['results']]
+            url = response.json()['next']
+            pages += 1
+        return ids, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids, pages = self.walk('/api/music/songs/')
+        self.assertEqual(ids, [song.id for song in self.songs])
+        self.assertEqual(pages, 3)
+
+    def test_limit_parameter(self):
+        ids, pages = self.walk('/api/music/songs/?limit=5')
+        self.assertEqual(len(ids), 10)
+        self.assertEqual(pages, 2)
+
+    def test_rows_with_equal_timestamps_are_not_skipped(self):
+        # Cursor gồm cả id nên các dòng cùng created_at vẫn được chia trang đúng
+        Song.objects.update(created_at=self.songs[0].created_at)
+        ids, _ = self.walk('/api/music/songs/?limit=3')
+        self.assertEqual(sorted(ids), [song.id for song in self.songs])
+        self.assertEqual(len(set(ids)), 10)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/music/songs/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from ..models import Playlist, PlaylistSong, Song
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class PlaylistBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='batch', email='batch@example.com', password='batch-password')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.songs = [
+            Song.objects.create(title=f'Song {i}', artist='Artist', audio_file=f'songs/{i}.mp3',
+                                uploaded_by=cls.user, duration_ms=1000 * (i + 1))
+            for i in range(20)
+        ]
+        cls.ids = [song.id for song in cls.songs]
+
+    def setUp(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {self.token.key}'
+        self.playlist = Playlist.objects.create(name='Mix', user=self.user)
+
+    def post(self, action, song_ids, playlist=None):
+        playlist = playlist or self.playlist
+        return self.client.post(f'/api/music/playlists/{playlist.id}/{action}/', {'song_ids': song_ids},
+                                content_type='application/json')
+
+    def song_ids(self, **headers):
+        response = self.client.get(f'/api/music/playlists/{self.playlist.id}/songs/', **headers)
+        return response, [song['id'] for song in response.json()] if response.status_code == 200 else None
+
+    def assertTotals(self, data, song_ids):
+        expected = {'track_count': len(song_ids), 'total_duration_ms': sum(1000 * (self.ids.index(i) + 1) for i in song_ids)}
+        self.assertEqual({key: data[key] for key in expected}, expected)
+        self.playlist.refresh_from_db()
+        self.assertEqual({key: getattr(self.playlist, key) for key in expected}, expected)
+
+    def test_add_appends_in_order_and_skips_existing(self):
+        a, b, c = self.ids[:3]
+        self.post('add_songs', [b])
+        data = self.post('add_songs', [c, b, a]).json()
+        self.assertEqual((data['added'], data['skipped']), ([c, a], [b]))
+        self.assertTotals(data, [a, b, c])
+        self.assertEqual(self.song_ids()[1], [b, c, a])
+
+    def test_remove(self):
+        a, b, c = self.ids[:3]
+        self.post('add_songs', [a, b, c])
+        data = self.post('remove_songs', [c, self.ids[5], a]).json()
+        self.assertEqual((data['removed'], data['skipped']), ([c, a], [self.ids[5]]))
+        self.assertTotals(data, [b])
+        self.assertEqual(self.song_ids()[1], [b])
+
+    def test_replace_sets_order_and_totals(self):
+        a, b, c, d = self.ids[:4]
+        self.post('add_songs', [a, b, c])
+        data = self.post('replace_songs', [d, c, a]).json()
+        self.assertEqual((data['added'], data['removed_count']), ([d], 1))
+        self.assertTotals(data, [d, c, a])
+        self.assertEqual(self.song_ids()[1], [d, c, a])
+
+        data = self.post('replace_songs', []).json()
+        self.assertTotals(data, [])
+        self.assertEqual(self.song_ids()[1], [])
+
+    def test_reorder_changes_etag(self):
+        a, b, c = self.ids[:3]
+        self.post('add_songs', [a, b, c])
+        response, _ = self.song_ids()
+        etag = response['ETag']
+        self.assertEqual(self.song_ids(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+        # Cùng các bài, cùng tập vị trí: chỉ version cho biết danh sách đã đổi
+        self.post('replace_songs', [c, a, b])
+        response, song_ids = self.song_ids(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(song_ids, [c, a, b])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_single_song_views_change_etag(self):
+        response, _ = self.song_ids()
+        etag = response['ETag']
+        self.client.post(f'/api/music/playlists/{self.playlist.id}/add_song/', {'song_id': self.ids[0]})
+        response, song_ids = self.song_ids(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, song_ids), (200, [self.ids[0]]))
+
+        etag = response['ETag']
+        self.client.post(f'/api/music/playlists/{self.playlist.id}/remove_song/', {'song_id': self.ids[0]})
+        self.assertEqual(self.song_ids(HTTP_IF_NONE_MATCH=etag)[0].status_code, 200)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        counts = []
+        for size in (2, 10):
+            playlist = Playlist.objects.create(name=f'Size {size}', user=self.user)
+            # replace: giữ một bài, thêm và xoá các bài còn lại
+            for action in ('add_songs', 'replace_songs', 'remove_songs'):
+                song_ids = self.ids[:size] if action != 'replace_songs' else self.ids[size:size * 2 - 1] + self.ids[:1]
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.post(action, song_ids, playlist).status_code, 200)
+                counts.append((action, len(queries)))
+        self.assertEqual(counts[:3], counts[3:])
+
+    def test_errors(self):
+        response = self.post('add_songs', [self.ids[0], 10 ** 9])
+        self.assertEqual((response.status_code, response.json()['song_ids']), (400, [10 ** 9]))
+        self.assertFalse(PlaylistSong.objects.exists())
+        self.assertEqual(self.post('add_songs', 'nope').status_code, 400)
+        self.assertEqual(self.post('add_songs', []).status_code, 400)
+
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password='other-password')
+        playlist = Playlist.objects.create(name='Theirs', user=other)
+        self.assertEqual(self.post('add_songs', [self.ids[0]], playlist).status_code, 404)
@@ -0,0 +1,168 @@
+import json
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from ..leaderboards import record_plays
+from ..models import Album, Artist, FavoriteSong, Playlist, PlaylistSong, Song, Video
+from ..song_import import write_song_batch
+from ..video_import import VideoExists, import_video_file
+
+
+def plan_nodes(plan):
+    """ Duyệt toàn bộ cây plan (FORMAT JSON) của PostgreSQL """
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def is_full_scan(node):
+    """
+    Seq Scan, hoặc đọc hết một index không liên quan rồi lọc từng dòng
+    (Filter mà không có Index Cond): planner làm vậy khi tắt seq scan mà
+    không có index phù hợp.
+    """
+    if node['Node Type'] == 'Seq Scan':
+        return True
+    return node['Node Type'] in ('Index Scan', 'Index Only Scan') and 'Filter' in node and 'Index Cond' not in node
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN harness chỉ chạy trên PostgreSQL")
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class QueryPlanTests(TestCase):
+    """
+    Runs every query the hot endpoints issue through EXPLAIN on a seeded
+    dataset and fails when one of them needs a sequential scan (or reads a
+    whole unrelated index just to filter it). The test tables are tiny, so
+    seq scans are disabled for the session: the planner then only picks
+    one when no index can serve the query at all.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='plan', email='plan@example.com', password='plan-password')
+        cls.token = Token.objects.create(user=cls.user)
+        # User khác (token, yêu thích) để dữ liệu của một user chỉ là phần nhỏ của mỗi bảng,
+        # nếu không planner có thể đọc cả index rồi lọc vì chi phí như nhau
+        others = [
+            get_user_model().objects.create(username=f'plan{i}', email=f'plan{i}@example.com') for i in range(50)
+        ]
+        Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in others])
+        artists = Artist.objects.bulk_create(
+            [Artist(name=f'Artist {i}', name_key=f'artist {i}') for i in range(5)]
+        )
+        albums = Album.objects.bulk_create([
+            Album(name=f'Album {i}', artist=artists[i % 5].name, primary_artist=artists[i % 5])
+            for i in range(20)
+        ])
+        cls.songs = Song.objects.bulk_create([
+            Song(
+                title=f'Song {i}', artist=albums[i % 20].artist, primary_artist=albums[i % 20].primary_artist,
+                album=albums[i % 20], audio_file=f'songs/song_{i}.mp3', uploaded_by=cls.user,
+                duration_ms=180000 + i, listen_count=i % 7,
+            )
+            for i in range(200)
+        ])
+        cls.album = albums[0]
+        cls.artist = artists[0]
+        playlists = Playlist.objects.bulk_create([Playlist(name=f'Plan {i}', user=cls.user) for i in range(10)])
+        cls.playlist = playlists[0]
+        PlaylistSong.objects.bulk_create([
+            PlaylistSong(playlist=playlist, song=song, order=i)
+            for playlist in playlists for i, song in enumerate(cls.songs[:30])
+        ])
+        FavoriteSong.objects.bulk_create([
+            FavoriteSong(user=user, song=song) for user in [cls.user, *others] for song in cls.songs[:30]
+        ])
+        Video.objects.bulk_create(
+            [Video(title=f'Video {i}', video_file=f'videos/video_{i}.mp4', duration_ms=60000) for i in range(20)]
+        )
+        now = timezone.now()
+        record_plays({song.id: 3 for song in cls.songs[:50]}, now - timedelta(days=1))
+        record_plays({song.id: 2 for song in cls.songs[:50]}, now)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {self.token.key}'
+
+    def capture(self, call):
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        return [query['sql'] for query in queries.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+
+    def seq_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [node['Relation Name'] for node in plan_nodes(plan[0]['Plan']) if is_full_scan(node)]
+
+    def assertIndexOnly(self, call, label):
+        queries = self.capture(call)
+        self.assertTrue(queries, f'{label}: không bắt được query nào')
+        for sql in queries:
+            tables = self.seq_scans(sql)
+            self.assertFalse(tables, f'{label}: sequential scan trên {", ".join(tables)}\n{sql}')
+
+    def get(self, url):
+        def call():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+        return call
+
+    def test_catalog_endpoints(self):
+        self.assertIndexOnly(self.get('/api/music/albums/'), 'album_list')
+        self.assertIndexOnly(self.get('/api/music/songs/'), 'song_list')
+        self.assertIndexOnly(self.get(f'/api/music/albums/{self.album.id}/songs/'), 'song_list_by_album')
+        self.assertIndexOnly(self.get('/api/music/videos/'), 'get_all_videos')
+
+    def test_artist_endpoints(self):
+        self.assertIndexOnly(self.get(f'/api/music/artists/{self.artist.id}/'), 'artist_detail')
+        self.assertIndexOnly(self.get(f'/api/music/artists/{self.artist.id}/top-tracks/'), 'artist_top_tracks')
+
+    def test_leaderboards(self):
+        # Lần đầu tính bảng từ Song/SongPlayBucket, các lần sau đọc bảng đã lưu
+        for window in ('all', 'week', 'day'):
+            self.assertIndexOnly(self.get(f'/api/music/songs/top/?window={window}'), f'top songs {window}')
+        self.assertIndexOnly(self.get(f'/api/music/songs/top/?window=all&artist={self.artist.name}'), 'top songs artist')
+        self.assertIndexOnly(self.get(f'/api/music/songs/top/?window=week&artist={self.artist.name}'), 'top songs artist week')
+
+    def test_user_endpoints(self):
+        self.assertIndexOnly(self.get('/api/music/playlists/'), 'PlaylistView')
+        self.assertIndexOnly(self.get(f'/api/music/playlists/{self.playlist.id}/songs/'), 'PlaylistSongsView')
+        self.assertIndexOnly(self.get('/api/music/favorite_songs/list/'), 'FavoriteSongListView')
+
+    def test_playlist_batch_endpoints(self):
+        def post(action, song_ids):
+            def call():
+                response = self.client.post(f'/api/music/playlists/{self.playlist.id}/{action}/',
+                                            {'song_ids': song_ids}, content_type='application/json')
+                self.assertEqual(response.status_code, 200, action)
+            return call
+        song_ids = [song.id for song in self.songs[20:60]]
+        self.assertIndexOnly(post('add_songs', song_ids), 'AddSongsToPlaylist')
+        self.assertIndexOnly(post('remove_songs', song_ids[:10]), 'RemoveSongsFromPlaylist')
+        self.assertIndexOnly(post('replace_songs', song_ids[::-1]), 'ReplacePlaylistSongs')
+
+    def test_import_lookups(self):
+        song = self.songs[0]
+        item = {'title': song.title, 'artist': song.artist}
+        self.assertIndexOnly(lambda: write_song_batch([item], self.user), 'import_songs existing check')
+
+        def import_existing_video():
+            with self.assertRaises(VideoExists):
+                import_video_file('media/video_raw/Video 3.mp4')
+        self.assertIndexOnly(import_existing_video, 'import_videos title lookup')
+
@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from ..listen_counter import listen_counts_flushed
+from ..response_cache import FileResponseCache, LocMemResponseCache, cache_response, namespace_versions
+
+
+class ResponseCacheBackendTests:
+    """ Kiểm tra chung cho mọi backend; lớp con cài make_cache() """
+
+    def test_set_and_get(self):
+        cache = self.make_cache(max_bytes=1000)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', {'Content-Type': 'application/json'}, b'[1]')
+        self.assertEqual(cache.get('a'), ({'Content-Type': 'application/json'}, b'[1]'))
+
+    def test_versions(self):
+        cache = self.make_cache(max_bytes=1000)
+        self.assertEqual(cache.get_version('song'), '0')
+        cache.bump_version('song')
+        first = cache.get_version('song')
+        self.assertNotEqual(first, '0')
+        cache.bump_version('song')
+        self.assertNotEqual(cache.get_version('song'), first)
+        self.assertEqual(cache.get_version('album'), '0')
+
+    def test_body_larger_than_budget_is_not_stored(self):
+        cache = self.make_cache(max_bytes=10)
+        cache.set('big', {}, b'x' * 11)
+        self.assertIsNone(cache.get('big'))
+
+    def test_entries_expire_after_ttl(self):
+        cache = self.make_cache(max_bytes=1000)
+        with mock.patch('music.response_cache.time.time', return_value=1000):
+            cache.set('a', {}, b'body')
+        with mock.patch('music.response_cache.time.time', return_value=1000 + cache.ttl - 1):
+            self.assertEqual(cache.get('a'), ({}, b'body'))
+        with mock.patch('music.response_cache.time.time', return_value=1000 + cache.ttl):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats.expired, 1)
+
+
+class LocMemResponseCacheTests(ResponseCacheBackendTests, SimpleTestCase):
+    def make_cache(self, max_bytes):
+        return LocMemResponseCache(max_bytes=max_bytes, ttl=60)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = self.make_cache(max_bytes=20)
+        cache.set('a', {}, b'x' * 8)
+        cache.set('b', {}, b'x' * 8)
+        cache.get('a')
+        cache.set('c', {}, b'x' * 8)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats.evictions, 1)
+
+
+class FileResponseCacheTests(ResponseCacheBackendTests, SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+
+    def make_cache(self, max_bytes):
+        return FileResponseCache(max_bytes=max_bytes, location=self.location, ttl=60)
+
+    def test_versions_are_shared_between_instances(self):
+        # Hai instance = hai worker dùng chung thư mục
+        first, second = self.make_cache(1000), self.make_cache(1000)
+        first.bump_version('song')
+        self.assertEqual(second.get_version('song'), first.get_version('song'))
+        first.set('a', {}, b'body')
+        self.assertEqual(second.get('a'), ({}, b'body'))
+
+    def test_eviction_keeps_directory_under_budget(self):
+        cache = self.make_cache(max_bytes=600)
+        for i in range(10):
+            cache.set(f'key{i}', {}, b'x' * 100)
+        self.assertLessEqual(cache.info()['bytes'], 600)
+        self.assertGreater(cache.stats.evictions, 0)
+
+
+class CacheResponseDecoratorTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.cache = LocMemResponseCache(max_bytes=10000)
+        patcher = mock.patch('music.response_cache.response_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = 0
+
+        @cache_response('song')
+        def view(request):
+            self.calls += 1
+            response = HttpResponse(f'body {self.calls}', content_type='text/plain')
+            response['ETag'] = f'"v{self.calls}"'
+            return response
+        self.view = view
+
+    def test_second_request_is_a_hit(self):
+        first = self.view(self.factory.get('/songs/'))
+        second = self.view(self.factory.get('/songs/'))
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.content, b'body 1')
+        self.assertEqual(second['Content-Type'], 'text/plain')
+        self.assertEqual(self.calls, 1)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.view(self.factory.get('/songs/'))
+        self.view(self.factory.get('/songs/?limit=5'))
+        self.assertEqual(self.calls, 2)
+
+    def test_bumped_namespace_invalidates(self):
+        self.view(self.factory.get('/songs/'))
+        self.cache.bump_version('song')
+        response = self.view(self.factory.get('/songs/'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.content, b'body 2')
+
+    def test_hit_answers_if_none_match(self):
+        self.view(self.factory.get('/songs/'))
+        response = self.view(self.factory.get('/songs/', HTTP_IF_NONE_MATCH='"v1"'))
+        self.assertEqual(response.status_code, 304)
+
+    def test_non_get_requests_bypass_the_cache(self):
+        self.view(self.factory.post('/songs/'))
+        self.view(self.factory.post('/songs/'))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.info()['entries'], 0)
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class ListenFlushInvalidationTests(TestCase):
+    def test_flushed_listen_counts_only_bump_listens_namespace(self):
+        versions = namespace_versions(['song', 'listens'])
+        with mock.patch('music.leaderboards.record_plays'):
+            listen_counts_flushed.send(sender=None, counts={1: 1})
+        # Catalog (song_list, ETag của playlist / yêu thích) không bị vô hiệu mỗi lần flush
+        song, listens = namespace_versions(['song', 'listens'])
+        self.assertEqual(song, versions[0])
+        self.assertNotEqual(listens, versions[1])
@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..models import Album, Song
+from ..search import PythonSearchBackend, album_search_text, normalize_text, song_search_text
+from ..serializers import AlbumSerializer
+
+
+class NormalizeTextTests(SimpleTestCase):
+    def test_folds_case_and_diacritics(self):
+        self.assertEqual(normalize_text('Cuộc Gọi Cuối'), 'cuoc goi cuoi')
+        self.assertEqual(normalize_text('Đường Đến Ngày Vinh Quang'), 'duong den ngay vinh quang')
+        self.assertEqual(normalize_text(None), '')
+
+    def test_song_search_text_joins_fields(self):
+        self.assertEqual(song_search_text('Hà Nội', 'Sơn Tùng', None), 'ha noi son tung')
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class PythonSearchBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='search', password='search-password')
+        cls.album = Album.objects.create(name='Sky Tour', artist='Sơn Tùng M-TP')
+
+        def song(title, artist, listens=0, album=None):
+            return Song.objects.create(title=title, artist=artist, album=album, audio_file='songs/x.mp3',
+                                       uploaded_by=user, listen_count=listens)
+        cls.goi = song('Cuộc Gọi Cuối', 'Đen Vâu', listens=5)
+        cls.chung_ta = song('Chúng Ta Của Hiện Tại', 'Sơn Tùng M-TP', listens=50, album=cls.album)
+        cls.chung_ta_remix = song('Chúng Ta Của Hiện Tại (Remix)', 'DJ', listens=500)
+        cls.mua = song('Mưa Tháng Sáu', 'Văn Mai Hương', listens=10)
+
+    def setUp(self):
+        self.backend = PythonSearchBackend()
+
+    def songs(self, query):
+        return self.backend.search(query)[0]
+
+    def test_query_without_diacritics_matches(self):
+        self.assertEqual(self.songs('cuoc goi cuoi'), [self.goi])
+        self.assertEqual(self.songs('CUỘC gọi'), [self.goi])
+        self.assertEqual(self.songs('den vau'), [self.goi])
+
+    def test_prefix_of_last_word_matches(self):
+        self.assertEqual(self.songs('mua tha'), [self.mua])
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self.songs('cuoc goi cuio'), [self.goi])
+        self.assertEqual(self.songs('muaa thang sau'), [self.mua])
+
+    def test_every_token_must_match(self):
+        self.assertEqual(self.songs('cuoc mua'), [])
+        self.assertEqual(self.songs('!!!'), [])
+
+    def test_match_quality_ordering(self):
+        # prefix > chứa trong từ > gõ sai
+        prefix = self.backend.score(['hat'], 'hat ca')
+        inside = self.backend.score(['hat'], 'chat ca')
+        typo = self.backend.score(['haat'], 'hat ca')
+        self.assertGreater(prefix, inside)
+        self.assertGreater(inside, typo)
+        self.assertGreater(typo, 0)
+        self.assertEqual(self.backend.score(['xyz'], 'hat ca'), 0)
+
+    def test_ties_are_ordered_by_popularity(self):
+        # Cùng điểm thì bài nhiều lượt nghe hơn đứng trước
+        self.assertEqual(self.songs('chung ta hien tai'), [self.chung_ta_remix, self.chung_ta])
+        self.assertEqual(self.songs('remix'), [self.chung_ta_remix])
+        self.assertEqual(self.songs('son tung'), [self.chung_ta])
+
+    def test_album_name_is_searchable(self):
+        songs, albums = self.backend.search('sky tour')
+        self.assertEqual(songs, [self.chung_ta])
+        self.assertEqual(albums, [self.album])
+
+    def test_limit(self):
+        self.assertEqual(len(self.backend.search('chung', limit=1)[0]), 1)
+
+    @override_settings(SEARCH_BACKEND='music.search.PythonSearchBackend')
+    def test_search_endpoint(self):
+        response = self.client.get('/api/music/search', {'q': 'cuoc goi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([song['id'] for song in response.json()['songs']], [self.goi.id])
+        self.assertNotIn('search_text', response.json()['songs'][0])
+        self.assertNotIn('search_text', AlbumSerializer(self.album).data)
+
+
+class SearchTextSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='signals', password='signals-password')
+        album = Album.objects.create(name='Album Cũ', artist='Ca Sĩ')
+        cls.song = Song.objects.create(title='Bài Hát', artist='Ca Sĩ', album=album,
+                                       audio_file='songs/x.mp3', uploaded_by=user)
+
+    def test_search_text_follows_title_and_album(self):
+        self.assertEqual(self.song.search_text, 'bai hat ca si album cu')
+        self.song.album.name = 'Album Mới'
+        self.song.album.save()
+        self.song.refresh_from_db()
+        self.assertEqual(self.song.search_text, 'bai hat ca si album moi')
+
+    def test_unrelated_update_fields_skip_album_lookup(self):
+        song = Song.objects.get(pk=self.song.pk)
+        song.renditions = [96, 160]
+        with self.assertNumQueries(1):
+            song.save(update_fields=['renditions'])
+
+    def test_update_fields_persist_derived_fields(self):
+        song = Song.objects.get(pk=self.song.pk)
+        song.title = 'Bài Mới'
+        song.artist = 'Nhóm Nhạc'
+        song.save(update_fields=['title', 'artist'])
+        song = Song.objects.select_related('primary_artist').get(pk=song.pk)
+        self.assertEqual(song.search_text, 'bai moi nhom nhac album cu')
+        self.assertEqual(song.primary_artist.name, 'Nhóm Nhạc')
+
+        album = song.album
+        album.name = 'Album Mới'
+        album.save(update_fields=['name'])
+        self.assertEqual(Album.objects.get(pk=album.pk).search_text, album_search_text('Album Mới', 'Ca Sĩ'))
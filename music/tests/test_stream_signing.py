@@ -0,0 +1,171 @@
+import shutil
+import tempfile
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from ..listen_counter import listen_counter
+from ..listen_events import listen_event_buffer
+from ..media_urls import IMMUTABLE_CACHE_CONTROL
+from ..models import Song, Video
+from ..stream_signing import StreamSignatureError, sign_stream, verify_stream
+
+
+class VerifyStreamTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def verify(self, token, kind='song', object_id=7):
+        return verify_stream(self.factory.get('/', {'sig': token} if token else {}), kind, object_id)
+
+    def test_valid_signature(self):
+        payload = self.verify(sign_stream('song', 7, 3, 'songs/a.mp3', 160))
+        self.assertEqual((payload['u'], payload['r'], payload['f']), (3, 160, 'songs/a.mp3'))
+
+    def test_signature_is_bound_to_kind_and_id(self):
+        token = sign_stream('song', 7, 3, 'songs/a.mp3')
+        with self.assertRaises(StreamSignatureError):
+            self.verify(token, object_id=8)
+        with self.assertRaises(StreamSignatureError):
+            self.verify(token, kind='video')
+
+    def test_tampered_and_expired_signatures(self):
+        token = sign_stream('song', 7, 3, 'songs/a.mp3')
+        with self.assertRaises(StreamSignatureError):
+            self.verify(token[:-2] + ('aa' if not token.endswith('aa') else 'bb'))
+        with self.assertRaises(StreamSignatureError):
+            self.verify(sign_stream('song', 7, 3, 'songs/a.mp3', ttl=-1))
+
+    def test_unsigned_urls(self):
+        self.assertIsNone(self.verify(None))
+        with override_settings(STREAM_SIGNED_URLS_REQUIRED=True):
+            with self.assertRaises(StreamSignatureError):
+                self.verify(None)
+
+
+@override_settings(RESPONSE_CACHE_BACKEND='locmem')
+class SignedStreamViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='listener', password='listener-password')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        name = default_storage.save('songs/signed.mp3', ContentFile(b'a' * 2048))
+        self.song = Song.objects.create(title='Signed', artist='Artist', audio_file=name, uploaded_by=self.user)
+        # Lượt nghe của test ghi ngay trong transaction của test, không rơi sang test khác hay lúc thoát
+        self.addCleanup(listen_counter.flush)
+        self.addCleanup(listen_event_buffer.flush)
+
+    def signed_path(self):
+        response = self.client.get(f'/api/music/stream-urls/?songs={self.song.id}',
+                                   HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        url = urlsplit(response.json()['songs'][str(self.song.id)])
+        return f'{url.path}?{url.query}'
+
+    def test_issuing_requires_authentication(self):
+        self.assertEqual(self.client.get(f'/api/music/stream-urls/?songs={self.song.id}').status_code, 401)
+
+    def test_signed_range_request_makes_no_query(self):
+        path = self.signed_path()
+        with self.assertNumQueries(0):
+            response = self.client.get(path, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'a' * 100)
+
+    def test_signature_for_another_song_is_rejected(self):
+        path = self.signed_path().replace(f'/stream/{self.song.id}/', f'/stream/{self.song.id + 1}/')
+        self.assertEqual(self.client.get(path).status_code, 403)
+
+    def test_unsigned_request_with_invalid_token_is_401(self):
+        response = self.client.get(f'/api/music/stream/{self.song.id}/', HTTP_AUTHORIZATION='Token ' + '0' * 40)
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(f'/api/music/stream/{self.song.id}/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_failed_listen_flush_does_not_break_playback(self):
+        path = self.signed_path()
+        with mock.patch.object(listen_counter, 'flush_threshold', 1), \
+                mock.patch.object(listen_event_buffer, 'flush_threshold', 1), \
+                mock.patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError), \
+                mock.patch('django.db.models.query.QuerySet.bulk_create', side_effect=DatabaseError), \
+                self.assertLogs('music', 'ERROR'):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((listen_counter.pending_total, len(listen_event_buffer.pending)), (1, 1))
+
+
+@override_settings(STREAM_SIGNED_URLS_REQUIRED=True)
+class SignedHLSTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='viewer', password='viewer-password')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.video = Video.objects.create(title='Clip', video_file='videos/clip.mp4', hls_playlist='hls/x/master.m3u8')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        base = f'hls/{self.video.id}'
+        default_storage.save(f'{base}/master.m3u8', ContentFile(b'#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1\n360p-0a1b2c3d/index.m3u8\n'))
+        default_storage.save(f'{base}/360p-0a1b2c3d/index.m3u8', ContentFile(b'#EXTM3U\n#EXTINF:4.0,\nseg_00000.ts\n#EXT-X-ENDLIST\n'))
+        default_storage.save(f'{base}/360p-0a1b2c3d/seg_00000.ts', ContentFile(b'ts'))
+
+    def get(self, url):
+        url = urlsplit(url)
+        return self.client.get(f'{url.path}?{url.query}' if url.query else url.path)
+
+    def test_unsigned_request_is_401(self):
+        for name in ('master.m3u8', '360p-0a1b2c3d/index.m3u8', '360p-0a1b2c3d/seg_00000.ts'):
+            response = self.client.get(f'/api/music/videos/{self.video.id}/hls/{name}')
+            self.assertEqual(response.status_code, 401, name)
+
+    def test_signature_is_carried_into_playlists_and_segments(self):
+        response = self.client.get(f'/api/music/stream-urls/?hls={self.video.id}',
+                                   HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        master_url = response.json()['hls'][str(self.video.id)]
+        base_url = master_url.split('?')[0].rsplit('/', 1)[0]
+
+        master = self.get(master_url)
+        self.assertEqual(master.status_code, 200)
+        rendition = master.content.decode().splitlines()[-1]
+        self.assertTrue(rendition.startswith('360p-0a1b2c3d/index.m3u8?sig='))
+
+        playlist = self.get(f'{base_url}/{rendition}')
+        self.assertEqual(playlist.status_code, 200)
+        segment = playlist.content.decode().splitlines()[2]
+        self.assertTrue(segment.startswith('seg_00000.ts?sig='))
+
+        response = self.get(f'{base_url}/360p-0a1b2c3d/{segment}')
+        self.assertEqual((response.status_code, b''.join(response.streaming_content)), (200, b'ts'))
+
+        other = master_url.replace(f'/videos/{self.video.id}/', f'/videos/{self.video.id + 1}/')
+        self.assertEqual(self.get(other).status_code, 403)
+
+    def test_only_the_master_playlist_is_revalidated(self):
+        response = self.client.get(f'/api/music/stream-urls/?hls={self.video.id}',
+                                   HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        master_url = response.json()['hls'][str(self.video.id)]
+        master = self.get(master_url)
+        self.assertEqual(master['Cache-Control'], 'public, no-cache')
+        url = urlsplit(master_url)
+        self.assertEqual(self.client.get(f'{url.path}?{url.query}', HTTP_IF_NONE_MATCH=master['ETag']).status_code, 304)
+
+        # Rendition nằm trong thư mục theo build id: build lại là URL mới
+        segment = self.get(master_url.replace('master.m3u8', '360p-0a1b2c3d/seg_00000.ts'))
+        self.assertEqual(segment['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+from django.test import RequestFactory, SimpleTestCase
+
+from ..streaming import is_new_playback, parse_range_header, serve_file
+
+
+class ParseRangeHeaderTests(SimpleTestCase):
+    def test_missing_or_malformed_header_serves_whole_file(self):
+        for header in ('', 'items=0-10', 'bytes=', 'bytes=a-b', 'bytes=-', 'bytes=10-5'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 1000))
+
+    def test_single_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=500-', 1000), [(500, 999)])
+        # Vượt quá cuối file thì cắt về byte cuối
+        self.assertEqual(parse_range_header('bytes=900-5000', 1000), [(900, 999)])
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range_header('bytes=-100', 1000), [(900, 999)])
+        self.assertEqual(parse_range_header('bytes=-5000', 1000), [(0, 999)])
+
+    def test_multiple_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-9, 20-29', 1000), [(0, 9), (20, 29)])
+
+    def test_unsatisfiable_ranges(self):
+        self.assertEqual(parse_range_header('bytes=1000-', 1000), [])
+        self.assertEqual(parse_range_header('bytes=-0', 1000), [])
+
+    def test_too_many_ranges(self):
+        header = 'bytes=' + ','.join(f'{i}-{i}' for i in range(0, 40, 2))
+        self.assertIsNone(parse_range_header(header, 1000))
+
+
+class IsNewPlaybackTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_full_and_initial_range_requests_start_a_play(self):
+        self.assertTrue(is_new_playback(self.factory.get('/')))
+        self.assertTrue(is_new_playback(self.factory.get('/', HTTP_RANGE='bytes=0-')))
+
+    def test_probe_ranges_do_not_start_a_play(self):
+        # Safari dò bằng bytes=0-1 trước request thật
+        self.assertFalse(is_new_playback(self.factory.get('/', HTTP_RANGE='bytes=0-1')))
+        self.assertFalse(is_new_playback(self.factory.get('/', HTTP_RANGE='bytes=0-1022')))
+        self.assertTrue(is_new_playback(self.factory.get('/', HTTP_RANGE='bytes=0-1023')))
+        self.assertTrue(is_new_playback(self.factory.get('/', HTTP_RANGE='bytes=0-65535')))
+
+    def test_seeks_revalidations_and_head_do_not(self):
+        self.assertFalse(is_new_playback(self.factory.get('/', HTTP_RANGE='bytes=5000-')))
+        self.assertFalse(is_new_playback(self.factory.get('/', HTTP_IF_NONE_MATCH='"abc"')))
+        self.assertFalse(is_new_playback(self.factory.head('/')))
+
+
+class ServeFileTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        handle, self.path = tempfile.mkstemp(suffix='.mp3')
+        os.write(handle, bytes(range(256)) * 4)
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def read(self, response):
+        try:
+            return b''.join(response.streaming_content)
+        finally:
+            response.close()
+
+    def test_full_file(self):
+        response = serve_file(self.factory.get('/'), self.path, 'audio/mpeg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(len(self.read(response)), 1024)
+
+    def test_partial_content(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=10-19'), self.path, 'audio/mpeg')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(self.read(response), bytes(range(10, 20)))
+
+    def test_unsatisfiable_range(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=5000-'), self.path, 'audio/mpeg')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_conditional_request(self):
+        first = serve_file(self.factory.get('/'), self.path, 'audio/mpeg')
+        first.close()
+        etag = first['ETag']
+        response = serve_file(self.factory.get('/', HTTP_IF_NONE_MATCH=etag), self.path, 'audio/mpeg')
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..models import Album, Song
+from ..typeahead import PrefixIndex, _warm_index, warm_typeahead_index
+
+
+class PrefixIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='typeahead', password='typeahead-password')
+        cls.album = Album.objects.create(name='Hoa Hải Đường', artist='Jack')
+        cls.song = Song.objects.create(title='Hồng Nhan', artist='Jack', album=cls.album,
+                                       audio_file='songs/x.mp3', uploaded_by=cls.user, listen_count=10)
+        Song.objects.create(title='Hoa Vô Sắc', artist='Jack', audio_file='songs/y.mp3',
+                            uploaded_by=cls.user, listen_count=3)
+
+    def labels(self, index, query):
+        return [(item['type'], item['label']) for item in index.suggest(query)]
+
+    def test_prefix_matches_any_word_ordered_by_listens(self):
+        index = PrefixIndex()
+        self.assertEqual(self.labels(index, 'hoa'), [('album', 'Hoa Hải Đường'), ('song', 'Hoa Vô Sắc')])
+        self.assertEqual(self.labels(index, 'nhan'), [('song', 'Hồng Nhan')])
+        # Artist có trọng số = tổng lượt nghe các bài của họ
+        self.assertEqual(index.suggest('jac'), [{'type': 'artist', 'label': 'Jack', 'weight': 13}])
+        self.assertEqual(index.suggest(''), [])
+
+    def test_lookups_between_checks_do_not_query(self):
+        index = PrefixIndex(check_interval=60)
+        index.suggest('hoa')
+        with self.assertNumQueries(0):
+            index.suggest('hong')
+
+    def bulk_import(self):
+        # Như write_song_batch trong import_songs / watch_media: bulk_create không gửi signal
+        Song.objects.bulk_create([Song(title='Thiên Lý Ơi', artist='Jack', audio_file='songs/z.mp3',
+                                       uploaded_by=self.user, search_text='thien ly oi jack')])
+
+    def test_rows_from_other_processes_appear_after_check_interval(self):
+        index = PrefixIndex(check_interval=30)
+        with mock.patch('music.typeahead.time.monotonic', return_value=1000):
+            index.suggest('hoa')
+        self.bulk_import()
+        with mock.patch('music.typeahead.time.monotonic', return_value=1010):
+            self.assertEqual(self.labels(index, 'thien'), [])
+        with mock.patch('music.typeahead.time.monotonic', return_value=1031):
+            self.assertEqual(self.labels(index, 'thien'), [('song', 'Thiên Lý Ơi')])
+
+    def test_unchanged_watermark_does_not_rebuild(self):
+        index = PrefixIndex(check_interval=30)
+        with mock.patch('music.typeahead.time.monotonic', return_value=1000):
+            index.suggest('hoa')
+        with mock.patch('music.typeahead.time.monotonic', return_value=1031), \
+                mock.patch.object(index, 'build') as build:
+            index.suggest('hoa')
+        build.assert_not_called()
+
+    def test_renames_elsewhere_are_picked_up_after_max_age(self):
+        index = PrefixIndex(check_interval=30, max_age=300)
+        with mock.patch('music.typeahead.time.monotonic', return_value=1000):
+            index.suggest('hoa')
+        # update() không gửi signal, watermark không đổi
+        Song.objects.filter(pk=self.song.pk).update(title='Sóng Gió')
+        with mock.patch('music.typeahead.time.monotonic', return_value=1031):
+            self.assertEqual(self.labels(index, 'song'), [])
+        with mock.patch('music.typeahead.time.monotonic', return_value=1301):
+            self.assertEqual(self.labels(index, 'song'), [('song', 'Sóng Gió')])
+
+
+class WarmTypeaheadTests(SimpleTestCase):
+    def test_warm_up_builds_on_a_background_thread(self):
+        with mock.patch('music.typeahead.threading.Thread') as thread:
+            warm_typeahead_index()
+        thread.assert_called_once_with(target=_warm_index, daemon=True)
+        thread.return_value.start.assert_called_once_with()
+
+    @override_settings(TYPEAHEAD_WARM_ON_STARTUP=False)
+    def test_warm_up_can_be_disabled(self):
+        with mock.patch('music.typeahead.threading.Thread') as thread:
+            warm_typeahead_index()
+        thread.assert_not_called()
@@ -0,0 +1,262 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Count, Max
+
+from .search import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Prefix ngắn (1-2 ký tự) khớp rất nhiều mục nên kết quả được cache tới lần sửa index kế tiếp
+SHORT_PREFIX_LENGTH = 2
+
+
+class PrefixIndex:
+    """
+    In-process typeahead index over song titles, artists and album names.
+
+    Every word-suffix of an accent-folded name ("cuoc goi cuoi", "goi cuoi",
+    "cuoi") is kept in one sorted list, so a prefix lookup is a ``bisect``
+    plus a short range scan and never touches the database. Suggestions are
+    ordered by listen count: a song by its own count, an album or artist by
+    the sum over their songs.
+
+    The index is built on first use with a single ``values_list`` query per
+    model, then kept current by the signals in ``music.signals`` and by
+    ``listen_counts_flushed``. Those only fire in this process, so rows
+    written elsewhere (``import_songs`` / ``watch_media`` use bulk_create,
+    admin edits on another worker) are picked up by a rebuild: at most every
+    ``check_interval`` seconds a lookup compares a cheap watermark (count
+    and max id of songs and albums) with the one seen at build time, and
+    the index is rebuilt anyway once it is ``max_age`` seconds old.
+    """
+
+    def __init__(self, check_interval=30, max_age=900):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        self.watermark = None
+        self.built_at = self.checked_at = 0.0
+        self.reset()
+
+    def reset(self):
+        self.built = False
+        self.keys = []          # [(key, item_key)], đã sắp xếp
+        self.items = {}         # item_key -> {'type', 'id', 'label', ...}
+        self.item_keys = {}     # item_key -> các key đã chèn vào self.keys
+        self.weights = defaultdict(int)
+        self.songs = {}         # song_id -> (artist_key, album_id, listen_count)
+        self.artist_songs = defaultdict(int)
+        self.short_prefix_cache = {}
+
+    # ------------------------------------------------------------------ build
+
+    def ensure_built(self):
+        if self.built and time.monotonic() - self.checked_at < self.check_interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if not self.built:
+                self.build()
+            elif now - self.checked_at >= self.check_interval:
+                if now - self.built_at >= self.max_age or self.current_watermark() != self.watermark:
+                    self.build()
+                else:
+                    self.checked_at = now
+
+    def current_watermark(self):
+        """ (số bài, id lớn nhất, số album, id lớn nhất): đổi khi process khác thêm/xoá dòng """
+        from .models import Album, Song
+
+        songs = Song.objects.aggregate(count=Count('id'), last=Max('id'))
+        albums = Album.objects.aggregate(count=Count('id'), last=Max('id'))
+        return songs['count'], songs['last'], albums['count'], albums['last']
+
+    def build(self):
+        from .models import Album, Song
+
+        with self.lock:
+            self.reset()
+            # Đọc watermark trước dữ liệu: dòng ghi xen giữa sẽ làm lần kiểm tra sau build lại
+            self.watermark = self.current_watermark()
+            keys = []
+            albums = Album.objects.values_list('id', 'name', 'artist')
+            for album_id, name, artist in albums:
+                keys.extend(self._set_item(('album', album_id), {
+                    'type': 'album', 'id': album_id, 'label': name, 'artist': artist,
+                }, name))
+            songs = Song.objects.values_list('id', 'title', 'artist', 'album_id', 'listen_count')
+            for song_id, title, artist, album_id, listen_count in songs:
+                keys.extend(self._set_item(('song', song_id), {
+                    'type': 'song', 'id': song_id, 'label': title, 'artist': artist,
+                }, title))
+                keys.extend(self._attach_song(song_id, artist, album_id, listen_count))
+            # Sắp xếp một lần thay vì insort từng key
+            keys.sort()
+            self.keys = keys
+            self.built = True
+            self.built_at = self.checked_at = time.monotonic()
+
+    # --------------------------------------------------------------- updates
+
+    def _set_item(self, item_key, payload, label):
+        """ Ghi item và trả về các key mới cần chèn (người gọi tự chèn) """
+        self.items[item_key] = payload
+        words = normalize_text(label).split()
+        new_keys = [(' '.join(words[i:]), item_key) for i in range(len(words))]
+        self.item_keys[item_key] = new_keys
+        return new_keys
+
+    def _insert(self, keys):
+        for key in keys:
+            bisect.insort(self.keys, key)
+
+    def _remove_item(self, item_key):
+        for key in self.item_keys.pop(item_key, []):
+            index = bisect.bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+        self.items.pop(item_key, None)
+        self.weights.pop(item_key, None)
+
+    def _attach_song(self, song_id, artist, album_id, listen_count):
+        """ Gắn bài hát vào artist/album của nó; trả về key của artist nếu artist mới xuất hiện """
+        artist_key = ('artist', normalize_text(artist))
+        self.songs[song_id] = (artist_key, album_id, listen_count)
+        self.weights[('song', song_id)] = listen_count
+        self.weights[artist_key] += listen_count
+        if album_id:
+            self.weights[('album', album_id)] += listen_count
+        self.artist_songs[artist_key] += 1
+        if self.artist_songs[artist_key] == 1:
+            return self._set_item(artist_key, {'type': 'artist', 'label': artist}, artist)
+        return []
+
+    def _detach_song(self, song_id):
+        artist_key, album_id, listen_count = self.songs.pop(song_id)
+        self.weights[artist_key] -= listen_count
+        if album_id and ('album', album_id) in self.items:
+            self.weights[('album', album_id)] -= listen_count
+        self.artist_songs[artist_key] -= 1
+        if self.artist_songs[artist_key] <= 0:
+            del self.artist_songs[artist_key]
+            self._remove_item(artist_key)
+
+    def update_song(self, song):
+        with self.lock:
+            if not self.built:
+                return
+            self._drop_song(song.id)
+            keys = self._set_item(('song', song.id), {
+                'type': 'song', 'id': song.id, 'label': song.title, 'artist': song.artist,
+            }, song.title)
+            keys += self._attach_song(song.id, song.artist, song.album_id, song.listen_count)
+            self._insert(keys)
+            self.short_prefix_cache.clear()
+
+    def remove_song(self, song_id):
+        with self.lock:
+            if not self.built:
+                return
+            self._drop_song(song_id)
+            self.short_prefix_cache.clear()
+
+    def _drop_song(self, song_id):
+        if song_id in self.songs:
+            self._detach_song(song_id)
+        self._remove_item(('song', song_id))
+
+    def update_album(self, album):
+        with self.lock:
+            if not self.built:
+                return
+            item_key = ('album', album.id)
+            weight = self.weights.get(item_key, 0)
+            self._remove_item(item_key)
+            self._insert(self._set_item(item_key, {
+                'type': 'album', 'id': album.id, 'label': album.name, 'artist': album.artist,
+            }, album.name))
+            self.weights[item_key] = weight
+            self.short_prefix_cache.clear()
+
+    def remove_album(self, album_id):
+        with self.lock:
+            if not self.built:
+                return
+            self._remove_item(('album', album_id))
+            self.short_prefix_cache.clear()
+
+    def add_listens(self, counts):
+        """ Cộng lượt nghe vừa flush (song_id -> số lượt) vào trọng số """
+        with self.lock:
+            if not self.built:
+                return
+            for song_id, count in counts.items():
+                if song_id not in self.songs:
+                    continue
+                artist_key, album_id, listen_count = self.songs[song_id]
+                self.songs[song_id] = (artist_key, album_id, listen_count + count)
+                self.weights[('song', song_id)] += count
+                self.weights[artist_key] += count
+                if album_id:
+                    self.weights[('album', album_id)] += count
+            self.short_prefix_cache.clear()
+
+    # ---------------------------------------------------------------- lookup
+
+    def suggest(self, query, limit=8):
+        prefix = normalize_text(query).strip()
+        if not prefix:
+            return []
+        self.ensure_built()
+
+        with self.lock:
+            cache_key = (prefix, limit)
+            if len(prefix) <= SHORT_PREFIX_LENGTH and cache_key in self.short_prefix_cache:
+                return self.short_prefix_cache[cache_key]
+
+            matches = set()
+            index = bisect.bisect_left(self.keys, (prefix,))
+            while index < len(self.keys) and self.keys[index][0].startswith(prefix):
+                matches.add(self.keys[index][1])
+                index += 1
+
+            top = heapq.nlargest(limit, matches, key=lambda item_key: (self.weights.get(item_key, 0), item_key[0] == 'song'))
+            results = [dict(self.items[item_key], weight=self.weights.get(item_key, 0)) for item_key in top]
+            if len(prefix) <= SHORT_PREFIX_LENGTH:
+                self.short_prefix_cache[cache_key] = results
+            return results
+
+
+typeahead_index = PrefixIndex(
+    check_interval=getattr(settings, 'TYPEAHEAD_CHECK_INTERVAL', 30),
+    max_age=getattr(settings, 'TYPEAHEAD_MAX_AGE', 900),
+)
+
+
+def warm_typeahead_index():
+    """
+    Build the index on a background thread when a server process starts
+    (called from ``wsgi.py`` / ``asgi.py``, never from management commands
+    or migrations), so the first suggestion request does not pay for the
+    build. Requests arriving meanwhile wait on the index lock; if the warm-up
+    fails, ensure_built() still builds lazily on first use.
+    """
+    if getattr(settings, 'TYPEAHEAD_WARM_ON_STARTUP', True):
+        threading.Thread(target=_warm_index, daemon=True).start()
+
+
+def _warm_index():
+    try:
+        typeahead_index.ensure_built()
+    except DatabaseError:
+        logger.exception('Could not warm the typeahead index')
+    finally:
+        # Connection của thread này không được dùng lại
+        connection.close()
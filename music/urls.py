@@ -1,7 +1,17 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from . import views
 from .views import album_list, album_detail, song_list, song_detail, song_list_by_album
 from .views import AddSongToPlaylist, RemoveSongFromPlaylist, FavoriteSongView, StreamAudioView, FavoriteSongListView, PlaylistView, PlaylistSongsView, PlaylistDetailView, TopSongsView, get_all_videos, get_video,stream_video, delete_playlist
+from .views import stream_audio_async, stream_video_async
+
+# Dưới ASGI dùng view async để một worker phục vụ được nhiều stream cùng lúc
+if settings.ASYNC_STREAMING:
+    stream_audio_view = stream_audio_async
+    stream_video_view = stream_video_async
+else:
+    stream_audio_view = StreamAudioView.as_view()
+    stream_video_view = stream_video
 
 urlpatterns = [
     path('albums/', album_list, name='album-list'),
@@ -10,19 +20,28 @@ urlpatterns = [
     path('songs/<int:song_id>/', song_detail, name='song-detail'),
     path('playlists/<int:playlist_id>/add_song/', AddSongToPlaylist.as_view(), name='add-song-to-playlist'),
     path('playlists/<int:playlist_id>/remove_song/', RemoveSongFromPlaylist.as_view(), name='remove-song-from-playlist'),
+    path('playlists/<int:playlist_id>/add_songs/', views.AddSongsToPlaylist.as_view(), name='add-songs-to-playlist'),
+    path('playlists/<int:playlist_id>/remove_songs/', views.RemoveSongsFromPlaylist.as_view(), name='remove-songs-from-playlist'),
+    path('playlists/<int:playlist_id>/replace_songs/', views.ReplacePlaylistSongs.as_view(), name='replace-playlist-songs'),
     path('favorite_songs/', FavoriteSongView.as_view(), name='favorite-song'),
     path('albums/<int:album_id>/songs/', song_list_by_album, name='song-list-by-album'),
-    path('stream/<int:song_id>/', StreamAudioView.as_view(), name='stream_audio'),
+    path('stream/<int:song_id>/', stream_audio_view, name='stream_audio'),
+    path('stream-urls/', views.stream_urls, name='stream-urls'),
     path('playlists/', PlaylistView.as_view(), name='playlist-list-create'),
     path('playlists/<int:playlist_id>/delete/', delete_playlist, name='delete_playlist'),
     path('playlists/<int:playlist_id>/songs/', PlaylistSongsView.as_view(), name='playlist-songs'),
     path('playlists/<int:playlist_id>/', PlaylistDetailView.as_view(), name='playlist-detail'),
     path('favorite_songs/list/', FavoriteSongListView.as_view(), name='favorite-songs-list'),
     path('songs/top/', TopSongsView.as_view(), name='top-songs'),
+    path('artists/<int:artist_id>/', views.artist_detail, name='artist-detail'),
+    path('artists/<int:artist_id>/top-tracks/', views.artist_top_tracks, name='artist-top-tracks'),
     path('search', views.search, name='search'),
+    path('suggest', views.suggest, name='suggest'),
+    path('cache/stats/', views.response_cache_stats, name='response-cache-stats'),
     path('videos/', get_all_videos, name='get_all_videos'),
     path('videos/<int:video_id>/', get_video, name='get_video'),
-    path('videos/<int:id>/stream/', stream_video, name='stream_video')
+    path('videos/<int:id>/stream/', stream_video_view, name='stream_video'),
+    re_path(r'^videos/(?P<id>\d+)/hls/(?P<name>(?:[\w-]+/)?[\w-]+\.(?:m3u8|ts))$', views.video_hls, name='video_hls'),
 
 
 
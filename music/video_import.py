@@ -0,0 +1,145 @@
+import os
+import shutil
+
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .cover_store import build_variants
+from .hls import HLSError, build_hls
+from .models import Video
+
+VIDEO_RAW_DIR = 'media/video_raw'     # Nơi chứa video gốc cần xử lý
+VIDEO_DEST_DIR = 'videos'             # upload_to của Video.video_file
+THUMBNAIL_DIR = 'thumbnails'          # upload_to của Video.thumbnail
+SUPPORTED_EXTENSIONS = ('.mp4', '.mov', '.mkv')
+THUMBNAIL_QUALITY = 85
+
+
+class VideoExists(Exception):
+    pass
+
+
+def ensure_video_dirs():
+    # Đảm bảo các thư mục đích tồn tại
+    for directory in [VIDEO_DEST_DIR, THUMBNAIL_DIR]:
+        os.makedirs(default_storage.path(directory), exist_ok=True)
+
+
+def video_title(source_path):
+    return os.path.splitext(os.path.basename(source_path))[0]
+
+
+# ------------------------------------------------------------------------
+# Giải mã: chạy trong process pool nên chỉ dùng hàm cấp module, không đụng DB
+
+def prepare_video(source_path):
+    """
+    Open the clip once (video stream only), read its duration and size, and
+    decode a single frame that is written straight to the thumbnail and its
+    variants. The decoder is always closed, also when a step fails.
+    """
+    from moviepy import VideoFileClip
+
+    title = video_title(source_path)
+    with VideoFileClip(source_path, audio=False) as clip:
+        duration = clip.duration
+        size = tuple(clip.size)
+        # Frame ở giây thứ 2 (hoặc giữa video nếu video ngắn hơn)
+        frame = clip.get_frame(min(2.0, duration / 2))
+
+    img = Image.fromarray(frame).convert('RGB')
+    thumbnail_name = default_storage.get_available_name(f'{THUMBNAIL_DIR}/{title}_thumbnail.jpg')
+    img.save(default_storage.path(thumbnail_name), 'JPEG', quality=THUMBNAIL_QUALITY)
+    # Các bản thumbnail nhỏ (WebP/AVIF) cho danh sách video, dùng lại frame đã giải mã
+    build_variants(thumbnail_name, img)
+
+    return {
+        'path': source_path,
+        'title': title,
+        'duration_ms': round(duration * 1000),
+        'size': size,
+        'thumbnail': thumbnail_name,
+    }
+
+
+def read_video_file(source_path):
+    """ Bản của prepare_video cho process pool: lỗi trả về {'error': ...} thay vì raise """
+    try:
+        return prepare_video(source_path)
+    except Exception as e:
+        return {'path': source_path, 'title': video_title(source_path), 'error': str(e)}
+
+
+def segment_video(video_id, video_path, size):
+    """ Chạy trong process pool: cắt HLS cho một video, trả về (id, playlist, lỗi) """
+    try:
+        return video_id, build_hls(video_path, video_id, size), None
+    except HLSError as e:
+        return video_id, '', str(e)
+
+
+# ------------------------------------------------------------------------
+# Đặt file vào MEDIA_ROOT và ghi DB
+
+def move_into_storage(source_path, directory):
+    """
+    Move ``source_path`` into ``directory`` of the media storage and return
+    its storage name. On the same filesystem this is a hardlink plus unlink
+    (a rename that never overwrites an existing file), so no bytes are
+    copied; across filesystems it falls back to copy + delete.
+    """
+    name = default_storage.get_available_name(f'{directory}/{os.path.basename(source_path)}')
+    destination = default_storage.path(name)
+    try:
+        os.link(source_path, destination)
+    except OSError:
+        # Khác filesystem (EXDEV) hoặc filesystem không hỗ trợ hardlink
+        shutil.move(source_path, destination)
+    else:
+        os.remove(source_path)
+    return name
+
+
+def save_video(prepared):
+    """
+    Create the Video row for the result of prepare_video, moving the source
+    file out of video_raw. Raises VideoExists if the title is taken; if the
+    insert fails the file is moved back so the next run can retry it.
+    """
+    if Video.objects.filter(title=prepared['title']).exists():
+        default_storage.delete(prepared['thumbnail'])
+        raise VideoExists(prepared['title'])
+
+    video_name = move_into_storage(prepared['path'], VIDEO_DEST_DIR)
+    try:
+        return Video.objects.create(
+            title=prepared['title'],
+            duration_ms=prepared['duration_ms'],
+            video_file=video_name,
+            thumbnail=prepared['thumbnail'],
+        )
+    except Exception:
+        shutil.move(default_storage.path(video_name), prepared['path'])
+        raise
+
+
+def import_video_file(source_path, segment_hls=False):
+    """
+    Import một video gốc trong process hiện tại (dùng cho watch_media): tạo
+    thumbnail, lưu Video, cắt HLS nếu có ffmpeg. Trả về (video, lỗi HLS hoặc
+    None); raise VideoExists nếu đã có video cùng tên.
+    """
+    title = video_title(source_path)
+    if Video.objects.filter(title=title).exists():
+        raise VideoExists(title)
+
+    prepared = prepare_video(source_path)
+    video = save_video(prepared)
+
+    # Cắt video thành các segment HLS ở nhiều độ phân giải
+    hls_error = None
+    if segment_hls:
+        _, video.hls_playlist, hls_error = segment_video(video.id, video.video_file.path, prepared['size'])
+        if not hls_error:
+            video.save(update_fields=['hls_playlist'])
+    return video, hls_error
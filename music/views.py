@@ -1,30 +1,51 @@
+import hashlib
 import mimetypes
 import os
-import re
+from urllib.parse import urlencode
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from .models import Song, Album, Playlist, FavoriteSong, PlaylistSong, Video
-from .serializers import SongSerializer, AlbumSerializer, PlaylistSerializer, VideoSerializer
-from django.http import JsonResponse, StreamingHttpResponse
+from .models import Artist, Song, Album, Playlist, FavoriteSong, PlaylistSong, Video
+from .serializers import ArtistSerializer, SongSerializer, AlbumSerializer, PlaylistSerializer, VideoSerializer
+from .streaming import deliver_file, is_new_playback
+from .listen_events import record_playback
+from .hls import MASTER_PLAYLIST, add_playlist_query, hls_output_dir
+from .renditions import add_rendition_headers, audio_file_path, audio_source, select_bitrate
+from .stream_signing import StreamSignatureError, signed_hls_url, signed_stream_url, stream_url_ttl, verify_stream
+from .pagination import KeysetPagination
+from .playlist_batch import PlaylistBatchError, add_songs, clean_song_ids, remove_songs, replace_songs
+from .search import get_search_backend
+from .typeahead import typeahead_index
+from .response_cache import cache_response, cache_stats
+from .artists import artist_key
+from .leaderboards import WINDOWS, get_leaderboard, leaderboard_size
+from .media_urls import IMMUTABLE_CACHE_CONTROL, resolve_media_path
+from .conditional import etag_matches, not_modified, set_validators, watermark_etag
+from django.utils.decorators import method_decorator
+from django.http import JsonResponse
 from django.conf import settings
-from rest_framework.response import Response
-from django.http import FileResponse, Http404
-from django.db.models import F, Q
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.utils._os import safe_join
+from django.db.models import Count, Max, Sum
 
 
 
 
+@cache_response('album')
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])  
 def album_list(request):
     if request.method == 'GET':
-        albums = Album.objects.all()
+        paginator = KeysetPagination(ordering='created_at')
+        albums = paginator.paginate_queryset(Album.objects.all(), request)
         serializer = AlbumSerializer(albums, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     elif request.method == 'POST':
         serializer = AlbumSerializer(data=request.data)
         if serializer.is_valid():
@@ -53,13 +74,15 @@ def album_detail(request, album_id):
         album.delete()
         return Response({"message": "Album deleted"}, status=status.HTTP_204_NO_CONTENT)
 
+@cache_response('song')
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])  
 def song_list(request):
     if request.method == 'GET':
-        songs = Song.objects.all()
+        paginator = KeysetPagination(ordering='created_at')
+        songs = paginator.paginate_queryset(Song.objects.all(), request)
         serializer = SongSerializer(songs, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     elif request.method == 'POST':  
         serializer = SongSerializer(data=request.data)
         if serializer.is_valid():
@@ -87,6 +110,7 @@ def song_detail(request, song_id):
     elif request.method == 'DELETE':
         song.delete()
         return Response({"message": "Song deleted"}, status=status.HTTP_204_NO_CONTENT)
+@cache_response('album', 'song')
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def song_list_by_album(request, album_id):
@@ -98,6 +122,32 @@ def song_list_by_album(request, album_id):
     except Album.DoesNotExist:
         return Response({"error": "Album not found"}, status=status.HTTP_404_NOT_FOUND)
 
+@cache_response('artist', 'album')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def artist_detail(request, artist_id):
+    """ Trang nghệ sĩ + discography (album mới nhất trước), đọc theo index (primary_artist, -created_at) """
+    artist = get_object_or_404(Artist, id=artist_id)
+    albums = Album.objects.filter(primary_artist=artist).order_by('-created_at')
+    data = ArtistSerializer(artist).data
+    data['albums'] = AlbumSerializer(albums, many=True, context={'request': request}).data
+    return Response(data)
+
+
+@cache_response('artist', 'song', 'leaderboard', 'listens')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def artist_top_tracks(request, artist_id):
+    """ Các bài nghe nhiều nhất của nghệ sĩ, đọc theo index (primary_artist, -listen_count) """
+    artist = get_object_or_404(Artist, id=artist_id)
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    songs = Song.objects.filter(primary_artist=artist).order_by('-listen_count')[:limit]
+    serializer = SongSerializer(songs, many=True, context={'request': request})
+    return Response(serializer.data)
+
 ############################################################################
 
 class PlaylistView(APIView):
@@ -113,26 +163,41 @@ class PlaylistView(APIView):
         return Response(PlaylistSerializer(playlist).data, status=status.HTTP_201_CREATED)
     def get(self, request):
         user = request.user
-        playlists = Playlist.objects.filter(user=user).order_by('-created_at')
+        # Thêm/bớt bài làm đổi track_count/total_duration_ms (và tăng version) mà không đổi created_at
+        watermark = Playlist.objects.filter(user=user).aggregate(
+            count=Count('id'), latest=Max('created_at'),
+            tracks=Sum('track_count'), duration=Sum('total_duration_ms'), versions=Sum('version'),
+        )
+        etag = watermark_etag(request, watermark.values())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        paginator = KeysetPagination(ordering='-created_at')
+        playlists = paginator.paginate_queryset(Playlist.objects.filter(user=user), request)
         serializer = PlaylistSerializer(playlists, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return set_validators(paginator.get_paginated_response(serializer.data), etag)
 
 class PlaylistSongsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, playlist_id):
         user = request.user
-        playlist = Playlist.objects.filter(id=playlist_id, user=user).first()
+        # Một query: vừa kiểm tra quyền sở hữu vừa lấy watermark (version) của playlist
+        playlist = Playlist.objects.filter(id=playlist_id, user=user).only('id', 'version').first()
 
         if not playlist:
             return Response({"detail": "Playlist not found or you are not the owner"}, status=status.HTTP_404_NOT_FOUND)
 
+        etag = watermark_etag(request, (playlist.version,), 'song')
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
         # Lấy các bài hát thông qua bảng trung gian PlaylistSong
         playlist_songs = PlaylistSong.objects.filter(playlist=playlist).select_related('song')
         songs = [ps.song for ps in playlist_songs]
         serializer = SongSerializer(songs, many=True, context={'request': request})
         
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return set_validators(Response(serializer.data, status=status.HTTP_200_OK), etag)
 class PlaylistDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -188,6 +253,35 @@ class RemoveSongFromPlaylist(APIView):
 
         playlist_song.delete()
         return Response({"detail": "Song removed from playlist"}, status=status.HTTP_200_OK)
+
+
+class PlaylistBatchView(APIView):
+    """ Thêm / xoá / thay các bài của playlist theo danh sách ``song_ids``, số query không phụ thuộc độ dài """
+    permission_classes = [IsAuthenticated]
+    allow_empty = False
+
+    def post(self, request, playlist_id):
+        try:
+            song_ids = clean_song_ids(request.data.get('song_ids'), allow_empty=self.allow_empty)
+            result = self.apply(playlist_id, request.user, song_ids)
+        except PlaylistBatchError as e:
+            return Response({"detail": str(e), "song_ids": e.song_ids}, status=status.HTTP_400_BAD_REQUEST)
+        if result is None:
+            return Response({"detail": "Playlist not found or you're not the owner"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class AddSongsToPlaylist(PlaylistBatchView):
+    apply = staticmethod(add_songs)
+
+
+class RemoveSongsFromPlaylist(PlaylistBatchView):
+    apply = staticmethod(remove_songs)
+
+
+class ReplacePlaylistSongs(PlaylistBatchView):
+    allow_empty = True
+    apply = staticmethod(replace_songs)
   
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
@@ -240,26 +334,54 @@ class FavoriteSongListView(APIView):
 
     def get(self, request):
         user = request.user
-        favorite_song_ids = FavoriteSong.objects.filter(user=user).values_list('song_id', flat=True)
-        songs = Song.objects.filter(id__in=favorite_song_ids)
+        watermark = FavoriteSong.objects.filter(user=user).aggregate(count=Count('id'), latest=Max('added_at'))
+        etag = watermark_etag(request, watermark.values(), 'song')
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        # Phân trang theo thời điểm thêm vào yêu thích, bài mới thêm lên đầu
+        paginator = KeysetPagination(ordering='-added_at')
+        favorites = paginator.paginate_queryset(
+            FavoriteSong.objects.filter(user=user).select_related('song'), request
+        )
+        songs = [favorite.song for favorite in favorites]
         serializer = SongSerializer(songs, many=True, context={'request': request})
         
-        return Response(serializer.data)  
+        return set_validators(paginator.get_paginated_response(serializer.data), etag)
 
 @permission_classes([AllowAny])
 class StreamAudioView(APIView):
+    def perform_authentication(self, request):
+        # Xác thực lười: URL đã ký không cần Token/User, request.user chỉ được đọc khi ghi lượt nghe
+        pass
+
     def get(self, request, song_id):
         try:
-            song = Song.objects.get(id=song_id)
-
-            Song.objects.filter(id=song.id).update(listen_count=F('listen_count') + 1)
-
-            audio_path = song.audio_file.path
-
-            response = FileResponse(open(audio_path, 'rb'))
-            response['Content-Type'] = 'audio/mpeg'  
-            response['Accept-Ranges'] = 'bytes'
+            signed = verify_stream(request, 'song', song_id)
+        except StreamSignatureError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        if signed is None:
+            # URL chưa ký: xác thực như APIView thường, ngoài khối try bên dưới để token sai
+            # thành 401 của DRF thay vì lỗi 500 khi record_playback đọc request.user
+            super().perform_authentication(request)
+        try:
+            if signed is not None:
+                # URL đã ký mang sẵn tên file và rendition: không query Song
+                bitrate, user_id = signed['r'], signed['u']
+                audio_path, content_type = audio_file_path(song_id, signed['f'], bitrate)
+            else:
+                song = Song.objects.only('id', 'audio_file', 'renditions').get(id=song_id)
+                audio_path, content_type, bitrate = audio_source(request, song)
+                user_id = None
+
+            response = deliver_file(request, audio_path, content_type=content_type)
+            add_rendition_headers(response, bitrate)
             response['Access-Control-Allow-Origin'] = '*'  
+            response['Access-Control-Expose-Headers'] = 'Accept-Ranges, Content-Length, Content-Range, ETag, X-Audio-Bitrate'
+
+            # Chỉ tính lượt nghe khi bắt đầu phát, không tính khi tua hoặc 304
+            if is_new_playback(request):
+                record_playback(request, song_id, bitrate, user_id=user_id)
 
             return response
 
@@ -268,8 +390,77 @@ class StreamAudioView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
+
+async def stream_audio_async(request, song_id):
+    """ Phiên bản async của StreamAudioView, dùng khi chạy dưới ASGI (ASYNC_STREAMING) """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        signed = verify_stream(request, 'song', song_id)
+    except StreamSignatureError as e:
+        return JsonResponse({'error': str(e)}, status=403)
+
+    if signed is not None:
+        bitrate, user_id = signed['r'], signed['u']
+        audio_path, content_type = audio_file_path(song_id, signed['f'], bitrate)
+    else:
+        try:
+            song = await Song.objects.only('id', 'audio_file', 'renditions').aget(id=song_id)
+        except Song.DoesNotExist:
+            raise Http404("Song does not exist")
+        audio_path, content_type, bitrate = audio_source(request, song)
+        user_id = None
+
+    response = deliver_file(request, audio_path, content_type=content_type, asynchronous=True)
+    add_rendition_headers(response, bitrate)
+    response['Access-Control-Allow-Origin'] = '*'
+    response['Access-Control-Expose-Headers'] = 'Accept-Ranges, Content-Length, Content-Range, ETag, X-Audio-Bitrate'
+
+    if is_new_playback(request):
+        await sync_to_async(record_playback)(request, song_id, bitrate, user_id=user_id)
+
+    return response
+
         
+
+def parse_id_list(value, limit=200):
+    """ "1,2,3" -> [1, 2, 3]; bỏ phần tử không phải số, tối đa ``limit`` id """
+    return [int(part) for part in value.split(',') if part.strip().isdigit()][:limit]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stream_urls(request):
+    """
+    Signed, expiring stream URLs for ``?songs=1,2,3`` and/or ``?videos=4,5``,
+    and HLS master playlists for ``?hls=4,5`` (videos with a built ladder).
+    The rendition is chosen now (``?quality``, ``?bitrate``, client hints)
+    and fixed in the signature, so the stream views never query the row.
+    """
+    songs = Song.objects.only('id', 'audio_file', 'renditions').filter(id__in=parse_id_list(request.GET.get('songs', '')))
+    videos = Video.objects.only('id', 'video_file').filter(id__in=parse_id_list(request.GET.get('videos', '')))
+    hls_videos = Video.objects.filter(id__in=parse_id_list(request.GET.get('hls', ''))).exclude(hls_playlist='')
+    ttl = stream_url_ttl()
+    return Response({
+        'expires_in': ttl,
+        'songs': {
+            song.id: signed_stream_url('song', song.id, request.user.pk, song.audio_file.name,
+                                       select_bitrate(request, song.renditions), ttl)
+            for song in songs
+        },
+        'videos': {
+            video.id: signed_stream_url('video', video.id, request.user.pk, video.video_file.name, ttl=ttl)
+            for video in videos
+        },
+        'hls': {
+            video_id: signed_hls_url(video_id, request.user.pk, ttl)
+            for video_id in hls_videos.values_list('id', flat=True)
+        },
+    })
+
+
 @permission_classes([AllowAny])
+@method_decorator(cache_response('song'), name='dispatch')
 class SongsByAlbum(APIView):
     def get(self, request, album_id):
         songs = Song.objects.filter(album_id=album_id)
@@ -277,12 +468,36 @@ class SongsByAlbum(APIView):
         return Response(serializer.data)
     
 @permission_classes([AllowAny])
+@method_decorator(cache_response('song', 'leaderboard', 'listens'), name='dispatch')
 class TopSongsView(APIView):
 
     def get(self, request):
-        top_songs = Song.objects.all().order_by('-listen_count')[:20]
-        serializer = SongSerializer(top_songs, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        """ Top bài hát theo window (day/week/month/all), có thể lọc theo nghệ sĩ; đọc bảng đã tính sẵn """
+        window = request.GET.get('window', 'all')
+        if window not in WINDOWS:
+            return Response({"detail": f"window must be one of: {', '.join(WINDOWS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), leaderboard_size())
+        except ValueError:
+            limit = 20
+
+        # Chỉ nghệ sĩ có thật mới có bảng riêng (theo id): tên lạ trả 404, không tạo bảng rác
+        artist_id = None
+        name_key = artist_key(request.GET.get('artist', ''))
+        if name_key:
+            artist_id = get_object_or_404(Artist.objects.only('id'), name_key=name_key).id
+
+        board = get_leaderboard(window, artist_id)
+        etag = watermark_etag(request, (board.computed_at,), 'song', 'listens', per_user=False)
+        if etag_matches(request, etag):
+            return not_modified(etag, 'no-cache')
+
+        entries = board.entries[:limit]
+        songs = Song.objects.in_bulk([song_id for song_id, _ in entries])
+        ranked = [(songs[song_id], plays) for song_id, plays in entries if song_id in songs]
+        serializer = SongSerializer([song for song, _ in ranked], many=True, context={'request': request})
+        data = [dict(item, plays=plays) for item, (_, plays) in zip(serializer.data, ranked)]
+        return set_validators(Response(data, status=status.HTTP_200_OK), etag, 'no-cache')
     
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -291,15 +506,8 @@ def search(request):
     if not query:
         return Response({'songs': [], 'albums': []})
     
-    songs = Song.objects.filter(
-        Q(title__icontains=query) | 
-        Q(artist__icontains=query)
-    )[:10]  
-    
-    albums = Album.objects.filter(name__icontains=query)[:10]
-    
-    songs_by_album = Song.objects.filter(album__name__icontains=query)
-    songs = (songs | songs_by_album).distinct()[:10]  # Kết hợp và loại bỏ trùng lặp
+    # Tìm theo tên bài, nghệ sĩ và tên album; không phân biệt dấu, xếp theo độ liên quan
+    songs, albums = get_search_backend().search(query, limit=10)
     
     return Response({
         'songs': SongSerializer(songs, many=True).data,
@@ -307,13 +515,26 @@ def search(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def suggest(request):
+    """ Gợi ý khi đang gõ: tra trong index prefix trong bộ nhớ; DB chỉ bị hỏi watermark theo chu kỳ """
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    return Response({'suggestions': typeahead_index.suggest(query, limit)})
+
 
+@cache_response('video')
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_all_videos(request):
-    videos = Video.objects.all().order_by('-created_at')
+    paginator = KeysetPagination(ordering='-created_at')
+    videos = paginator.paginate_queryset(Video.objects.all(), request)
     serializer = VideoSerializer(videos, many=True)
-    return Response(serializer.data)
+    return paginator.get_paginated_response(serializer.data)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -322,62 +543,122 @@ def get_video(request, id):
     serializer = VideoSerializer(video)
     return Response(serializer.data)
 
-def video_stream_generator(video_path, chunk_size=8192):
-    with open(video_path, 'rb') as video_file:
-        while True:
-            chunk = video_file.read(chunk_size)
-            if not chunk:
-                break
-            yield chunk
-
 @api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def stream_video(request, id):
-    video = get_object_or_404(Video, id=id)
-    video_path = video.video_file.path
-    
-    file_size = os.path.getsize(video_path)
+    try:
+        signed = verify_stream(request, 'video', id)
+    except StreamSignatureError as e:
+        return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+    if signed is not None:
+        video_path = default_storage.path(signed['f'])
+    else:
+        video = get_object_or_404(Video, id=id)
+        video_path = video.video_file.path
     
     content_type, _ = mimetypes.guess_type(video_path)
     if not content_type:
         content_type = 'video/mp4'  
-    
-    range_header = request.META.get('HTTP_RANGE', '').strip()
-    range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
-    
-    if range_match:
-        start = int(range_match.group(1))
-        end = int(range_match.group(2)) if range_match.group(2) else file_size - 1
-        
-        end = min(end, file_size - 1)
-        length = end - start + 1
-        
-        response = StreamingHttpResponse(
-            streaming_content=ranged_video_stream(video_path, start, end),
-            status=206,
-            content_type=content_type
-        )
-        response['Accept-Ranges'] = 'bytes'
-        response['Content-Length'] = str(length)
-        response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+
+    return deliver_file(request, video_path, content_type)
+
+
+async def stream_video_async(request, id):
+    """ Phiên bản async của stream_video, dùng khi chạy dưới ASGI (ASYNC_STREAMING) """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        signed = verify_stream(request, 'video', id)
+    except StreamSignatureError as e:
+        return JsonResponse({'error': str(e)}, status=403)
+
+    if signed is not None:
+        video_path = default_storage.path(signed['f'])
     else:
-        response = StreamingHttpResponse(
-            streaming_content=video_stream_generator(video_path),
-            content_type=content_type
-        )
-        response['Accept-Ranges'] = 'bytes'
-        response['Content-Length'] = str(file_size)
-    
+        try:
+            video = await Video.objects.only('id', 'video_file').aget(id=id)
+        except Video.DoesNotExist:
+            raise Http404("Video does not exist")
+        video_path = video.video_file.path
+
+    content_type, _ = mimetypes.guess_type(video_path)
+    if not content_type:
+        content_type = 'video/mp4'
+
+    return deliver_file(request, video_path, content_type, asynchronous=True)
+
+
+HLS_CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def video_hls(request, id, name):
+    """
+    Phục vụ master playlist, playlist từng rendition và các segment HLS.
+    Đường dẫn suy ra trực tiếp từ id nên không cần truy vấn DB. Rendition
+    nằm trong thư mục mang build id (build_hls) nên được cache immutable;
+    master playlist giữ tên cố định qua các lần build nên client phải hỏi
+    lại bằng ETag. Chữ ký (``?sig=`` từ
+    signed_hls_url) áp dụng cho cả thư mục HLS của video và được gắn tiếp
+    vào mọi URI trong playlist trả về.
+    """
+    try:
+        signed = verify_stream(request, 'hls', id)
+    except StreamSignatureError as e:
+        # Thiếu chữ ký là chưa xác thực (401); chữ ký sai hoặc hết hạn là 403 như các view stream khác
+        code = status.HTTP_403_FORBIDDEN if request.GET.get('sig') else status.HTTP_401_UNAUTHORIZED
+        return Response({'error': str(e)}, status=code)
+
+    path = os.path.join(hls_output_dir(id), name)
+    if not os.path.isfile(path):
+        raise Http404("HLS file does not exist")
+
+    extension = os.path.splitext(name)[1]
+    cache_control = 'public, no-cache' if name == MASTER_PLAYLIST else IMMUTABLE_CACHE_CONTROL
+    if signed is not None and extension == '.m3u8':
+        with open(path) as f:
+            content = add_playlist_query(f.read(), urlencode({'sig': request.GET['sig']}))
+        etag = '"%s"' % hashlib.sha1(content.encode()).hexdigest()
+        if etag_matches(request, etag):
+            response = not_modified(etag, cache_control)
+        else:
+            response = set_validators(HttpResponse(content, content_type=HLS_CONTENT_TYPES[extension]), etag, cache_control)
+    else:
+        response = deliver_file(request, path, HLS_CONTENT_TYPES[extension])
+        response['Cache-Control'] = cache_control
+    response['Access-Control-Allow-Origin'] = '*'
     return response
 
-def ranged_video_stream(path, start, end, chunk_size=8192):
-    with open(path, 'rb') as f:
-        f.seek(start)
-        remaining = end - start + 1
-        while remaining > 0:
-            bytes_to_read = min(chunk_size, remaining)
-            data = f.read(bytes_to_read)
-            if not data:
-                break
-            remaining -= len(data)
-            yield data
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """ Thống kê hit/miss của cache response cho các API public """
+    return Response(cache_stats())
+
+
+def media_file(request, path):
+    """
+    Phục vụ ảnh trong MEDIA_ROOT (bìa, ảnh album, thumbnail); URL có fingerprint/hash
+    được cache 1 năm (immutable). File khác trả 404: nhạc và video chỉ qua các view stream.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    name, immutable = resolve_media_path(path)
+    if name is None:
+        raise Http404("File does not exist")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404("File does not exist")
+    if not os.path.isfile(full_path):
+        raise Http404("File does not exist")
+
+    response = deliver_file(request, full_path)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else 'no-cache'
+    return response
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'spotify_clone.settings')
+os.environ.setdefault('ASYNC_STREAMING', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from music.streaming import ClientDisconnectMiddleware  # noqa: E402
+from music.typeahead import warm_typeahead_index  # noqa: E402
+
+application = ClientDisconnectMiddleware(django_application)
+warm_typeahead_index()
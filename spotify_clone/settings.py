@@ -16,6 +16,41 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Địa chỉ public của API và của media (đặt MEDIA_BASE_URL là domain CDN nếu có)
+SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
+MEDIA_BASE_URL = os.environ.get('MEDIA_BASE_URL', f'{SITE_URL}{MEDIA_URL}')
+
+# Cách gửi file audio/video sau khi Django đã kiểm tra request:
+# 'django' (tự stream, dùng khi dev), 'nginx' (X-Accel-Redirect), 'sendfile' (X-Sendfile cho Apache/lighttpd)
+MEDIA_DELIVERY_BACKEND = os.environ.get('MEDIA_DELIVERY_BACKEND', 'django')
+# Location "internal" của nginx trỏ vào MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# HLS cho video: ffmpeg dùng khi import_videos, độ dài segment (giây) và ladder các rendition
+FFMPEG_BINARY = 'ffmpeg'
+HLS_SEGMENT_SECONDS = 4
+HLS_RENDITIONS = [
+    # (tên, chiều cao, video bitrate, audio bitrate)
+    ('360p', 360, '800k', '96k'),
+    ('720p', 720, '2800k', '128k'),
+    ('1080p', 1080, '5000k', '192k'),
+]
+# Các bitrate AAC (kbps) được transcode khi import_songs; StreamAudioView chọn theo ?quality / ?bitrate / client hints
+AUDIO_RENDITION_BITRATES = [96, 160, 320]
+# Backend tìm kiếm: mặc định PostgresSearchBackend trên PostgreSQL, PythonSearchBackend trên DB khác (SQLite khi test)
+# SEARCH_BACKEND = 'music.search.PythonSearchBackend'
+# Cache response của các API catalog public: 'file' (entry và version dùng chung giữa các worker và
+# management command trên cùng máy) hoặc 'locmem' (mỗi process một bản, chỉ dùng khi chạy một process)
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'file')
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Tuổi tối đa (giây) của mỗi entry, kể cả khi không có ai bump version
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_DIR = BASE_DIR / '.response_cache'
+# Dùng view stream async (asgi.py bật mặc định khi chạy dưới ASGI)
+ASYNC_STREAMING = os.environ.get('ASYNC_STREAMING') == '1'
+# Stream URL có chữ ký (music.stream_signing, lấy ở /api/music/stream-urls/): thời gian sống (giây),
+# và có bắt buộc chữ ký ở view stream hay không (False: URL không ký vẫn phát được như trước)
+STREAM_URL_TTL = 3600
+STREAM_SIGNED_URLS_REQUIRED = os.environ.get('STREAM_SIGNED_URLS_REQUIRED') == '1'
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +78,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',  # API
     'rest_framework.authtoken',
     'users',
@@ -112,12 +148,19 @@ JAZZMIN_SETTINGS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication + LRU trong process (users.authentication), không query Token/User mỗi request
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
+# Số token đã xác thực giữ trong cache của mỗi process và thời gian sống (giây). Đăng xuất / đổi
+# mật khẩu xoá ngay trong process xử lý request đó; các worker khác chậm tối đa TOKEN_CACHE_TTL
+TOKEN_CACHE_MAX_ENTRIES = 10000
+TOKEN_CACHE_TTL = 60
+# Số bản ghi mặc định mỗi trang của các API danh sách (client đổi bằng ?limit=, tối đa 200)
+API_PAGE_SIZE = 50
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
@@ -171,6 +214,33 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'users.User'
 
+# Lượt nghe được gom trong bộ nhớ và ghi xuống DB theo lô.
+# LISTEN_COUNT_FLUSH_INTERVAL: số giây tối đa listen_count được phép trễ (0 = ghi ngay)
+# LISTEN_COUNT_FLUSH_THRESHOLD: số lượt nghe đang chờ thì flush sớm
+LISTEN_COUNT_FLUSH_INTERVAL = 5
+LISTEN_COUNT_FLUSH_THRESHOLD = 500
+# Ảnh bìa/thumbnail được tạo thêm các bản nhỏ theo các chiều rộng (px) và định dạng này (music.cover_store)
+IMAGE_VARIANT_WIDTHS = [64, 160, 320]
+IMAGE_VARIANT_FORMATS = ['AVIF', 'WEBP', 'JPEG']
+# Manifest (size + mtime) của các file đã import, để import_songs chạy lại chỉ xử lý file mới/đã đổi
+IMPORT_MANIFEST_DIR = BASE_DIR / '.import_manifest'
+# Lịch sử lượt phát (music.listen_events): ghi theo lô như listen_count,
+# event thô giữ LISTEN_EVENT_RETENTION_DAYS ngày rồi được nén thành thống kê theo ngày
+LISTEN_EVENT_FLUSH_INTERVAL = 5
+LISTEN_EVENT_FLUSH_THRESHOLD = 1000
+LISTEN_EVENT_RETENTION_DAYS = 90
+LISTEN_ROLLUP_RETENTION_DAYS = 730
+# Index gợi ý (music.typeahead) trong mỗi process: số giây giữa hai lần so watermark với DB để thấy
+# bài/album do process khác ghi (import_songs, watch_media), và tuổi tối đa trước khi build lại toàn bộ
+TYPEAHEAD_CHECK_INTERVAL = 30
+TYPEAHEAD_MAX_AGE = 900
+# Build index trên thread nền khi server (wsgi/asgi) khởi động thay vì ở request gợi ý đầu tiên
+TYPEAHEAD_WARM_ON_STARTUP = True
+# Bảng xếp hạng theo thời gian (music.leaderboards): số bài giữ trong mỗi bảng
+# và số giây tối đa một bảng được phép cũ trước khi tính lại
+LEADERBOARD_SIZE = 100
+LEADERBOARD_REFRESH_INTERVALS = {'day': 60, 'week': 600, 'month': 3600, 'all': 60}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
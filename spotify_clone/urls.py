@@ -15,10 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.http import JsonResponse
 from django.conf import settings
-from django.conf.urls.static import static
+from music.views import media_file
 
 def home(request):
     return JsonResponse({"message": "Welcome to Spotify Clone API!"})
@@ -30,7 +30,10 @@ urlpatterns = [
     path('api/music/', include('music.urls')),  # Music API
     
 ]
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media có fingerprint (/media/v/<hash>/...) và cover đặt tên theo hash được cache vĩnh viễn
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', media_file, name='media'),
+]
 
 
 
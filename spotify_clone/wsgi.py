@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'spotify_clone.settings')
 
 application = get_wsgi_application()
+
+from music.typeahead import warm_typeahead_index  # noqa: E402
+
+warm_typeahead_index()
@@ -1,18 +1,28 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from music.models import Song, Album, Playlist, PlaylistSong, FavoriteSong, Video
+from music.models import Artist, Song, Album, Playlist, PlaylistSong, FavoriteSong, Video
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# -------------------------
+# Artist Admin
+# -------------------------
+@admin.register(Artist)
+class ArtistAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'created_at')
+    search_fields = ('name',)
+    ordering = ('name',)
+
 # -------------------------
 # Song Admin
 # -------------------------
 @admin.register(Song)
 class SongAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'artist', 'album', 'duration', 'listen_count', 'created_at')
+    list_display = ('id', 'title', 'artist', 'album', 'duration_ms', 'listen_count', 'created_at')
     search_fields = ('title', 'artist')
-    list_filter = ('created_at', 'artist', 'album')
+    list_filter = ('created_at', 'primary_artist', 'album')
+    list_select_related = ('album', 'primary_artist')
     ordering = ('-created_at',)
 
 # -------------------------
@@ -20,14 +30,14 @@ class SongAdmin(admin.ModelAdmin):
 # -------------------------
 @admin.register(Album)
 class AlbumAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'artist', 'created_at')
+    list_display = ('id', 'name', 'artist', 'track_count', 'total_duration_ms', 'created_at')
     search_fields = ('name', 'artist')
-    list_filter = ('created_at', 'artist')
+    list_filter = ('created_at', 'primary_artist')
     ordering = ('-created_at',)
 
 @admin.register(Playlist)
 class PlaylistAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'user', 'created_at')
+    list_display = ('id', 'name', 'user', 'track_count', 'total_duration_ms', 'created_at')
     search_fields = ('name', 'user__username')
     list_filter = ('created_at', 'user')
     ordering = ('-created_at',)
@@ -46,7 +56,7 @@ class FavoriteSongAdmin(admin.ModelAdmin):
 
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'duration', 'created_at', 'thumbnail')
+    list_display = ('id', 'title', 'duration_ms', 'created_at', 'thumbnail')
     search_fields = ('title',)
     list_filter = ('created_at',)
 
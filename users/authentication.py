@@ -0,0 +1,133 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def record(self, field, amount=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class TokenCache:
+    """
+    Per-process LRU of validated tokens: key -> (user, token, expiry).
+    Signals (users.signals) drop entries on logout, token deletion and any
+    change to the user (password, is_active, ...); the TTL bounds how long
+    another worker process, which never sees those signals, can keep
+    accepting a revoked token.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.user_keys = {}     # user_id -> {key}, để xoá mọi token của một user
+        # Tăng mỗi lần invalidate: kết quả đọc từ DB trước đó không được ghi vào cache nữa
+        self.generation = 0
+        self.stats = TokenCacheStats()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                self.stats.record('expired')
+                entry = None
+            if entry is None:
+                self.stats.record('misses')
+                return None
+            self.entries.move_to_end(key)
+        self.stats.record('hits')
+        # Bản sao nông: request này gán thuộc tính lên user/token cũng không lọt sang request khác
+        return copy.copy(entry[0]), copy.copy(entry[1])
+
+    def set(self, key, user, token, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (user, token, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            self.user_keys.setdefault(user.pk, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.stats.record('evictions')
+
+    def _remove(self, key):
+        user, _, _ = self.entries.pop(key)
+        keys = self.user_keys.get(user.pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.user_keys[user.pk]
+
+    def invalidate_token(self, key):
+        with self.lock:
+            self.generation += 1
+            if key in self.entries:
+                self._remove(key)
+                self.stats.record('invalidations')
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            self.generation += 1
+            for key in list(self.user_keys.get(user_id, ())):
+                self._remove(key)
+                self.stats.record('invalidations')
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.user_keys.clear()
+
+    def info(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'max_entries': self.max_entries, 'ttl': self.ttl}
+
+
+token_cache = TokenCache(
+    max_entries=getattr(settings, 'TOKEN_CACHE_MAX_ENTRIES', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token + User query when the key was
+    validated recently in this process. Unknown or inactive keys are never
+    cached, so they keep failing exactly like the base class.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        generation = token_cache.generation
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, generation)
+        return user, token
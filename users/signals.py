@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    # Đăng xuất / đổi mật khẩu / admin xoá token
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def drop_user_tokens(sender, instance, **kwargs):
+    # User đổi mật khẩu, bị khoá (is_active) hay sửa thông tin: bản user trong cache đã cũ
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def drop_tokens_on_logout(sender, user, **kwargs):
+    if user is not None:
+        token_cache.invalidate_user(user.pk)
@@ -1,3 +1,92 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.authtoken.models import Token
+
+from .authentication import TokenCache, token_cache
+
+
+class TokenCacheTests(SimpleTestCase):
+    def user(self, pk):
+        return get_user_model()(pk=pk, username=f'user{pk}')
+
+    def test_hit_returns_copies(self):
+        cache = TokenCache(max_entries=10, ttl=60)
+        user = self.user(1)
+        cache.set('key', user, 'token', cache.generation)
+        cached_user, cached_token = cache.get('key')
+        self.assertEqual(cached_user.pk, 1)
+        self.assertIsNot(cached_user, user)
+        self.assertEqual(cache.stats.hits, 1)
+
+    def test_entries_expire_after_ttl(self):
+        cache = TokenCache(max_entries=10, ttl=60)
+        with mock.patch('users.authentication.time.monotonic', return_value=1000):
+            cache.set('key', self.user(1), 'token', cache.generation)
+        with mock.patch('users.authentication.time.monotonic', return_value=1061):
+            self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.stats.expired, 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenCache(max_entries=2, ttl=60)
+        for key in ('a', 'b'):
+            cache.set(key, self.user(1), key, cache.generation)
+        cache.get('a')
+        cache.set('c', self.user(2), 'c', cache.generation)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_invalidate_user_drops_all_their_tokens(self):
+        cache = TokenCache(max_entries=10, ttl=60)
+        cache.set('a', self.user(1), 'a', cache.generation)
+        cache.set('b', self.user(1), 'b', cache.generation)
+        cache.set('c', self.user(2), 'c', cache.generation)
+        cache.invalidate_user(1)
+        self.assertEqual([cache.get(key) is None for key in 'abc'], [True, True, False])
+
+    def test_read_racing_an_invalidation_is_not_cached(self):
+        cache = TokenCache(max_entries=10, ttl=60)
+        generation = cache.generation
+        cache.invalidate_token('key')
+        cache.set('key', self.user(1), 'token', generation)
+        self.assertIsNone(cache.get('key'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='reader', password='old-password')
+
+    def setUp(self):
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+
+    def get(self, key):
+        return self.client.get('/api/music/playlists/', HTTP_AUTHORIZATION=f'Token {key}')
+
+    def test_second_request_skips_token_lookup(self):
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+        with self.assertNumQueries(2):
+            # Chỉ còn query của endpoint (playlist watermark + danh sách)
+            self.assertEqual(self.get(self.token.key).status_code, 200)
+
+    def test_unknown_token_is_rejected(self):
+        self.assertEqual(self.get('0' * 40).status_code, 401)
+
+    def test_logout_revokes_cached_token(self):
+        self.get(self.token.key)
+        response = self.client.post('/api/users/logout/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get(self.token.key).status_code, 401)
+
+    def test_password_change_rotates_tokens(self):
+        self.get(self.token.key)
+        response = self.client.post(
+            '/api/users/change_password/', {'old_password': 'old-password', 'new_password': 'new-password-1'},
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(self.token.key).status_code, 401)
+        self.assertEqual(self.get(response.json()['token']).status_code, 200)
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import register, login
+from .views import change_password, login, logout, register, token_cache_stats
 
 urlpatterns = [
     path('register/', register, name='register'),
     path('login/', login, name='login'),
+    path('logout/', logout, name='logout'),
+    path('change_password/', change_password, name='change-password'),
+    path('token-cache/stats/', token_cache_stats, name='token-cache-stats'),
 ]
@@ -4,10 +4,11 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from .serializers import UserSerializer
 from django.contrib.auth import get_user_model
 from rest_framework.exceptions import ValidationError
+from .authentication import token_cache
 
 
 
@@ -56,4 +57,40 @@ def login(request):
         token, created = Token.objects.get_or_create(user=user)
         return Response({'token': token.key, 'user': {'id': user.id, 'email': user.email}}, status=status.HTTP_200_OK)
     
-    return Response({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    return Response({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    # Xoá token; signal post_delete bỏ nó khỏi cache xác thực
+    if isinstance(request.auth, Token):
+        request.auth.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def change_password(request):
+    user = request.user
+    old_password = request.data.get('old_password')
+    new_password = request.data.get('new_password')
+
+    if not user.check_password(old_password):
+        return Response({'error': 'Mật khẩu hiện tại không đúng.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not new_password or len(new_password) < 8:
+        raise ValidationError("Mật khẩu phải có ít nhất 8 ký tự.")
+
+    user.set_password(new_password)
+    user.save()
+    # Thu hồi mọi token cũ (mọi thiết bị) và cấp token mới cho phiên hiện tại
+    Token.objects.filter(user=user).delete()
+    token = Token.objects.create(user=user)
+    return Response({'token': token.key}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def token_cache_stats(request):
+    """ Thống kê hit/miss của cache xác thực token trong process này """
+    return Response(dict(token_cache.info(), **token_cache.stats.as_dict()))